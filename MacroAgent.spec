@@ -3,7 +3,7 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = [('src/dashboard.py', 'src'), ('.env', '.env')]
 binaries = []
-hiddenimports = ['streamlit', 'altair']
+hiddenimports = ['streamlit', 'altair', 'yfinance', 'httpx']
 tmp_ret = collect_all('streamlit')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('altair')
@@ -0,0 +1,161 @@
+"""
+End-to-end benchmark of the daily audit (Session.ask_stream with DAILY_AUDIT_PROMPT),
+run offline against recorded upstream responses.
+
+    python benchmarks/bench_audit.py                      # synthetic cassette
+    python benchmarks/bench_audit.py --cassette DIR       # replay a recording
+    python benchmarks/bench_audit.py --record DIR         # record one live audit
+    python benchmarks/bench_audit.py --latency "fred=80,yahoo=400,finra=600"
+
+Each iteration runs in a fresh process with an empty data cache, so the
+numbers cover the full fetch path (cold start of the tool layer excluded).
+Reports end-to-end and time-to-first-result p50/p95, median per-tool latency
+and upstream calls.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def synthesize_cassette(path):
+    """
+    Writes a deterministic cassette covering every request the daily audit
+    makes, so the suite needs neither network nor an API key.
+    """
+    import numpy as np
+    import pandas as pd
+
+    os.environ["MACRO_AGENT_CASSETTE"] = path
+    from src.tools import replay
+    from src.tools.finra import FINRA_URL
+    from src.tools.fred import FRED_API_URL, SERIES_REGISTRY
+    from src.tools.market_data import PERIOD_DAYS, TICKER_REGISTRY
+
+    for i, series_id in enumerate(SERIES_REGISTRY):
+        params = {"series_id": series_id, "sort_order": "desc", "limit": 1, "file_type": "json"}
+        body = json.dumps({"observations": [{"date": "2024-06-01", "value": str(100.0 + i)}]}).encode()
+        replay.save("fred", replay.http_key("GET", f"{FRED_API_URL}/series/observations", params),
+                    {"status": 200, "headers": [("content-type", "application/json")], "content": body})
+
+    months = pd.date_range(end="2024-06-01", periods=60, freq="MS")
+    rows = "".join(f"<tr><td>{d.strftime('%b-%y')}</td><td>{700000 + 1000 * i}</td></tr>" for i, d in enumerate(months))
+    html = ("<table><tr><th>Month/Year</th><th>Debit Balances in Customers' Securities Margin Accounts</th></tr>"
+            f"{rows}</table>").encode()
+    replay.save("finra", replay.http_key("GET", FINRA_URL),
+                {"status": 200, "headers": [("content-type", "text/html")], "content": html})
+
+    window = {"interval": "1d", "group_by": "ticker", "auto_adjust": True, "progress": False, "threads": True}
+    tickers = sorted({sym for group in TICKER_REGISTRY.values() for sym in group})
+    for period in ("1d", "5d", "2mo", "2y", "5y"):
+        index = pd.bdate_range(end="2024-06-01", periods=max(1, int(PERIOD_DAYS[period] * 5 / 7)), name="Date")
+        for n, sym in enumerate(tickers):
+            close = 100 + 10 * np.sin(np.arange(len(index)) / (20 + n))
+            frame = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                                  "Volume": 1e6}, index=index)
+            replay.save("yahoo", replay.yahoo_key(sym, dict(window, period=period)), frame)
+
+
+async def _audit():
+    from src.agents.macro_watchdog import macro_agent
+    from src.antigravity.core import Session
+    from src.main import AUDIT_DEADLINE, DAILY_AUDIT_PROMPT, HEDGE_AFTER
+    from src.tools.http_client import close_client
+
+    import time
+    # The tools import these lazily on first use; load them up front so the
+    # timings exclude the tool layer's cold start, as before
+    import httpx, pandas, yfinance  # noqa: F401
+    session = await Session.start(agent=macro_agent, hedge_after=HEDGE_AFTER)
+    started = time.perf_counter()
+    first = None
+    async for chunk in session.ask_stream(DAILY_AUDIT_PROMPT, deadline=AUDIT_DEADLINE):
+        if first is None and chunk.kind == "result":
+            first = time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    await close_client()
+    return elapsed, first, session.last_timings, chunk.response.text
+
+
+def run_child():
+    """One audit in this process; prints a JSON result line."""
+    from src.antigravity import tracing
+    from src.tools import replay
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed, first, timings, text = asyncio.run(_audit())
+    # MACRO_AGENT_TRACE=path writes a Chrome trace of this run
+    tracing.export_from_env()
+    errors = text.count("ERROR")
+    print(json.dumps({"total": elapsed, "first": first, "tools": timings, "calls": replay.upstream_calls(), "errors": errors}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end audit benchmark")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--cassette", help="recorded cassette directory (default: synthetic)")
+    parser.add_argument("--record", metavar="DIR", help="record one live audit into DIR and exit")
+    parser.add_argument("--latency", default="fred=80,yahoo=400,finra=600",
+                        help="injected replay latency in ms, one number or per source")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    env = dict(os.environ)
+    env.setdefault("FRED_API_KEY", "replay")
+    if args.record:
+        env.update(MACRO_AGENT_REPLAY="record", MACRO_AGENT_CASSETTE=os.path.abspath(args.record),
+                   MACRO_AGENT_CACHE_DIR=tempfile.mkdtemp(prefix="macro-bench-"))
+        subprocess.run([sys.executable, __file__, "--child"], env=env, check=True)
+        print(f"Recorded cassette in {args.record}")
+        return
+
+    cassette = args.cassette
+    if cassette is None:
+        cassette = tempfile.mkdtemp(prefix="macro-cassette-")
+        synthesize_cassette(cassette)
+
+    env.update(MACRO_AGENT_REPLAY="replay", MACRO_AGENT_CASSETTE=os.path.abspath(cassette),
+               MACRO_AGENT_REPLAY_LATENCY_MS=args.latency)
+    runs = []
+    for _ in range(args.iterations):
+        env["MACRO_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="macro-bench-")
+        out = subprocess.run([sys.executable, __file__, "--child"], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+
+    totals = [r["total"] for r in runs]
+    print(f"Daily audit, {args.iterations} cold runs, injected latency: {args.latency}")
+    print(f"  end-to-end   p50={percentile(totals, 50) * 1000:8.1f}ms  p95={percentile(totals, 95) * 1000:8.1f}ms")
+    firsts = [r["first"] for r in runs if r["first"] is not None]
+    if firsts:
+        print(f"  first result p50={percentile(firsts, 50) * 1000:8.1f}ms  p95={percentile(firsts, 95) * 1000:8.1f}ms")
+    print("  per tool (median):")
+    for key in runs[0]["tools"]:
+        samples = [r["tools"][key] for r in runs if key in r["tools"]]
+        print(f"    {key:<20} {statistics.median(samples) * 1000:8.1f}ms")
+    print("  upstream calls per audit:")
+    for source, calls in sorted(runs[-1]["calls"].items()):
+        print(f"    {source:<20} {calls}")
+    if runs[-1]["errors"]:
+        print(f"  WARNING: {runs[-1]['errors']} tool results were errors (cassette incomplete?)")
+
+
+if __name__ == "__main__":
+    main()
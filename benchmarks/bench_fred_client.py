@@ -0,0 +1,130 @@
+"""
+Benchmark: per-call httpx clients (old behaviour) vs the shared FRED client.
+
+Starts a local stub of the FRED observations endpoint, fetches the dashboard's
+series both ways and reports the number of TCP connections opened (one
+handshake each) plus p50/p95 latency per call. The shared-client side calls
+_fred_get (pooled client + rate-limit scheduler) directly, so every sample is
+an HTTP round trip rather than a SQLite-store or TTL-cache hit.
+
+    python benchmarks/bench_fred_client.py --calls 24 --handshake-ms 20
+
+--handshake-ms delays every new connection on the server side to stand in
+for the TCP+TLS round trips a real api.stlouisfed.org connection costs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERIES = ["GFDEGDQ188S", "INDPRO", "M2SL", "RRPONTSYD", "T10Y2Y", "UMCSENT",
+          "UNRATE", "HOUST", "MORTGAGE30US", "FEDFUNDS"]
+
+
+class StubFredHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    connections = 0
+    handshake_delay = 0.0
+    _lock = threading.Lock()
+
+    def setup(self):
+        with StubFredHandler._lock:
+            StubFredHandler.connections += 1
+        time.sleep(StubFredHandler.handshake_delay)
+        super().setup()
+
+    def do_GET(self):
+        body = json.dumps({"observations": [{"date": "2024-01-01", "value": "100.0"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_per_call_clients(base_url, calls):
+    """The pre-pooling code path: a fresh AsyncClient for every request."""
+    import httpx
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{base_url}/series/observations",
+                                        params={"series_id": SERIES[i % len(SERIES)], "limit": 1})
+            response.json()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_shared_client(calls):
+    from src.tools.fred import _fred_get
+    from src.tools.http_client import close_client
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        await _fred_get("series/observations", {"series_id": SERIES[i % len(SERIES)], "limit": 1})
+        latencies.append(time.perf_counter() - start)
+    await close_client()
+    return latencies
+
+
+def report(label, latencies, connections):
+    print(f"{label:<22} connections={connections:<4} "
+          f"p50={percentile(latencies, 50) * 1000:7.2f}ms  "
+          f"p95={percentile(latencies, 95) * 1000:7.2f}ms  "
+          f"mean={statistics.mean(latencies) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=24)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFredHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/fred"
+    StubFredHandler.handshake_delay = args.handshake_ms / 1000.0
+
+    # Must be set before src.tools.fred is imported. A throwaway cache dir keeps
+    # the stub's observations out of the real FRED store, and the rate limit is
+    # lifted so the scheduler's pacing doesn't show up as client latency.
+    os.environ["FRED_API_KEY"] = "benchmark"
+    os.environ["FRED_API_URL"] = base_url
+    os.environ["FRED_RATE_LIMIT_PER_MIN"] = "1000000"
+    os.environ["FRED_BURST"] = str(args.calls)
+    os.environ["MACRO_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="macro-bench-")
+
+    print(f"{args.calls} sequential FRED calls, {args.handshake_ms}ms simulated handshake")
+
+    StubFredHandler.connections = 0
+    latencies = asyncio.run(run_per_call_clients(base_url, args.calls))
+    report("before (per-call)", latencies, StubFredHandler.connections)
+
+    StubFredHandler.connections = 0
+    latencies = asyncio.run(run_shared_client(args.calls))
+    report("after (shared pool)", latencies, StubFredHandler.connections)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Load test of the report API (src/server.py), run offline against replayed
+upstream responses.
+
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --clients 1,10,100 --duration 5 --max-age 2
+
+For each client count, starts the server in a child process on an empty
+cache dir and hammers GET /report?max_age=... with that many concurrent
+keep-alive clients. Reports throughput and latency per step, plus how many
+source refreshes and upstream requests the server made (from its /metrics,
+counted from startup, so the cold first fill is included). With coalescing,
+both stay flat however many clients there are.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from bench_audit import percentile, synthesize_cassette
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def counter_total(text: str, name: str) -> float:
+    """Sum of a counter's samples across labels in Prometheus text."""
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith(name + "{") or line.startswith(name + " "))
+
+
+async def server_counters(client: httpx.AsyncClient):
+    text = (await client.get("/metrics")).text
+    return counter_total(text, "macro_agent_daemon_refreshes_total"), counter_total(text, "macro_agent_upstream_requests_total")
+
+
+async def load_step(base_url: str, clients: int, duration: float, max_age: float):
+    """Load on a freshly started server; refresh and upstream counts are since its startup."""
+    latencies = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        ends_at = time.perf_counter() + duration
+
+        async def consumer():
+            while time.perf_counter() < ends_at:
+                started = time.perf_counter()
+                response = await client.get("/report", params={"max_age": max_age})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(consumer() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        refreshes, upstream = await server_counters(client)
+    return latencies, elapsed, refreshes, upstream
+
+
+async def wait_listening(base_url: str, timeout: float = 60.0):
+    """Waits for the server to accept requests (not for its first refresh: the load step should see that)."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                (await client.get("/healthz", timeout=timeout)).raise_for_status()
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError("server did not come up")
+
+
+def start_server(env: dict) -> Tuple[subprocess.Popen, str]:
+    """The report API in a child process on a cold cache dir."""
+    port = free_port()
+    env = dict(env, MACRO_AGENT_CACHE_DIR=tempfile.mkdtemp(prefix="macro-bench-"))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "server.py"), "--port", str(port)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def run(args, env: dict):
+    print(f"GET /report?max_age={args.max_age}, {args.duration:.0f}s per step (cold start each), "
+          f"injected latency: {args.latency}")
+    print(f"  {'clients':>7} {'requests':>9} {'req/s':>8} {'p50':>9} {'p95':>9} {'refreshes':>10} {'upstream':>9}")
+    for clients in args.clients:
+        server, base_url = start_server(env)
+        try:
+            await wait_listening(base_url)
+            latencies, elapsed, refreshes, upstream = await load_step(base_url, clients, args.duration, args.max_age)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"  {clients:>7} {len(latencies):>9} {len(latencies) / elapsed:>8.0f} "
+              f"{percentile(latencies, 50) * 1000:>7.1f}ms {percentile(latencies, 95) * 1000:>7.1f}ms "
+              f"{refreshes:>10.0f} {upstream:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the report API")
+    parser.add_argument("--clients", default="1,10,50,200", type=lambda s: [int(n) for n in s.split(",")])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-age", type=float, default=2.0, help="freshness each request asks for (s)")
+    parser.add_argument("--cassette", help="recorded cassette directory (default: synthetic)")
+    parser.add_argument("--latency", default="fred=80,yahoo=400,finra=600",
+                        help="injected replay latency in ms, one number or per source")
+    args = parser.parse_args()
+
+    cassette = args.cassette
+    if cassette is None:
+        cassette = tempfile.mkdtemp(prefix="macro-cassette-")
+        synthesize_cassette(cassette)
+
+    env = dict(os.environ)
+    env.setdefault("FRED_API_KEY", "replay")
+    env.update(MACRO_AGENT_REPLAY="replay", MACRO_AGENT_CASSETTE=os.path.abspath(cassette),
+               MACRO_AGENT_REPLAY_LATENCY_MS=args.latency)
+    asyncio.run(run(args, env))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Startup (import) time of the entry points, checked against a budget.
+
+    python benchmarks/bench_startup.py            # report, exit 1 if over budget
+    python benchmarks/bench_startup.py --top 15   # also list the slowest imports
+    python benchmarks/bench_startup.py --update   # rewrite the budget from this machine
+
+Each entry is imported in a fresh interpreter with `-X importtime`, several
+times; the median cumulative import time of the entry module is compared
+with its budget in startup_budget.json. The budget also lists modules an
+entry must not import at startup (heavy dependencies that are supposed to
+load lazily, on first tool use). Entries whose own dependencies are not
+installed (e.g. streamlit) are reported and skipped.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, "benchmarks", "startup_budget.json")
+
+# Headroom --update leaves over the measured median
+UPDATE_HEADROOM = 1.5
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) per `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative)))
+    return rows
+
+
+def measure(module: str) -> Optional[Tuple[float, List[Tuple[str, int, int]]]]:
+    """Cumulative import time of `module` in ms (None if it failed) and every import row."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    rows = parse_importtime(proc.stderr)
+    entry = [cumulative for name, _, cumulative in rows if name == module]
+    if proc.returncode != 0 or not entry:
+        return None
+    return entry[-1] / 1000.0, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry point import-time budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports of each entry")
+    parser.add_argument("--update", action="store_true", help="rewrite the budget from this machine's medians")
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE, encoding="utf-8") as f:
+        budget: Dict[str, dict] = json.load(f)
+
+    # Warm the bytecode cache so the first run doesn't pay for compiling
+    for entry in budget:
+        measure(budget[entry]["module"])
+
+    failures = []
+    print(f"Startup import time, median of {args.runs} runs (budget: {os.path.relpath(BUDGET_FILE, ROOT)})")
+    print(f"  {'entry':<22} {'median':>9} {'budget':>9}")
+    for entry, spec in budget.items():
+        samples, rows = [], []
+        for _ in range(args.runs):
+            result = measure(spec["module"])
+            if result is None:
+                break
+            samples.append(result[0])
+            rows = result[1]
+        if not samples:
+            print(f"  {entry:<22} skipped: import failed (missing dependencies?)")
+            continue
+
+        median = statistics.median(samples)
+        status = "ok" if median <= spec["budget_ms"] else "OVER"
+        print(f"  {entry:<22} {median:>7.1f}ms {spec['budget_ms']:>7.0f}ms  {status}")
+        if status != "ok":
+            failures.append(entry)
+        loaded = {name for name, _, _ in rows}
+        eager = [m for m in spec.get("lazy", []) if m in loaded]
+        if eager:
+            print(f"    imported at startup but should load lazily: {', '.join(eager)}")
+            failures.append(entry)
+        if args.top:
+            for name, self_us, cumulative in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+                print(f"    {cumulative / 1000.0:>8.1f}ms  {name}")
+        if args.update:
+            spec["budget_ms"] = round(median * UPDATE_HEADROOM)
+
+    if args.update:
+        with open(BUDGET_FILE, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"Budget updated ({UPDATE_HEADROOM}x the medians).")
+    elif failures:
+        print(f"FAILED: {', '.join(dict.fromkeys(failures))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
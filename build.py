@@ -18,6 +18,9 @@ PyInstaller.__main__.run([
     '--collect-all=pandas',
     '--hidden-import=streamlit',
     '--hidden-import=altair',
+    # Loaded lazily by the tools (src.antigravity.lazy), so not seen by the analysis
+    '--hidden-import=yfinance',
+    '--hidden-import=httpx',
     # Data Files
     '--add-data=src/dashboard.py;src',  # Include dashboard source
     '--add-data=.env;.env' if os.path.exists('.env') else '', # Attempt to bundle env (optional)
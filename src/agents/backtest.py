@@ -0,0 +1,372 @@
+"""
+Backtest of the AI RECOMMENDATION allocations.
+
+Replays the watchdog's rules (WATCHDOG_RULES) over history: every business
+day the allocations recommended from that day's data become a target
+portfolio of their ETFs (tags weighted equally, ETFs equally within a tag,
+anything unallocated in T-Bills), held between rebalances:
+
+    data = run_sync(load_data(years=15))
+    result = backtest(data, rebalance="M", cost_bps=5)
+    print(result.summary())
+    result.rolling_sharpe().plot(); result.drawdown().plot()
+
+    # Every combination of thresholds, best Sharpe first
+    sweep(data, {Condition("vix", ">", 30): [25, 30, 35], Condition("score", ">", 0): [-1, 0, 1]})
+
+A signal from the close of day t is traded at the close of day t + `lag`
+(default one day later) and earns returns from the day after. Holdings drift
+with prices between rebalances; each rebalance pays `cost_bps` on the
+turnover. Everything is array math over (combination, day, asset), so a
+sweep tiles the inputs once per combination, passes each combination's
+thresholds as input columns (RuleEngine.with_thresholds) and evaluates a
+whole batch of combinations in one pass.
+
+Indicators come from health_history (as known on each day: FRED series from
+their vintages, so neither revisions nor release lags leak in), plus the
+sector, crypto and global momentum the allocations read, computed from the
+same closes the tools use.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+from src.agents.health_history import as_of, history_period, indicators, load_inputs
+from src.agents.macro_watchdog import WATCHDOG_RULES
+from src.antigravity import tracing
+from src.antigravity.lazy import lazy_import
+from src.antigravity.rules import Condition, RuleEngine
+from src.antigravity.tools import run_blocking
+from src.tools import market_data
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# ETFs bought for each allocation tag. Bitcoin (IBIT) is backtested on
+# BTC-USD: the ETF only listed in 2024.
+ALLOCATION_ETFS = {
+    "INFLATION_HEDGE": ("GLD", "XLE"),
+    "GROWTH": ("XLK", "NVDA"),
+    "CYCLICALS": ("XLI",),
+    "DEFENSIVE": ("XLV", "XLU"),
+    "CASH": ("BIL",),
+    "HOUSING": ("ITB",),
+    "CRYPTO": ("BTC-USD",),
+    "GLOBAL_VALUE": ("EZU", "EWJ"),
+}
+# Holds whatever is not allocated (earns nothing before it listed)
+CASH_SYMBOL = "BIL"
+BENCHMARK = "SPY"
+
+# Momentum inputs of the allocations: (indicator, symbol, bars), like the
+# tools compute them (1-month sector moves, 5-bar crypto/global moves)
+MOMENTUM = (
+    ("tech_mom", "XLK", 21), ("util_mom", "XLU", 21), ("energy_mom", "XLE", 21), ("ind_mom", "XLI", 21),
+    ("btc_change", "BTC-USD", 4), ("ezu_chg", "EZU", 4), ("spy_chg", "SPY", 4),
+)
+
+TRADING_DAYS = 252
+REBALANCE_FREQUENCIES = {"D": None, "W": "W", "M": "M", "Q": "Q"}
+# Combinations evaluated per pass of a sweep (bounds the (batch, day, asset) arrays)
+SWEEP_BATCH = 64
+
+
+@dataclass
+class BacktestData:
+    """Everything a backtest reads, aligned on one business-day index."""
+    index: pd.DatetimeIndex
+    # Rule engine indicators, one value per day
+    signals: Dict[str, np.ndarray]
+    symbols: List[str]
+    # Daily simple returns (days x symbols); 0 where a symbol has no price yet
+    returns: np.ndarray
+    # Whether each symbol has a price on each day (can be bought)
+    available: np.ndarray
+
+
+@dataclass
+class BacktestResult:
+    returns: pd.Series
+    # Target weights held on each day
+    weights: pd.DataFrame
+    turnover: pd.Series
+    metrics: Dict[str, float]
+    benchmark_metrics: Dict[str, float] = field(default_factory=dict)
+    cash_returns: Optional[pd.Series] = None
+
+    @property
+    def equity(self) -> pd.Series:
+        return (1 + self.returns).cumprod()
+
+    def drawdown(self) -> pd.Series:
+        equity = self.equity
+        return equity / equity.cummax() - 1
+
+    def rolling_sharpe(self, window: int = TRADING_DAYS) -> pd.Series:
+        """Annualized Sharpe ratio (over T-Bills) of the trailing `window` days."""
+        excess = self.returns - (self.cash_returns if self.cash_returns is not None else 0.0)
+        rolling = excess.rolling(window)
+        return rolling.mean() / rolling.std() * np.sqrt(TRADING_DAYS)
+
+    def summary(self) -> str:
+        lines = [f"{self.returns.index[0]:%Y-%m-%d} to {self.returns.index[-1]:%Y-%m-%d}"]
+        lines.append(f"  {'':<10} {'CAGR':>8} {'Vol':>8} {'Sharpe':>8} {'MaxDD':>8} {'Turnover':>9}")
+        for name, m in (("Strategy", self.metrics), (BENCHMARK, self.benchmark_metrics)):
+            if m:
+                lines.append(f"  {name:<10} {m['cagr']:>8.1%} {m['volatility']:>8.1%} {m['sharpe']:>8.2f} "
+                             f"{m['max_drawdown']:>8.1%} {m['turnover']:>8.1f}x")
+        return "\n".join(lines)
+
+
+def momentum(closes: pd.DataFrame, index: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+    """The allocations' momentum indicators (% moves), as known on each day of `index`."""
+    columns = {}
+    for name, symbol, bars in MOMENTUM:
+        series = closes[symbol].dropna() if symbol in closes else pd.Series(dtype=float)
+        move = ((series - series.shift(bars)) / series.shift(bars)) * 100
+        # A move the tools couldn't compute reads as 0, like extract_inputs' defaults
+        columns[name] = np.nan_to_num(np.round(as_of(move, index).to_numpy(dtype=float), 2))
+    return columns
+
+
+def prepare(inputs: pd.DataFrame, closes: pd.DataFrame) -> BacktestData:
+    """BacktestData from health_history.align_inputs columns and daily closes (one column per symbol)."""
+    index = inputs.index
+    signals = indicators(inputs)
+    signals.update(momentum(closes, index))
+
+    symbols = list(dict.fromkeys(s for etfs in ALLOCATION_ETFS.values() for s in etfs))
+    symbols += [s for s in (CASH_SYMBOL, BENCHMARK) if s not in symbols]
+    prices = pd.DataFrame({s: as_of(closes[s] if s in closes else pd.Series(dtype=float), index) for s in symbols})
+    returns = prices.pct_change(fill_method=None).to_numpy(dtype=float)
+    available = prices.notna().to_numpy()
+    return BacktestData(index=index, signals=signals, symbols=symbols,
+                        returns=np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0), available=available)
+
+
+async def load_data(years: int = 20, end: Optional[date] = None, point_in_time: bool = True) -> BacktestData:
+    """
+    Fetches the score inputs (FRED series as published on each day, see
+    health_history.load_inputs) and every recommended ETF's closes over `years`.
+    """
+    symbols = list(dict.fromkeys(
+        market_data.symbols("sectors") + market_data.symbols("global") + market_data.symbols("crypto")
+        + market_data.symbols("allocations")))
+    inputs, panel = await asyncio.gather(
+        load_inputs(years, end, point_in_time),
+        run_blocking(market_data.history, symbols, history_period(years)),
+    )
+    closes = panel["Close"] if not panel.empty else pd.DataFrame()
+    return prepare(inputs, closes)
+
+
+def _rebalance_days(index: pd.DatetimeIndex, rebalance: Union[str, int]) -> np.ndarray:
+    """Boolean mask of the days the portfolio trades: every `rebalance` days, or the first day of each D/W/M/Q."""
+    days = len(index)
+    if isinstance(rebalance, int):
+        if rebalance < 1:
+            raise ValueError("rebalance interval must be at least one day")
+        return np.arange(days) % rebalance == 0
+    if rebalance not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"unknown rebalance frequency {rebalance!r} (one of {', '.join(REBALANCE_FREQUENCIES)})")
+    if REBALANCE_FREQUENCIES[rebalance] is None:
+        return np.ones(days, dtype=bool)
+    periods = index.to_period(REBALANCE_FREQUENCIES[rebalance]).asi8
+    return np.concatenate([[True], periods[1:] != periods[:-1]])
+
+
+@dataclass
+class _Portfolios:
+    """
+    Every distinct target portfolio: one per (set of recommended tags, set of
+    symbols trading), which is a handful per run rather than one per day.
+    """
+    # (availability regimes x tag sets + 1 x symbols); the last tag set is all cash
+    weights: np.ndarray
+    # Availability regime of each day
+    regime: np.ndarray
+    # Tag set recommended on each day, per combination (combinations x days)
+    codes: np.ndarray
+
+
+def _distinct(flags: np.ndarray):
+    """The distinct rows of a boolean matrix, and the index of each row among them."""
+    if flags.shape[1] > 62:
+        raise ValueError("too many columns to pack (62 at most)")
+    packed = flags.astype(np.int64) @ (np.int64(1) << np.arange(flags.shape[1], dtype=np.int64))
+    if flags.shape[1] <= 16:
+        # Few enough bit patterns to count instead of sort
+        present = np.flatnonzero(np.bincount(packed, minlength=1 << flags.shape[1]))
+        position = np.zeros(1 << flags.shape[1], dtype=np.int64)
+        position[present] = np.arange(len(present))
+        unique, index = present, position[packed]
+    else:
+        unique, index = np.unique(packed, return_inverse=True)
+    return (unique[:, None] >> np.arange(flags.shape[1])) & 1, index.reshape(-1)
+
+
+def _portfolios(data: BacktestData, tags: Sequence[str], chosen: np.ndarray) -> _Portfolios:
+    """
+    Target portfolios of the recommended tags (combinations x days x tags):
+    tags equally weighted, each split across its ETFs that trade that day;
+    the rest goes to cash.
+    """
+    tag_sets, codes = _distinct(chosen.reshape(-1, len(tags)))
+    regimes, regime = _distinct(data.available)
+
+    members = np.array([[s in ALLOCATION_ETFS.get(tag, ()) for s in data.symbols] for tag in tags], dtype=float)
+    tradable = members[None, :, :] * regimes[:, None, :]
+    per_etf = tradable / np.maximum(tradable.sum(axis=2, keepdims=True), 1.0)
+    per_tag = tag_sets / np.maximum(tag_sets.sum(axis=1, keepdims=True), 1)
+    weights = np.einsum("ug,rgs->rus", per_tag, per_etf)
+    cash = data.symbols.index(CASH_SYMBOL)
+    weights[:, :, cash] += 1.0 - weights.sum(axis=2)
+    all_cash = np.zeros((len(regimes), 1, len(data.symbols)))
+    all_cash[:, :, cash] = 1.0
+    return _Portfolios(weights=np.concatenate([weights, all_cash], axis=1), regime=regime,
+                       codes=codes.reshape(chosen.shape[:2]))
+
+
+def _simulate(data: BacktestData, portfolios: _Portfolios, rebalance: np.ndarray, lag: int, cost: float):
+    """
+    Daily net returns and turnover (each combinations x days) of trading to
+    the day t - `lag` targets at the close of every rebalance day t, plus the
+    (regime, tag set) held on each day.
+    """
+    combos, days = portfolios.codes.shape
+    weights = portfolios.weights
+    all_cash = weights.shape[1] - 1
+
+    trade_days = np.flatnonzero(rebalance)
+    source = np.maximum(trade_days - lag, 0)
+    traded_regime = portfolios.regime[source]
+    traded = portfolios.codes[:, source]
+    # Nothing to act on yet: stay in cash
+    traded[:, trade_days < lag] = all_cash
+
+    # Each day's return is earned on the portfolio of the last trade before it
+    trade_count = np.cumsum(rebalance) - 1
+    holding = np.concatenate([[0], trade_count[:-1]])
+    last_trade = trade_days[holding]
+
+    # Growth of each symbol since the last trade, up to today and up to
+    # yesterday, and what that makes of each candidate portfolio (days x
+    # portfolios): per combination only a lookup remains
+    growth_log = np.cumsum(np.log1p(data.returns), axis=0)
+    growth = np.exp(growth_log - growth_log[last_trade])
+    growth_before = np.exp(np.vstack([growth_log[:1], growth_log[:-1]]) - growth_log[last_trade])
+    candidates = weights[traded_regime[holding]]
+    value = np.einsum("tus,ts->tu", candidates, growth)
+    value_before = np.einsum("tus,ts->tu", candidates, growth_before)
+    held = traded[:, holding]
+    day = np.arange(days)
+    net = value[day, held] / value_before[day, held] - 1.0
+    net[:, 0] = 0.0
+
+    # Turnover: from the drifted holdings (cash at the start) to the new targets
+    target = weights[traded_regime, traded]
+    drifted = weights[traded_regime[0], np.full_like(traded, all_cash)]
+    later = np.flatnonzero(trade_days > 0)
+    if len(later):
+        before = later - 1
+        grown = weights[traded_regime[before], traded[:, before]] * growth[trade_days[later]]
+        drifted[:, later] = grown / grown.sum(axis=2, keepdims=True)
+    turnover = np.zeros((combos, days))
+    turnover[:, trade_days] = np.abs(target - drifted).sum(axis=2)
+    net -= cost * turnover
+    return net, turnover, (traded_regime[holding], held)
+
+
+def _metrics(net: np.ndarray, turnover: np.ndarray, cash: np.ndarray) -> Dict[str, np.ndarray]:
+    """Performance of each row of daily returns (combinations x days)."""
+    years = net.shape[1] / TRADING_DAYS
+    equity = np.cumprod(1.0 + net, axis=1)
+    excess = net - cash
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = excess.mean(axis=1) / excess.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    return {
+        "total_return": equity[:, -1] - 1.0,
+        "cagr": equity[:, -1] ** (1.0 / years) - 1.0,
+        "volatility": net.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS),
+        "sharpe": sharpe,
+        "max_drawdown": (equity / np.maximum.accumulate(equity, axis=1) - 1.0).min(axis=1),
+        # Traded value per year, in multiples of the portfolio
+        "turnover": turnover.sum(axis=1) / 2.0 / years,
+    }
+
+
+def _check(data: BacktestData, lag: int):
+    if lag < 0:
+        raise ValueError("lag cannot be negative")
+    if len(data.index) < 2:
+        raise ValueError("need at least two days of history")
+
+
+def backtest(data: BacktestData, rebalance: Union[str, int] = "M", cost_bps: float = 5.0, lag: int = 1,
+             engine: RuleEngine = WATCHDOG_RULES) -> BacktestResult:
+    """
+    Trades the allocations `engine` recommends over `data`, rebalancing daily
+    ("D"), on the first day of each week/month/quarter ("W"/"M"/"Q") or every
+    N days, paying `cost_bps` basis points on each rebalance's turnover.
+    """
+    _check(data, lag)
+    with tracing.span("backtest.run", days=len(data.index), rebalance=str(rebalance)):
+        evaluation = engine.evaluate(data.signals)
+        portfolios = _portfolios(data, [a.tag for a in engine.allocations], evaluation.allocations[None])
+        net, turnover, (regime, held) = _simulate(data, portfolios, _rebalance_days(data.index, rebalance),
+                                                  lag, cost_bps / 1e4)
+
+    cash = data.returns[:, data.symbols.index(CASH_SYMBOL)]
+    bench = data.returns[:, data.symbols.index(BENCHMARK)]
+    metrics = {name: float(values[0]) for name, values in _metrics(net, turnover, cash).items()}
+    benchmark_metrics = {}
+    if data.available[:, data.symbols.index(BENCHMARK)].any():
+        # Buy and hold
+        benchmark_metrics = {name: float(values[0])
+                             for name, values in _metrics(bench[None], np.zeros_like(turnover), cash).items()}
+    return BacktestResult(
+        returns=pd.Series(net[0], index=data.index, name="returns"),
+        weights=pd.DataFrame(portfolios.weights[regime, held[0]], index=data.index, columns=data.symbols),
+        turnover=pd.Series(turnover[0], index=data.index, name="turnover"),
+        metrics=metrics,
+        benchmark_metrics=benchmark_metrics,
+        cash_returns=pd.Series(cash, index=data.index, name="cash"),
+    )
+
+
+def sweep(data: BacktestData, grid: Mapping[Condition, Sequence[float]], rebalance: Union[str, int] = "M",
+          cost_bps: float = 5.0, lag: int = 1, engine: RuleEngine = WATCHDOG_RULES,
+          batch: int = SWEEP_BATCH) -> pd.DataFrame:
+    """
+    Backtests every combination of the thresholds in `grid` (condition ->
+    values to try); one row per combination, best Sharpe first.
+    """
+    _check(data, lag)
+    conditions = list(grid)
+    combos = np.array(list(itertools.product(*(grid[c] for c in conditions))), dtype=float).reshape(-1, len(conditions))
+    columns = [f"threshold {i}" for i in range(len(conditions))]
+    swept = engine.with_thresholds(dict(zip(conditions, columns)))
+    tags = [a.tag for a in swept.allocations]
+    trades = _rebalance_days(data.index, rebalance)
+    cash = data.returns[:, data.symbols.index(CASH_SYMBOL)]
+    days = len(data.index)
+
+    results: Dict[str, List[np.ndarray]] = {}
+    with tracing.span("backtest.sweep", combinations=len(combos), days=days):
+        for start in range(0, len(combos), batch):
+            chunk = combos[start:start + batch]
+            inputs = {name: np.tile(values, len(chunk)) for name, values in data.signals.items()}
+            inputs.update({column: np.repeat(chunk[:, i], days) for i, column in enumerate(columns)})
+            chosen = swept.evaluate(inputs).allocations.reshape(len(chunk), days, len(tags))
+            net, turnover, _ = _simulate(data, _portfolios(data, tags, chosen), trades, lag, cost_bps / 1e4)
+            for name, values in _metrics(net, turnover, cash).items():
+                results.setdefault(name, []).append(values)
+
+    table = pd.DataFrame(combos, columns=[f"{c.indicator} {c.op} {c.threshold}" for c in conditions])
+    for name, parts in results.items():
+        table[name] = np.concatenate(parts)
+    return table.sort_values("sharpe", ascending=False, ignore_index=True)
@@ -0,0 +1,154 @@
+"""
+Macro Health Score over history.
+
+analyze_macro_data scores one snapshot of scalar values. This module lines
+every scored input up on a daily (business day) index, as known on each day
+(last observation carried forward), and runs the watchdog's rule engine
+(WATCHDOG_RULES) over whole columns at once:
+
+    history = run_sync(health_history(years=20))
+    history[["score", "verdict"]].tail()
+
+Scoring 20 years (~5k rows) takes under a millisecond; loading the data
+is the slow part and goes through the same cached tools as the audit. FRED
+inputs are point in time by default: each day sees the observations and
+revisions published by then (ALFRED vintages, kept in the FRED store), so
+the history has no look-ahead. On the latest date the score equals what
+analyze_macro_data reports for the same data (tests/test_health_history.py).
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from src.agents.macro_watchdog import WATCHDOG_RULES, scored_value
+from src.antigravity.lazy import lazy_import
+from src.antigravity.tools import run_blocking
+from src.tools import market_data
+from src.tools.finra import get_margin_debt_history
+from src.tools.fred import SERIES_REGISTRY, get_fred_history, get_fred_vintages
+from src.tools.fred_store import VintageIndex
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Input columns, by the result key analyze_macro_data reads them from
+SCORED_SERIES = ("GFDEGDQ188S", "INDPRO", "RRPONTSYD")
+MARKET_SYMBOLS = ("^VIX", "HYG", "TLT")
+# Observations per year of each FRED frequency
+OBS_PER_YEAR = {"D": 261, "W": 53, "M": 12, "Q": 4}
+
+
+def indicators(inputs: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    The rule engine's score indicators from align_inputs columns, prepared
+    like snapshot() prepares one audit's values (rounded as the tools round,
+    then through the same scored_value).
+    """
+    def column(name, decimals=None):
+        values = inputs[name].to_numpy(dtype=float) if name in inputs else np.full(len(inputs), np.nan)
+        return scored_value(np.round(values, decimals) if decimals is not None else values)
+
+    return {
+        "gdp_debt": column("GFDEGDQ188S"),
+        "indpro": column("INDPRO"),
+        "rrp": column("RRPONTSYD"),
+        "vix": column("VIX", 2),
+        "risk_ratio": column("RiskRatio", 4),
+        "metal_max_5d": np.round(inputs["MetalMax5d"].to_numpy(dtype=float), 2) if "MetalMax5d" in inputs
+        else np.full(len(inputs), np.nan),
+        "has_margin_debt": (inputs["MarginDebt"].notna() if "MarginDebt" in inputs
+                            else pd.Series(False, index=inputs.index)).to_numpy(dtype=float),
+    }
+
+
+def score_history(inputs: pd.DataFrame) -> pd.DataFrame:
+    """`inputs` plus its `score` (final Health Score) and `verdict` columns."""
+    evaluation = WATCHDOG_RULES.evaluate(indicators(inputs))
+    return inputs.assign(score=evaluation.scores["final_score"], verdict=evaluation.verdicts)
+
+
+def as_of(series: pd.Series, index: pd.DatetimeIndex) -> pd.Series:
+    """`series` as known on each date of `index` (last observation carried forward)."""
+    series = series.dropna()
+    if series.empty:
+        return pd.Series(np.nan, index=index)
+    dates = pd.DatetimeIndex(series.index)
+    # Exchange bars come tz-aware; days are what matter here
+    series.index = (dates.tz_localize(None) if dates.tz is not None else dates).normalize()
+    series = series[~series.index.duplicated(keep="last")].sort_index()
+    return series.reindex(index, method="ffill")
+
+
+def align_inputs(fred: Dict[str, List[dict]], closes: pd.DataFrame, margin: List[dict],
+                 start: date, end: date, vintages: Optional[Dict[str, VintageIndex]] = None) -> pd.DataFrame:
+    """
+    One row per business day from `start` to `end`:
+    FRED series (get_fred_history records), VIX, the HYG/TLT risk ratio, the
+    largest 5-bar metal move (%) and FINRA margin debt.
+    A series with `vintages` is taken as published on each day instead (the
+    newest observation out by then, at its value then), which leaves out
+    revisions and release lags the records would look ahead to.
+    """
+    index = pd.bdate_range(start, end)
+    columns = {}
+    for series_id, known in (vintages or {}).items():
+        columns[series_id] = pd.Series(known.latest_as_of(index)[1], index=index)
+    for series_id, records in fred.items():
+        if records and series_id not in columns:
+            columns[series_id] = as_of(pd.Series([r["value"] for r in records],
+                                                  index=pd.to_datetime([r["date"] for r in records])), index)
+
+    def close(symbol):
+        return closes[symbol].dropna() if symbol in closes else pd.Series(dtype=float)
+
+    columns["VIX"] = as_of(close("^VIX"), index)
+    # Each leg's latest close, like get_market_risk_sentiment
+    columns["RiskRatio"] = as_of(close("HYG"), index) / as_of(close("TLT"), index)
+    # get_metal_prices compares the last of 5 bars with the first
+    moves = []
+    for symbol in market_data.symbols("metals"):
+        bars = close(symbol)
+        if not bars.empty:
+            moves.append(as_of(((bars - bars.shift(4)) / bars.shift(4)) * 100, index))
+    columns["MetalMax5d"] = pd.concat(moves, axis=1).max(axis=1) if moves else pd.Series(np.nan, index=index)
+    if margin:
+        columns["MarginDebt"] = as_of(pd.Series([float(r["DebitBalances"]) for r in margin],
+                                                 index=pd.to_datetime([r["Date"] for r in margin])), index)
+    return pd.DataFrame(columns, index=index)
+
+
+def history_period(years: int) -> str:
+    return "5y" if years <= 5 else "10y" if years <= 10 else "max"
+
+
+async def load_inputs(years: int = 20, end: Optional[date] = None, point_in_time: bool = True) -> pd.DataFrame:
+    """
+    Fetches every scored input over `years` and aligns them (see
+    align_inputs). With `point_in_time`, FRED series are read from their
+    vintages where FRED has them; `attrs["point_in_time"]` lists those series.
+    """
+    end = end or date.today()
+    start = end - timedelta(days=int(years * 365.25))
+    fred_calls = [get_fred_history(series_id, limit=OBS_PER_YEAR[SERIES_REGISTRY[series_id].frequency] * (years + 1))
+                  for series_id in SCORED_SERIES]
+    vintage_calls = [get_fred_vintages(series_id) for series_id in SCORED_SERIES] if point_in_time else []
+    symbols = list(MARKET_SYMBOLS) + market_data.symbols("metals")
+    panel, margin, *fetched = await asyncio.gather(
+        run_blocking(market_data.history, symbols, history_period(years)),
+        get_margin_debt_history(limit=12 * (years + 1)),
+        *fred_calls,
+        *vintage_calls,
+    )
+    fred, known = fetched[:len(SCORED_SERIES)], fetched[len(SCORED_SERIES):]
+    vintages = {series_id: index for series_id, index in zip(SCORED_SERIES, known) if index is not None}
+    closes = panel["Close"] if not panel.empty else pd.DataFrame()
+    inputs = align_inputs(dict(zip(SCORED_SERIES, fred)), closes, margin or [], start, end, vintages)
+    inputs.attrs["point_in_time"] = list(vintages)
+    return inputs
+
+
+async def health_history(years: int = 20, end: Optional[date] = None, point_in_time: bool = True) -> pd.DataFrame:
+    """Daily inputs, Health Score and verdict over the last `years` (see load_inputs)."""
+    return score_history(await load_inputs(years, end, point_in_time))
@@ -1,168 +1,272 @@
-from src.antigravity.core import Agent
+from src.antigravity.core import Agent, Section
+from src.antigravity.rules import Allocation, Condition, Outcome, Rule, RuleEngine, Score, Verdict
 from src.tools.fred import get_macro_indicator
 from src.tools.finra import get_margin_debt
-from src.tools.options import get_market_risk_sentiment
+from src.tools.options import get_market_risk_sentiment, get_sector_performance
 from src.tools.commodities import get_metal_prices
 from src.tools.global_markets import get_crypto_prices, get_global_indices
 
 
-from typing import Dict
+from typing import Dict, List, Optional
 
-def analyze_macro_data(results: Dict) -> str:
-    """
-    Analyzes the aggregated results and returns a Health Score.
-    """
-    score = 0
-    report = []
-    
-    # --- 1. DATA EXTRACTION ---
-    gdp_debt = results.get("GFDEGDQ188S", {}).get("value")
-    indpro = results.get("INDPRO", {}).get("value")
-    m2 = results.get("M2SL", {}).get("value")
-    rrp = results.get("RRPONTSYD", {}).get("value")
-    houst = results.get("HOUST", {}).get("value")
-    mort = results.get("MORTGAGE30US", {}).get("value")
-    curve = results.get("T10Y2Y", {}).get("value")
-    sent = results.get("UMCSENT", {}).get("value")
+# Result keys each factor insight is built from
+FACTOR_INPUTS = {
+    "Core Economy": ("GFDEGDQ188S", "INDPRO"),
+    "Liquidity": ("M2SL", "RRPONTSYD"),
+    "Housing Market": ("HOUST", "MORTGAGE30US"),
+    "Yield Curve": ("T10Y2Y",),
+    "Sentiment & Risk": ("UMCSENT", "Market Sentiment"),
+    "Metals": ("Metals",),
+    "Sectors": ("Sector Performance",),
+    "Global & Crypto": ("Crypto", "Global Markets"),
+    "Margin Debt": ("Margin Debt",),
+}
+
+def missing_factors(results: Dict) -> List[str]:
+    """Factors with an input that was requested but errored or missed the deadline."""
+    missing = []
+    for factor, keys in FACTOR_INPUTS.items():
+        failed = [k for k in keys if isinstance(results.get(k), dict) and "error" in results[k]]
+        if failed:
+            missing.append(f"{factor} ({', '.join(failed)})")
+    return missing
+
+def _ok(results: Dict, key: str) -> Dict:
+    """A result dict, or {} if it is missing or an error."""
+    value = results.get(key, {})
+    return {} if not isinstance(value, dict) or "error" in value else value
+
+def extract_inputs(results: Dict) -> Dict:
+    """--- 1. DATA EXTRACTION --- (the values every section reads)"""
     sentiment_data = results.get("Market Sentiment", {})
-    vix = sentiment_data.get("vix")
-    risk_ratio = sentiment_data.get("risk_ratio")
-    metals = results.get("Metals", {}).get("metals", {})
+    sectors = _ok(results, "Sector Performance")
+    crypto = results.get("Crypto", {}).get("crypto", {})
+    globe = results.get("Global Markets", {}).get("global_markets", {})
+    return {
+        "gdp_debt": results.get("GFDEGDQ188S", {}).get("value"),
+        "indpro": results.get("INDPRO", {}).get("value"),
+        "m2": results.get("M2SL", {}).get("value"),
+        "rrp": results.get("RRPONTSYD", {}).get("value"),
+        "houst": results.get("HOUST", {}).get("value"),
+        "mort": results.get("MORTGAGE30US", {}).get("value"),
+        "curve": results.get("T10Y2Y", {}).get("value"),
+        "sent": results.get("UMCSENT", {}).get("value"),
+        "vix": sentiment_data.get("vix"),
+        "risk_ratio": sentiment_data.get("risk_ratio"),
+        "metals": results.get("Metals", {}).get("metals", {}),
+        "sectors": sectors,
+        "tech_mom": sectors.get("XLK", 0),
+        "util_mom": sectors.get("XLU", 0),
+        "energy_mom": sectors.get("XLE", 0),
+        "ind_mom": sectors.get("XLI", 0),
+        "spy_mom": sectors.get("SPY", 0),
+        "crypto": crypto,
+        "globe": globe,
+        # 5-day moves used by the insight and the margin-driven allocations
+        "btc_trend": crypto.get("BTC-USD", {}).get("trend", "Neutral"),
+        "btc_change": crypto.get("BTC-USD", {}).get("5d_change_pct", 0),
+        "ezu_chg": globe.get("EZU", {}).get("5d_change_pct", 0),
+        "spy_chg": globe.get("SPY", {}).get("5d_change_pct", 0),
+        "margin_debt": results.get("Margin Debt", {}),
+    }
 
-    # --- 2. SCORING LOGIC ---
-    
-    # Core Economy
-    if gdp_debt and float(gdp_debt) > 120: score -= 2
-    elif gdp_debt and float(gdp_debt) > 100: score -= 1
-    
-    if indpro and float(indpro) > 103: score += 1
-    elif indpro and float(indpro) < 100: score -= 1
+# --- 2. SCORING LOGIC ---
+# Rules as data (see src/antigravity/rules.py). Rules sharing a group form an
+# if/elif chain: the first match in the group counts.
 
-    # Liquidity
-    if rrp and float(rrp) > 2000: score -= 1
-    
-    # Risk
-    if vix:
-        if float(vix) > 30: score -= 2
-        elif float(vix) > 20: score -= 1
-        else: score += 1
+def _above(indicator, threshold): return Condition(indicator, ">", threshold)
+def _below(indicator, threshold): return Condition(indicator, "<", threshold)
 
+SCORE_RULES = [
+    # Core Economy
+    Rule((_above("gdp_debt", 120),), -2, group="debt"),
+    Rule((_above("gdp_debt", 100),), -1, group="debt"),
+    Rule((_above("indpro", 103),), +1, group="indpro"),
+    Rule((_below("indpro", 100),), -1, group="indpro"),
+    # Liquidity
+    Rule((_above("rrp", 2000),), -1),
+    # Risk (any known VIX counts: calm markets score +1)
+    Rule((_above("vix", 30),), -2, group="vix"),
+    Rule((_above("vix", 20),), -1, group="vix"),
+    Rule((_above("vix", 0),), +1, group="vix"),
     # Credit
-    if risk_ratio and risk_ratio > 1.0: score += 1
-    
+    Rule((_above("risk_ratio", 1.0),), +1),
     # Metals (Fear Check)
-    if metals:
-        for name, data in metals.items():
-            if data.get("5d_change_pct", 0) > 3.0: 
-                score -= 1
-                break
-
-    # --- 3. SECTOR LOGIC ---
-    allocations = []
-    sector_notes = []
-    sectors = results.get("Sector Performance", {})
-    tech_mom = sectors.get("XLK", 0)
-    util_mom = sectors.get("XLU", 0)
-    energy_mom = sectors.get("XLE", 0)
-    ind_mom = sectors.get("XLI", 0)
-    spy_mom = sectors.get("SPY", 0)
-    
-    if sectors:
-        sector_notes.append(f"Market (SPY) 1-Month Trend: {spy_mom}%")
+    Rule((_above("metal_max_5d", 3.0),), -1),
+]
+
+# Simple scoring boost for "risk on" behavior, though could be contrarian signal if extreme
+MARGIN_RULES = [Rule((_above("has_margin_debt", 0),), +1)]
+
+# In report order. "score" is before margin debt, "final_score" after.
+ALLOCATION_RULES = [
+    Allocation("INFLATION_HEDGE", "🛡️ INFLATION HEDGE: Buy Gold (GLD), Energy (XLE).",
+               (_above("metal_max_5d", 3.0), _above("energy_mom", 5.0)), match="any"),
+    Allocation("GROWTH", "🚀 GROWTH MOMENTUM: Tech (XLK), AI (NVDA).", (_above("score", 0), _above("tech_mom", "util_mom"))),
+    Allocation("CYCLICALS", "🏭 CYCLICALS: Industrials (XLI).", (_above("score", 0), _above("ind_mom", 0))),
+    Allocation("DEFENSIVE", "🛡️ DEFENSIVE: Overweight Healthcare (XLV), Utilities (XLU).", (Condition("score", "<=", 0),)),
+    Allocation("CASH", "🚨 CASH IS KING: Sell Equities, Buy T-Bills (BIL)", (_below("score", -3),), replaces=True),
+    Allocation("HOUSING", "🏠 HOUSING RECOVERY: Buy Homebuilders (ITB) if rates stabilize.", (_above("score", 1),)),
+    # Modulate Allocations (margin debt lifts the score first)
+    Allocation("CRYPTO", "⚡ CRYPTO MOMENTUM: Bitcoin (IBIT) breakout.",
+               (_above("has_margin_debt", 0), _above("btc_change", 5.0), _above("final_score", 0))),
+    Allocation("GLOBAL_VALUE", "🌍 GLOBAL VALUE: Buy Europe (EZU) or Japan (EWJ).",
+               (_above("has_margin_debt", 0), _above("ezu_chg", "spy_chg"))),
+]
+
+# Final Verdict Calculation (first match wins)
+VERDICT_RULES = [
+    Verdict("DANGER (Risk-Off)", (_below("final_score", -3),)),
+    Verdict("CAUTION (Hedge)", (_below("final_score", 0),)),
+    Verdict("HEALTHY (Risk-On)", (_above("final_score", 2),)),
+]
+
+WATCHDOG_RULES = RuleEngine(
+    scores=[Score("score", SCORE_RULES), Score("final_score", MARGIN_RULES, base="score")],
+    allocations=ALLOCATION_RULES,
+    verdicts=VERDICT_RULES,
+    default_verdict="NEUTRAL",
+)
+
+def scored_value(value):
+    """
+    A scored value as a float; missing (None, "", 0: what `if value:` skipped)
+    is NaN. Element-wise on a numpy array (health_history's columns).
+    """
+    if getattr(value, "ndim", 0):
+        values = value.astype(float)
+        values[values == 0] = float("nan")
+        return values
+    return float(value) if value else float("nan")
+
+def has_margin_debt(v: Dict) -> bool:
+    return bool(v["margin_debt"]) and "value" in v["margin_debt"]
+
+def snapshot(v: Dict) -> Dict[str, float]:
+    """The rule engine's indicators from extracted inputs."""
+    metals = v["metals"]
+    return {
+        "gdp_debt": scored_value(v["gdp_debt"]),
+        "indpro": scored_value(v["indpro"]),
+        "rrp": scored_value(v["rrp"]),
+        "vix": scored_value(v["vix"]),
+        "risk_ratio": scored_value(v["risk_ratio"]),
+        "metal_max_5d": max(d.get("5d_change_pct", 0) for d in metals.values()) if metals else float("nan"),
+        "tech_mom": float(v["tech_mom"]),
+        "util_mom": float(v["util_mom"]),
+        "energy_mom": float(v["energy_mom"]),
+        "ind_mom": float(v["ind_mom"]),
+        "btc_change": float(v["btc_change"]),
+        "ezu_chg": float(v["ezu_chg"]),
+        "spy_chg": float(v["spy_chg"]),
+        "has_margin_debt": 1.0 if has_margin_debt(v) else 0.0,
+    }
+
+def assess(v: Dict) -> Outcome:
+    """Scores, allocations and verdict for one set of extracted inputs."""
+    return WATCHDOG_RULES.evaluate_one(snapshot(v))
+
+def final_score(v: Dict) -> int:
+    return assess(v).scores["final_score"]
+
+# --- 3. SECTOR LOGIC ---
+
+def sector_notes(v: Dict) -> List[str]:
+    notes = []
+    tech_mom, util_mom, ind_mom, spy_mom = v["tech_mom"], v["util_mom"], v["ind_mom"], v["spy_mom"]
+    if v["sectors"]:
+        notes.append(f"Market (SPY) 1-Month Trend: {spy_mom}%")
         if tech_mom > util_mom:
-            sector_notes.append(f"Risk-On Signal: Tech ({tech_mom}%) > Utilities ({util_mom}%).")
+            notes.append(f"Risk-On Signal: Tech ({tech_mom}%) > Utilities ({util_mom}%).")
         else:
-            sector_notes.append(f"Defensive Rotation: Utilities ({util_mom}%) > Tech ({tech_mom}%).")
+            notes.append(f"Defensive Rotation: Utilities ({util_mom}%) > Tech ({tech_mom}%).")
         if ind_mom > spy_mom:
-            sector_notes.append(f"Cyclical Strength: Industrials ({ind_mom}%) leading.")
-            
-    # Allocations
-    inflation_risk = (metals and any(d.get("5d_change_pct", 0) > 3.0 for d in metals.values()))
-    if inflation_risk or energy_mom > 5.0:
-        allocations.append(f"🛡️ INFLATION HEDGE: Buy Gold (GLD), Energy (XLE).")
-        
-    if score > 0:
-        if tech_mom > util_mom: allocations.append(f"🚀 GROWTH MOMENTUM: Tech (XLK), AI (NVDA).")
-        if ind_mom > 0: allocations.append(f"🏭 CYCLICALS: Industrials (XLI).")
-    else:
-        allocations.append("🛡️ DEFENSIVE: Overweight Healthcare (XLV), Utilities (XLU).")
-        
-    if score < -3: allocations = ["🚨 CASH IS KING: Sell Equities, Buy T-Bills (BIL)"]
-    if score > 1: allocations.append("🏠 HOUSING RECOVERY: Buy Homebuilders (ITB) if rates stabilize.")
+            notes.append(f"Cyclical Strength: Industrials ({ind_mom}%) leading.")
+    return notes
 
-    # --- 4. OUTPUT GENERATION (INSIGHTS) ---
-    factors = []
-    
-    # Core Insight
+def allocations(v: Dict) -> List[str]:
+    return assess(v).allocations
+
+# --- 4. OUTPUT GENERATION (INSIGHTS) ---
+
+def core_insight(v: Dict) -> Optional[str]:
+    gdp_debt, indpro = v["gdp_debt"], v["indpro"]
     if gdp_debt and indpro:
         core_msg = f"The Core Economy is in a tug-of-war; Industrial Production ({indpro}) signals activity, but the massive Debt-to-GDP ratio ({gdp_debt}%) acts as a long-term structural drag."
         if float(indpro) > 103: core_msg = f"The Core Economy shows surprising resilience with Industrial Production at {indpro}, defying the weight of {gdp_debt}% Debt-to-GDP."
         elif float(indpro) < 100: core_msg = f"The Core Economy is buckling, with Industrial Production falling to {indpro} under the pressure of {gdp_debt}% Debt-to-GDP."
-        factors.append(f"• **Core Economy**: {core_msg}")
-    
-    # Liquidity Insight
+        return f"• **Core Economy**: {core_msg}"
+    return None
+
+def liquidity_insight(v: Dict) -> Optional[str]:
+    m2, rrp = v["m2"], v["rrp"]
     liq_msg = f"System liquidity remains ample with M2 at ${m2}B, supporting asset prices."
-    if rrp and float(rrp) > 1000: 
+    if rrp and float(rrp) > 1000:
         liq_msg = f"While M2 is high, ${rrp}B is trapped in Reverse Repos, indicating banks are hoarding cash rather than lending it to the real economy."
-    factors.append(f"• **Liquidity**: {liq_msg}")
-    
-    # Housing Insight
+    return f"• **Liquidity**: {liq_msg}"
+
+def housing_insight(v: Dict) -> Optional[str]:
+    houst, mort = v["houst"], v["mort"]
     if houst and mort:
         h_msg = f"The Housing market is stabilizing with {houst}k starts and rates at {mort}%."
         if float(mort) > 7.0: h_msg = f"High borrowing costs ({mort}%) are freezing the Housing market, which will likely drag on GDP in coming quarters."
         elif float(houst) > 1500: h_msg = f"Despite rates at {mort}%, Housing Starts are booming ({houst}k), suggesting strong consumer demand."
-        factors.append(f"• **Housing Market**: {h_msg}")
-    
-    # Recession Insight
+        return f"• **Housing Market**: {h_msg}"
+    return None
+
+def curve_insight(v: Dict) -> Optional[str]:
+    curve = v["curve"]
     if curve:
         c_msg = f"The Yield Curve is normal ({curve}), suggesting no immediate recessionary signal from the bond market."
         if float(curve) < 0: c_msg = f"The Yield Curve is **Inverted** ({curve}), a historically accurate warning that the continued tight policy is choking growth."
-        factors.append(f"• **Yield Curve**: {c_msg}")
-        
-    # Sentiment/Risk Insight
+        return f"• **Yield Curve**: {c_msg}"
+    return None
+
+def sentiment_insight(v: Dict) -> Optional[str]:
+    sent, vix = v["sent"], v["vix"]
     sent_msg = f"Consumer Sentiment is neutral ({sent}), while the VIX ({vix}) shows a market comfortable with current risks."
     if sent and float(sent) < 60: sent_msg = f"The consumer is deeply pessimistic (Sentiment {sent}), yet the stock market (VIX {vix}) seems ignoring this distress."
     if float(vix or 0) > 20: sent_msg = f"Fear has entered the market (VIX {vix}), aligning with weak consumer sentiment."
-    factors.append(f"• **Sentiment & Risk**: {sent_msg}")
-    
-    # Global & Crypto Insight
-    crypto = results.get("Crypto", {}).get("crypto", {})
-    globe = results.get("Global Markets", {}).get("global_markets", {})
-    
-    if crypto and globe:
-        btc_trend = crypto.get("BTC-USD", {}).get("trend", "Neutral")
-        btc_change = crypto.get("BTC-USD", {}).get("5d_change_pct", 0)
-        ezu_chg = globe.get("EZU", {}).get("5d_change_pct", 0)
-        ewj_chg = globe.get("EWJ", {}).get("5d_change_pct", 0)
-        spy_chg = globe.get("SPY", {}).get("5d_change_pct", 0)
-        
+    return f"• **Sentiment & Risk**: {sent_msg}"
+
+def global_insight(v: Dict) -> Optional[str]:
+    if v["crypto"] and v["globe"]:
+        btc_change, ezu_chg, spy_chg = v["btc_change"], v["ezu_chg"], v["spy_chg"]
+
         g_msg = "Global markets are moving in sync with the US."
         if spy_chg > (ezu_chg + 2.0): g_msg = "US Exceptionalism is in play; Wall St is outperforming Europe and Japan."
         elif ezu_chg > spy_chg: g_msg = "Global rotation is underway; capital is flowing into Europe/International markets."
-        
+
         risk_msg = "quiet."
         if btc_change > 5.0: risk_msg = "screaming 'Risk-On' as Bitcoin rallies hard."
         elif btc_change < -5.0: risk_msg = "flashing warning signs as Crypto liquidity evaporates."
-        
-        factors.append(f"• **Global & Crypto**: {g_msg} Bitcoin is {risk_msg} ({btc_change}%)")
 
-    # Margin Debt Insight
-    margin_debt = results.get("Margin Debt", {})
-    if margin_debt and "value" in margin_debt:
-        md_val = margin_debt.get("value")
-        factors.append(f"• **Margin Debt**: Investors are leveraging up with ${md_val}M in margin debt, a signal of high risk appetite.")
-        # Simple scoring boost for "risk on" behavior, though could be contrarian signal if extreme
-        score += 1
+        return f"• **Global & Crypto**: {g_msg} Bitcoin is {risk_msg} ({btc_change}%)"
+    return None
 
-        # Modulate Allocations
-        if btc_change > 5.0 and score > 0: allocations.append("⚡ CRYPTO MOMENTUM: Bitcoin (IBIT) breakout.")
-        if ezu_chg > spy_chg: allocations.append("🌍 GLOBAL VALUE: Buy Europe (EZU) or Japan (EWJ).")
+def margin_insight(v: Dict) -> Optional[str]:
+    if has_margin_debt(v):
+        md_val = v["margin_debt"].get("value")
+        return f"• **Margin Debt**: Investors are leveraging up with ${md_val}M in margin debt, a signal of high risk appetite."
+    return None
 
+# Factor insights in report order
+INSIGHTS = [
+    ("Core Economy", core_insight),
+    ("Liquidity", liquidity_insight),
+    ("Housing Market", housing_insight),
+    ("Yield Curve", curve_insight),
+    ("Sentiment & Risk", sentiment_insight),
+    ("Global & Crypto", global_insight),
+    ("Margin Debt", margin_insight),
+]
+
+def strategic_outlook(score: int) -> str:
     # Summary Synthesis
     synthesis = "The data paints a picture of "
     path_forward = "The prudent path ahead is to "
-    
-    if score > 2: 
+
+    if score > 2:
         synthesis += "a surprisingly robust expansion. Despite high rates, the industrial and housing engines are firing."
         path_forward += "ride the momentum in Growth (XLK) and Cyclicals (XLI), as the 'Soft Landing' scenario appears synonymous with 'No Landing'."
     elif score < 0:
@@ -171,43 +275,83 @@ def analyze_macro_data(results: Dict) -> str:
     else:
         synthesis += "conflicting signals. We have a 'K-shaped' divergence where liquidity keeps asset prices high while the real economy (Housing/Sentiment) struggles."
         path_forward += "remain nimble. Avoid aggressive bets on either side; hedge equity exposure with Commodities (GLD) and focus on quality balance sheets."
+    return f"{synthesis} {path_forward}"
 
-    # Final Verdict Calculation
-    health_verdict = "NEUTRAL"
-    if score > 2: health_verdict = "HEALTHY (Risk-On)"
-    if score < 0: health_verdict = "CAUTION (Hedge)"
-    if score < -3: health_verdict = "DANGER (Risk-Off)"
-
-    final_summary = f"{synthesis} {path_forward}"
+def sector_text(v: Dict) -> str:
+    notes = sector_notes(v)
+    if not notes:
+        return ""
+    return "📊 SECTOR ANALYSIS:\n" + chr(10).join(['    - ' + s for s in notes]) + "\n"
 
-    sector_text = ""
-    if sector_notes:
-        sector_text = "📊 SECTOR ANALYSIS:\n" + chr(10).join(['    - ' + s for s in sector_notes]) + "\n"
+def analyze_macro_data(results: Dict) -> str:
+    """
+    Analyzes the aggregated results and returns a Health Score.
+    """
+    v = extract_inputs(results)
+    outcome = assess(v)
+    score = outcome.scores["final_score"]
+    factors = [line for _, build in INSIGHTS for line in [build(v)] if line]
 
-    return f"""
+    report_text = f"""
     🔎 FACTOR INSIGHTS:
     {chr(10).join(factors)}
     
     🧭 STRATEGIC OUTLOOK:
-    {final_summary}
+    {strategic_outlook(score)}
     
-    MACRO HEALTH SCORE: {score} ({health_verdict})
+    MACRO HEALTH SCORE: {score} ({outcome.verdict})
     
-    {sector_text}
+    {sector_text(v)}
     🤖 AI RECOMMENDATION:
-    {chr(10).join(['    ' + a for a in allocations])}
+    {chr(10).join(['    ' + a for a in outcome.allocations])}
     """
 
+    # Partial results (errors, deadline): say what the score was computed without
+    missing = missing_factors(results)
+    if missing:
+        report_text = f"""
+    ⚠️ PARTIAL DATA - no data for: {'; '.join(missing)}. These factors are left out of the score.""" + report_text
+    return report_text
+
+# --- 5. STREAMING SECTIONS ---
+# The same analysis split so Session.ask_stream can emit each part as soon
+# as the results it reads are in. inputs=None means it needs every result.
+
+def _insight_section(factor: str, build) -> Section:
+    return Section(factor, FACTOR_INPUTS[factor], lambda results: build(extract_inputs(results)))
+
+def _sector_section(results: Dict) -> Optional[str]:
+    return sector_text(extract_inputs(results)).rstrip() or None
+
+def _outlook_section(results: Dict) -> str:
+    return f"🧭 STRATEGIC OUTLOOK:\n{strategic_outlook(final_score(extract_inputs(results)))}"
+
+def _score_section(results: Dict) -> str:
+    outcome = assess(extract_inputs(results))
+    return f"MACRO HEALTH SCORE: {outcome.scores['final_score']} ({outcome.verdict})"
+
+def _recommendation_section(results: Dict) -> str:
+    return "🤖 AI RECOMMENDATION:\n" + chr(10).join(['    ' + a for a in allocations(extract_inputs(results))])
+
+ANALYSIS_SECTIONS = [_insight_section(factor, build) for factor, build in INSIGHTS] + [
+    Section("Sector Analysis", FACTOR_INPUTS["Sectors"], _sector_section),
+    Section("Strategic Outlook", None, _outlook_section),
+    Section("Macro Health Score", None, _score_section),
+    Section("AI Recommendation", None, _recommendation_section),
+]
+
 macro_agent = Agent(
     name="MacroWatchdog",
     instructions="Process the data using `analyze_macro_data` logic.",
     tools=[
-        get_macro_indicator, 
-        get_margin_debt, 
-        get_market_risk_sentiment, 
+        get_macro_indicator,
+        get_margin_debt,
+        get_market_risk_sentiment,
         get_metal_prices,
+        get_sector_performance,
         get_crypto_prices,
         get_global_indices
     ],
-    analysis_logic=analyze_macro_data
+    analysis_logic=analyze_macro_data,
+    analysis_sections=ANALYSIS_SECTIONS,
 )
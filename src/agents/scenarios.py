@@ -0,0 +1,251 @@
+"""
+Monte Carlo stress scenarios over the watchdog's inputs.
+
+Takes one audit's `results`, draws many perturbed copies of the indicators
+the scoring rules read, and runs WATCHDOG_RULES over all of them at once:
+
+    report = stress(results, {"vix": Shock(shift=10), "indpro": Shock(shift=-2)})
+    report.verdicts["DANGER (Risk-Off)"]      # probability
+    print(report.summary())
+
+Every indicator the audit reported gets DEFAULT_SHOCKS' baseline noise; a
+Shock passed in moves its mean (and optionally its spread). Indicators with
+no data stay missing (NaN), so their rules never fire. Chunks of scenarios are evaluated on
+a thread pool: numpy releases the GIL while it draws and compares, so the
+chunks use every core without pickling anything to worker processes (which
+the frozen exe and Streamlit would also have to support).
+
+Sensitivity is one factor at a time, on the same draws (common random
+numbers): each factor is bumped by one standard deviation of its shock and
+the change in mean score and in verdict probabilities is reported.
+"""
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Mapping, Optional
+
+from src.agents.macro_watchdog import WATCHDOG_RULES, extract_inputs, snapshot
+from src.antigravity import tracing
+from src.antigravity.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+SCENARIOS = 100_000
+# Rows per chunk (one pool task): big enough to amortize numpy call overhead
+CHUNK_ROWS = 25_000
+
+
+@dataclass(frozen=True)
+class Shock:
+    """
+    Normal shock to one indicator: mean `shift`, standard deviation `sd`
+    (None = keep the baseline's). With `relative`, both are fractions of the
+    current value. Draws are clipped to [lower, upper].
+    """
+    shift: float = 0.0
+    sd: Optional[float] = None
+    relative: bool = False
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+
+# Baseline uncertainty of each scored indicator (roughly one month of moves)
+DEFAULT_SHOCKS = {
+    "gdp_debt": Shock(sd=1.0),
+    "indpro": Shock(sd=0.8),
+    "rrp": Shock(sd=0.1, relative=True, lower=0.0),
+    "vix": Shock(sd=3.0, lower=9.0),
+    "risk_ratio": Shock(sd=0.02, lower=0.0),
+    "metal_max_5d": Shock(sd=2.0),
+    "tech_mom": Shock(sd=3.0),
+    "util_mom": Shock(sd=3.0),
+    "energy_mom": Shock(sd=3.0),
+    "ind_mom": Shock(sd=3.0),
+    "btc_change": Shock(sd=6.0),
+    "ezu_chg": Shock(sd=2.0),
+    "spy_chg": Shock(sd=2.0),
+}
+
+
+# Indicators extract_inputs reads as 0 when their tool returned nothing:
+# (extracted input, symbol, field of the symbol's entry or None for the entry itself)
+DEFAULTED_INPUTS = {
+    "tech_mom": ("sectors", "XLK", None),
+    "util_mom": ("sectors", "XLU", None),
+    "energy_mom": ("sectors", "XLE", None),
+    "ind_mom": ("sectors", "XLI", None),
+    "btc_change": ("crypto", "BTC-USD", "5d_change_pct"),
+    "ezu_chg": ("globe", "EZU", "5d_change_pct"),
+    "spy_chg": ("globe", "SPY", "5d_change_pct"),
+}
+
+
+@dataclass
+class FactorSensitivity:
+    indicator: str
+    bump: float
+    score_change: float
+    # Change in each verdict's probability
+    verdict_change: Dict[str, float]
+
+
+@dataclass
+class ScenarioReport:
+    scenarios: int
+    verdicts: Dict[str, float]
+    # Probability of each allocation tag being recommended
+    allocations: Dict[str, float]
+    mean_score: float
+    score_percentiles: Dict[int, int]
+    sensitivity: List[FactorSensitivity] = field(default_factory=list)
+    # Shocked indicators no scoring rule reads (they cannot move the verdict)
+    ignored: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [f"{self.scenarios:,} scenarios, mean score {self.mean_score:+.2f} "
+                 f"(p5 {self.score_percentiles[5]}, p50 {self.score_percentiles[50]}, p95 {self.score_percentiles[95]})"]
+        lines += [f"  {label:<20} {p:6.1%}" for label, p in self.verdicts.items()]
+        lines.append("  Recommended in:")
+        lines += [f"    {tag:<16} {p:6.1%}" for tag, p in self.allocations.items() if p > 0]
+        if self.sensitivity:
+            lines.append("  Sensitivity (+1 sd):")
+            for s in self.sensitivity:
+                moves = ", ".join(f"{label.split(' ')[0]} {d:+.1%}" for label, d in s.verdict_change.items() if abs(d) >= 0.001)
+                lines.append(f"    {s.indicator:<14} {s.bump:+10.4g}  score {s.score_change:+.3f}  {moves}")
+        if self.ignored:
+            lines.append(f"  Not scored (no rule reads them): {', '.join(self.ignored)}")
+        return "\n".join(lines)
+
+
+def _base(results: Dict) -> Dict[str, float]:
+    """snapshot() of `results`, with indicators the audit never fetched as NaN instead of 0."""
+    v = extract_inputs(results)
+    base = snapshot(v)
+    for name, (source, symbol, key) in DEFAULTED_INPUTS.items():
+        entry = v[source].get(symbol)
+        if entry is None or (key is not None and (not isinstance(entry, dict) or key not in entry)):
+            base[name] = math.nan
+    return base
+
+
+def _merge(shocks: Mapping[str, Shock], base: Dict[str, float]) -> Dict[str, Shock]:
+    merged = dict(DEFAULT_SHOCKS)
+    for name, shock in shocks.items():
+        default = merged.get(name, Shock(sd=0.0))
+        sd = shock.sd
+        if sd is None:
+            sd = default.sd or 0.0
+            # Baseline spread in the shock's own units (absolute vs fraction of the value)
+            value = abs(base.get(name, math.nan))
+            if shock.relative and not default.relative:
+                sd = sd / value if value else 0.0
+            elif default.relative and not shock.relative:
+                sd = sd * value
+        merged[name] = replace(shock, sd=sd,
+                               lower=default.lower if shock.lower is None else shock.lower,
+                               upper=default.upper if shock.upper is None else shock.upper)
+    return merged
+
+
+def _draw(base: Dict[str, float], shocks: Dict[str, Shock], rows: int, rng) -> Dict[str, "np.ndarray"]:
+    columns = {}
+    for name in WATCHDOG_RULES.indicators:
+        value = base.get(name, math.nan)
+        shock = shocks.get(name)
+        if shock is None or math.isnan(value):
+            columns[name] = np.broadcast_to(value, rows)
+            continue
+        scale = abs(value) if shock.relative else 1.0
+        drawn = value + scale * shock.shift + scale * (shock.sd or 0.0) * rng.standard_normal(rows)
+        if shock.lower is not None or shock.upper is not None:
+            drawn = np.clip(drawn, shock.lower, shock.upper)
+        columns[name] = drawn
+    return columns
+
+
+def _bump(base: Dict[str, float], shocks: Dict[str, Shock], name: str) -> float:
+    shock = shocks[name]
+    return (abs(base[name]) if shock.relative else 1.0) * (shock.sd or 0.0)
+
+
+def _tally(evaluation, labels: int) -> Dict[str, "np.ndarray"]:
+    scores = evaluation.scores["final_score"]
+    return {
+        "verdicts": np.bincount(evaluation.verdict_codes, minlength=labels),
+        "allocations": evaluation.allocations.sum(axis=0),
+        "score_sum": scores.sum(),
+        "scores": np.unique(scores, return_counts=True),
+    }
+
+
+def _run_chunk(base, shocks, factors, rows, seed) -> Dict:
+    rng = np.random.default_rng(seed)
+    columns = _draw(base, shocks, rows, rng)
+    labels = len(WATCHDOG_RULES.verdicts) + 1
+    tally = _tally(WATCHDOG_RULES.evaluate(columns), labels)
+    tally["bumped"] = {}
+    for name in factors:
+        bumped = dict(columns, **{name: columns[name] + _bump(base, shocks, name)})
+        evaluation = WATCHDOG_RULES.evaluate(bumped)
+        tally["bumped"][name] = (evaluation.scores["final_score"].sum(),
+                                 np.bincount(evaluation.verdict_codes, minlength=labels))
+    return tally
+
+
+def stress(results: Dict, shocks: Mapping[str, Shock] = None, scenarios: int = SCENARIOS,
+           seed: Optional[int] = None, workers: Optional[int] = None, sensitivity: bool = True) -> ScenarioReport:
+    """Verdict and allocation probabilities of `results` under `shocks` (see module docs)."""
+    if scenarios < 1:
+        raise ValueError(f"scenarios must be at least 1, got {scenarios}")
+    base = _base(results)
+    shocks = _merge(shocks or {}, base)
+    ignored = sorted(set(shocks) - set(WATCHDOG_RULES.indicators) - set(DEFAULT_SHOCKS))
+    factors = [name for name in WATCHDOG_RULES.indicators
+               if sensitivity and name in shocks and not math.isnan(base.get(name, math.nan)) and _bump(base, shocks, name)]
+
+    sizes = [CHUNK_ROWS] * (scenarios // CHUNK_ROWS) + ([scenarios % CHUNK_ROWS] if scenarios % CHUNK_ROWS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with tracing.span("scenarios.stress", scenarios=scenarios, chunks=len(sizes)):
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1, thread_name_prefix="scenarios") as pool:
+            tallies = list(pool.map(lambda job: _run_chunk(base, shocks, factors, *job), zip(sizes, seeds)))
+
+    labels = [v.label for v in WATCHDOG_RULES.verdicts] + [WATCHDOG_RULES.default_verdict]
+    verdict_counts = sum(t["verdicts"] for t in tallies)
+    allocation_counts = sum(t["allocations"] for t in tallies)
+    score_sum = float(sum(t["score_sum"] for t in tallies))
+    histogram: Dict[int, int] = {}
+    for t in tallies:
+        for score, count in zip(*t["scores"]):
+            histogram[int(score)] = histogram.get(int(score), 0) + int(count)
+
+    def percentile(pct):
+        target, seen = pct / 100.0 * scenarios, 0
+        for score in sorted(histogram):
+            seen += histogram[score]
+            if seen >= target:
+                return score
+        return max(histogram)
+
+    report = ScenarioReport(
+        scenarios=scenarios,
+        verdicts={label: int(count) / scenarios for label, count in zip(labels, verdict_counts)},
+        allocations={a.tag: int(count) / scenarios for a, count in zip(WATCHDOG_RULES.allocations, allocation_counts)},
+        mean_score=score_sum / scenarios,
+        score_percentiles={pct: percentile(pct) for pct in (5, 50, 95)},
+        ignored=ignored,
+    )
+    for name in factors:
+        bumped_sum = float(sum(t["bumped"][name][0] for t in tallies))
+        bumped_counts = sum(t["bumped"][name][1] for t in tallies)
+        report.sensitivity.append(FactorSensitivity(
+            indicator=name,
+            bump=_bump(base, shocks, name),
+            score_change=(bumped_sum - score_sum) / scenarios,
+            verdict_change={label: int(b - c) / scenarios for label, b, c in zip(labels, bumped_counts, verdict_counts)},
+        ))
+    # Most influential first
+    report.sensitivity.sort(key=lambda s: abs(s.score_change), reverse=True)
+    return report
@@ -1,6 +1,25 @@
-from dataclasses import dataclass
-from typing import List, Callable, Any, Dict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Callable, Any, Dict, Optional, Sequence, Tuple
 import asyncio
+import logging
+import time
+
+from src.antigravity import deadline, tracing
+from src.antigravity.dag import Dataset
+from src.antigravity.planner import planner_for
+from src.antigravity.tools import run_blocking
+
+@dataclass
+class Section:
+    """
+    One part of an agent's analysis, for streaming. `build(results)` renders
+    it (or returns None to leave it out) once every planned key in `inputs`
+    has a result; inputs=None waits for all of them.
+    """
+    name: str
+    inputs: Optional[Sequence[str]]
+    build: Callable[[Dict], Optional[str]]
+
 
 @dataclass
 class Agent:
@@ -8,19 +27,39 @@ class Agent:
     instructions: str
     tools: List[Callable]
     analysis_logic: Callable[[Dict], str] = None
+    # analysis_logic split into parts Session.ask_stream can emit early
+    analysis_sections: List[Section] = field(default_factory=list)
+
+    def __post_init__(self):
+        # A tool produces the result keys of its bindings. A section reading a key
+        # no tool produces would quietly render without it, so refuse it up front.
+        produced = {b.result_key for t in self.tools for b in getattr(t, "_bindings", ())}
+        for section in self.analysis_sections:
+            unproduced = [key for key in section.inputs or () if key not in produced]
+            if unproduced:
+                raise ValueError(f"section {section.name!r} of agent {self.name!r} reads {unproduced}, "
+                                 f"which none of its tools produce")
 
 
 class Session:
-    def __init__(self, agent: Agent):
+    def __init__(self, agent: Agent, max_concurrency: int = 8, tool_timeout: float = 30.0,
+                 hedge_after: Optional[float] = None):
         self.agent = agent
         self.history = []
+        # Global cap on in-flight tool calls and per-call timeout (seconds)
+        self.max_concurrency = max_concurrency
+        self.tool_timeout = tool_timeout
+        # Seconds after which a still-running hedgeable tool gets a duplicate call
+        self.hedge_after = hedge_after
+        # Wall time (seconds) of each call in the last ask(), by result key
+        self.last_timings = {}
 
     @classmethod
-    async def start(cls, agent: Agent):
+    async def start(cls, agent: Agent, **options):
         """Initializes a new session with the given agent."""
-        return cls(agent)
+        return cls(agent, **options)
 
-    async def ask(self, prompt: str) -> 'Response':
+    async def ask(self, prompt: str, deadline: Optional[float] = None) -> 'Response':
         """
         Simulates the agent 'thinking' and using tools.
         In a real LLM system, this would:
@@ -33,120 +72,213 @@ class Session:
         For this prototype, we'll do a simplified 'Orchestration' 
         that tries to map the prompt to tool calls if explicit, 
         or just passes the prompt to a simulated LLM.
+
+        `deadline` (seconds) bounds the whole call: each tool gets whatever
+        is left of it, and tools that haven't answered in time are reported
+        as missing while the analysis runs on the results that did arrive.
+
+        ask() is plan() + execute() + render(); long-running callers (the
+        daemon) drive those steps themselves to refresh parts of a plan.
         """
         print(f"[{self.agent.name}]: Processing request...")
         
-        # 1. Identify relevant tools based on simplified keywords in prompt (Prototype logic)
-        # In a real system, the LLM does this.
-        results = {}
+        with tracing.span("session.ask", agent=self.agent.name) as span:
+            # 1. Plan every tool call up front, then run them concurrently
+            plan = self.plan(prompt)
+            span.set(calls=len(plan))
+            results = await self.execute(plan, deadline)
+
+            # 2. Synthesize a response
+            with tracing.span("session.synthesize"):
+                response_text = self.render(results)
+
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "agent", "content": response_text})
+        
+        missing = [key for key, out in results.items() if isinstance(out, dict) and "error" in out]
+        return Response(text=response_text, missing=missing, results=results)
+
+    async def ask_stream(self, prompt: str, deadline: Optional[float] = None) -> AsyncIterator['Chunk']:
+        """
+        ask(), progressively: yields a "result" chunk with each indicator's
+        line as soon as its tool resolves, then each of the agent's analysis
+        sections as soon as the results it reads are in. The last chunk is
+        the "response", carrying the same Response (and text) ask() returns.
+
+            async for chunk in session.ask_stream(prompt):
+                print(chunk.text)
+        """
+        print(f"[{self.agent.name}]: Processing request...")
+        plan = self.plan(prompt)
+        keys = [key for key, _, _ in plan]
+        if plan:
+            yield Chunk("header", None, "Analysis based on fetched data:")
+
+        arrived: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            with tracing.span("session.ask", agent=self.agent.name, streamed=True) as span:
+                span.set(calls=len(plan))
+                return await self.execute(plan, deadline, on_result=lambda key, out: arrived.put_nowait((key, out)))
+
+        task = asyncio.ensure_future(produce())
+        # Wakes the loop below if execute() itself fails
+        task.add_done_callback(lambda _: arrived.put_nowait(None))
+        try:
+            done: Dict[str, Any] = {}
+            sections = list(self.agent.analysis_sections)
+            while len(done) < len(keys):
+                item = await arrived.get()
+                if item is None:
+                    break
+                key, out = item
+                done[key] = out
+                yield Chunk("result", key, format_result(key, out).rstrip("\n"))
+                for section in list(sections):
+                    needs = keys if section.inputs is None else [k for k in section.inputs if k in keys]
+                    if not needs:
+                        sections.remove(section)
+                    elif all(k in done for k in needs):
+                        sections.remove(section)
+                        text = section.build(done)
+                        if text:
+                            yield Chunk("section", section.name, text)
+            results = await task
+        finally:
+            task.cancel()
+
+        with tracing.span("session.synthesize"):
+            response_text = self.render(results)
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "agent", "content": response_text})
+        missing = [key for key, out in results.items() if isinstance(out, dict) and "error" in out]
+        response = Response(text=response_text, missing=missing, results=results)
+        yield Chunk("response", None, response_text, response)
+
+    def plan(self, prompt: str) -> List[Tuple[str, Callable, Dict[str, Any]]]:
+        """
+        Maps the prompt to a list of (result_key, tool, kwargs) calls.
+        In a real system, the LLM does this; here each tool's declared
+        bindings are matched by the agent's (cached) Planner.
+        """
+        plan = planner_for(self.agent.tools).plan(prompt)
         for tool_func in self.agent.tools:
-            # Heuristic: Check if tool name or key concepts are in prompt
-            # This is a placeholder for actual Intent Recognition
-            if "fetch" in prompt.lower() or "audit" in prompt.lower():
-                # For the demo, we'll blindly execute the tool if it looks like a 'fetcher'
-                # and we can guess arguments (hardcoded for the prototype flow)
-                
-                # Check for specific known series IDs in prompt to demonstrate parameter extraction
-                series_to_check = []
-                if "Debt-to-GDP" in prompt or "GFDEGDQ188S" in prompt:
-                    series_to_check.append("GFDEGDQ188S")
-                if "Fed Funds" in prompt or "FEDFUNDS" in prompt:
-                    series_to_check.append("FEDFUNDS")
-                if "Industrial Production" in prompt or "INDPRO" in prompt:
-                    series_to_check.append("INDPRO")
-                if "M2" in prompt or "M2SL" in prompt:
-                    series_to_check.append("M2SL")
-                if "Repo" in prompt or "RRPONTSYD" in prompt:
-                    series_to_check.append("RRPONTSYD")
-                if "HOUST" in prompt or "Housing" in prompt:
-                    series_to_check.append("HOUST")
-                if "MORTGAGE" in prompt or "MORTGAGE30US" in prompt:
-                    series_to_check.append("MORTGAGE30US")
-                if "Yield" in prompt or "T10Y2Y" in prompt:
-                    series_to_check.append("T10Y2Y")
-                if "Sentiment" in prompt or "UMCSENT" in prompt:
-                    series_to_check.append("UMCSENT")
-                if "Unemployment" in prompt or "UNRATE" in prompt:
-                    series_to_check.append("UNRATE")
-                    
-                if series_to_check and tool_func._name == "get_macro_indicator":
-                    print(f"  -> Calling tool: {tool_func._name} for {series_to_check}")
-                    for series in series_to_check:
-                         # Execute the async tool
-                        res = await tool_func(series_id=series)
-                        results[series] = res
-
-            # Check for Margin Debt
-            if "Margin" in prompt and tool_func._name == "get_margin_debt":
+            calls = [(key, kwargs) for key, t, kwargs in plan if t is tool_func]
+            if not calls:
+                continue
+            if any(kwargs for _, kwargs in calls):
+                print(f"  -> Calling tool: {tool_func._name} for {[key for key, _ in calls]}")
+            else:
                 print(f"  -> Calling tool: {tool_func._name}")
-                res = await tool_func()
-                results["Margin Debt"] = res
-
-            # Check for Market Risk / VIX
-            if ("Risk" in prompt or "VIX" in prompt) and tool_func._name == "get_market_risk_sentiment":
-                 print(f"  -> Calling tool: {tool_func._name}")
-                 res = await tool_func()
-                 results["Market Sentiment"] = res
-            
-            # Check for Metals
-            if ("Gold" in prompt or "Copper" in prompt or "Platinum" in prompt) and tool_func._name == "get_metal_prices":
-                 print(f"  -> Calling tool: {tool_func._name}")
-                 res = await tool_func()
-                 results["Metals"] = res
-
-            # Check for Sector Performance
-            if "Sector" in prompt and tool_func._name == "get_sector_performance":
-                 print(f"  -> Calling tool: {tool_func._name}")
-                 res = await tool_func()
-                 results["Sector Performance"] = res
-
-            # Check for Crypto
-            if "Crypto" in prompt and tool_func._name == "get_crypto_prices":
-                 print(f"  -> Calling tool: {tool_func._name}")
-                 res = await tool_func()
-                 results["Crypto"] = res
-
-            # Check for Global Markets
-            if "Global" in prompt and tool_func._name == "get_global_indices":
-                 print(f"  -> Calling tool: {tool_func._name}")
-                 res = await tool_func()
-                 results["Global Markets"] = res
-
-        # 2. Synthesize a response
+        return plan
+
+    async def execute(self, plan: List[Tuple[str, Callable, Dict[str, Any]]],
+                       budget: Optional[float] = None,
+                       on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """
+        Runs every planned call concurrently, bounded by `max_concurrency`.
+        A call that exceeds its timeout (or raises) yields an error dict
+        so the rest of the audit still lands in `results`. The timeout is
+        `tool_timeout`, capped to what is left of `budget`; the cap is also
+        visible to the HTTP layers underneath via `deadline`.
+
+        The calls form a DAG: every raw dataset the planned tools declare as
+        inputs is loaded once, up front, and each tool starts as soon as its
+        own inputs are in (tools without inputs start immediately).
+
+        `on_result(key, output)` is called as each call finishes.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.last_timings = {}
+        ends_at = time.monotonic() + budget if budget is not None else None
+
+        requests: Dict[Dataset, list] = {}
+        for _, tool_func, _ in plan:
+            for inp in getattr(tool_func, "_inputs", ()):
+                requests.setdefault(inp.dataset, []).append(inp.request)
+        loads = {ds: asyncio.ensure_future(self._load(ds, reqs, ends_at)) for ds, reqs in requests.items()}
+
+        async def attempt(key, tool_func, kwargs):
+            waits = {loads[inp.dataset] for inp in getattr(tool_func, "_inputs", ())}
+            if waits:
+                # A failed or late load just means the tool fetches for itself
+                await asyncio.wait(waits, timeout=None if ends_at is None else max(0.0, ends_at - time.monotonic()))
+            async with semaphore:
+                started = time.perf_counter()
+                timeout = self.tool_timeout
+                if ends_at is not None:
+                    timeout = min(timeout, ends_at - time.monotonic())
+                    if timeout <= 0:
+                        self.last_timings[key] = 0.0
+                        return {"error": f"{tool_func._name} skipped: deadline reached"}
+                try:
+                    with deadline.scope(timeout):
+                        return await asyncio.wait_for(self._call(tool_func, kwargs), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return {"error": f"{tool_func._name} timed out after {round(timeout, 2)}s"}
+                except Exception as e:
+                    return {"error": f"{tool_func._name} failed: {str(e)}"}
+                finally:
+                    self.last_timings[key] = time.perf_counter() - started
+
+        async def run(key, tool_func, kwargs):
+            out = await attempt(key, tool_func, kwargs)
+            if on_result:
+                on_result(key, out)
+            return out
+
+        try:
+            outputs = await asyncio.gather(*(run(*call) for call in plan))
+        finally:
+            for task in loads.values():
+                task.cancel()
+        # Keep plan order so the report reads the same as the sequential version
+        return {key: out for (key, _, _), out in zip(plan, outputs)}
+
+    async def _load(self, dataset: Dataset, requests: list, ends_at: Optional[float]):
+        """Loads one raw dataset for all of its consumers."""
+        started = time.perf_counter()
+        budget = None if ends_at is None else ends_at - time.monotonic()
+        try:
+            with tracing.span(f"dataset {dataset.name}", requests=len(requests)), deadline.scope(budget):
+                await run_blocking(dataset.load, list(dict.fromkeys(requests)))
+        except Exception as e:
+            logging.warning(f"Loading dataset {dataset.name} failed: {e}")
+        finally:
+            self.last_timings[f"dataset:{dataset.name}"] = time.perf_counter() - started
+
+    async def _call(self, tool_func: Callable, kwargs: Dict[str, Any]) -> Any:
+        """
+        Calls the tool; if it is hedgeable and still running after
+        `hedge_after`, races a duplicate call and returns the first good result.
+        """
+        if self.hedge_after is None or not getattr(tool_func, "_hedge", False):
+            return await tool_func(**kwargs)
+
+        first = asyncio.ensure_future(tool_func(**kwargs))
+        attempts = {first}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.hedge_after)
+            if not done:
+                attempts.add(asyncio.ensure_future(tool_func.uncached(**kwargs)))
+            while True:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and not (isinstance(task.result(), dict) and "error" in task.result()):
+                        return task.result()
+                if not attempts:
+                    # Every attempt failed; surface the last failure
+                    return done.pop().result()
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    def render(self, results: Dict[str, Any]) -> str:
+        """Renders the tool results (plus the agent's analysis) as report text."""
         response_text = "Analysis based on fetched data:\n"
         if results:
             for series, data in results.items():
-                if isinstance(data, dict):
-                    if "vix" in data:
-                        response_text += f"- {series}: VIX={data.get('vix')}, Volume={data.get('sp500_volume')}\n"
-                    elif "error" in data:
-                        response_text += f"- {series}: ERROR - {data.get('error')}\n"
-                    elif "metals" in data:
-                        # Format nested metals dict
-                        response_text += f"- {series}: "
-                        for m, vals in data['metals'].items():
-                            response_text += f"{m}=${vals['price']} ({vals['5d_change_pct']}%), "
-                        response_text += "\n"
-                    elif "crypto" in data:
-                        response_text += f"- {series}: "
-                        for c, vals in data['crypto'].items():
-                            response_text += f"{c}=${vals.get('price')} ({vals.get('5d_change_pct')}%), "
-                        response_text += "\n"
-                    elif "global_markets" in data:
-                         response_text += f"- {series}: "
-                         for c, vals in data['global_markets'].items():
-                            response_text += f"{c}=${vals.get('price')} ({vals.get('5d_change_pct')}%), "
-                         response_text += "\n"
-                    else:
-                        val = data.get('value')
-                        date = data.get('date')
-                        label = data.get('indicator', series)
-                        if val is not None:
-                            response_text += f"- {label}: {val} (as of {date})\n"
-                        else:
-                             response_text += f"- {label}: {data}\n"
-                else:
-                    response_text += f"- {series}: {data}\n"
+                response_text += format_result(series, data)
             # In a real app, this would be a second LLM call with the tool outputs.
             response_text += "\n[MacroWatchdog Assessment]:\n"
             if self.agent.analysis_logic:
@@ -156,11 +288,51 @@ class Session:
         else:
             response_text = "I couldn't identify specific data points to fetch. Please specify series IDs."
 
-        self.history.append({"role": "user", "content": prompt})
-        self.history.append({"role": "agent", "content": response_text})
-        
-        return Response(text=response_text)
+        return response_text
+
+
+def format_result(series: str, data: Any) -> str:
+    """One tool result as a report line."""
+    if not isinstance(data, dict):
+        return f"- {series}: {data}\n"
+    if "vix" in data:
+        return f"- {series}: VIX={data.get('vix')}, Volume={data.get('sp500_volume')}\n"
+    if "error" in data:
+        return f"- {series}: ERROR - {data.get('error')}\n"
+    if "metals" in data:
+        # Format nested metals dict
+        line = f"- {series}: "
+        for m, vals in data['metals'].items():
+            line += f"{m}=${vals['price']} ({vals['5d_change_pct']}%), "
+        return line + "\n"
+    for group in ("crypto", "global_markets"):
+        if group in data:
+            line = f"- {series}: "
+            for c, vals in data[group].items():
+                line += f"{c}=${vals.get('price')} ({vals.get('5d_change_pct')}%), "
+            return line + "\n"
+    val = data.get('value')
+    date = data.get('date')
+    label = data.get('indicator', series)
+    if val is not None:
+        return f"- {label}: {val} (as of {date})\n"
+    return f"- {label}: {data}\n"
+
 
 @dataclass
 class Response:
     text: str
+    # Result keys that errored or missed the deadline
+    missing: List[str] = field(default_factory=list)
+    # Every tool's output, by result key (what the text was rendered from)
+    results: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Chunk:
+    """A piece of a streamed answer (see Session.ask_stream)."""
+    # "header", "result" (one tool's line), "section" (analysis) or "response" (the end)
+    kind: str
+    key: Optional[str]
+    text: str
+    response: Optional[Response] = None
@@ -0,0 +1,25 @@
+"""
+Raw datasets shared between tools.
+
+A tool declares the raw data it derives from with `@tool(inputs=[...])`.
+Before running a plan, the Session merges the requests every planned tool
+makes of each Dataset and loads it once; each tool then starts as soon as
+its own inputs are in, reading them from the dataset's cache instead of
+fetching them itself. Tools still work on their own (they just fetch).
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Sequence
+
+
+@dataclass(frozen=True, eq=False)
+class Dataset:
+    """A raw data source; `load(requests)` warms its cache for all requests at once."""
+    name: str
+    load: Callable[[Sequence[Any]], Any]
+
+
+@dataclass(frozen=True)
+class Input:
+    """A tool's request of a Dataset (e.g. a symbol group over a period)."""
+    dataset: Dataset
+    request: Hashable
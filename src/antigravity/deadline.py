@@ -0,0 +1,52 @@
+"""
+Deadline propagation for tool calls.
+
+Session.ask(prompt, deadline=...) gives each tool call a share of the
+overall budget; the absolute deadline rides in a context variable so the
+HTTP, retry and yfinance layers underneath can cap their own timeouts
+without every function taking a timeout argument.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Absolute time.monotonic() by which the current call must finish
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+# Never hand a transport a zero/negative timeout; it should fail fast instead
+MIN_TIMEOUT = 0.05
+
+
+@contextmanager
+def scope(seconds: Optional[float]):
+    """Runs the block under a deadline `seconds` from now (never extends an outer one)."""
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def timeout(default: float) -> float:
+    """`default` capped to the time left under the current deadline."""
+    left = remaining()
+    if left is None:
+        return default
+    return max(MIN_TIMEOUT, min(default, left))
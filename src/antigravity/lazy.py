@@ -0,0 +1,37 @@
+"""
+Deferred imports for heavy optional dependencies (pandas, yfinance, httpx).
+
+    pd = lazy_import("pandas")
+
+binds a stand-in module that performs the real import on first attribute
+access, so importing the agent (and every tool module) stays cheap and a
+run only pays for the libraries its tools actually touch. The import goes
+through importlib's per-module lock, so tools racing on the thread pool
+load it once.
+
+Annotations naming a lazy module must not be evaluated at import time:
+modules using this also do `from __future__ import annotations`.
+"""
+import importlib
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__name__)
+        # Later lookups hit the copied attributes directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        loaded = "loaded" if self.__name__ in sys.modules else "not loaded"
+        return f"<lazy module {self.__name__!r} ({loaded})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module if it is already imported, else a stand-in that imports it on first use."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
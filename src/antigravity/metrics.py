@@ -0,0 +1,210 @@
+"""
+Minimal, stdlib-only metrics registry with Prometheus text exposition.
+
+Every @tool invocation is recorded (calls, errors, latency histogram, cache
+hits, HTTP bytes received through httpx). Modules can add gauges computed at scrape time
+with register_collector(). Publish with write_textfile() (node_exporter
+textfile collector) or start_http_server() (serves /metrics).
+"""
+import contextvars
+import os
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Name of the tool currently executing, so lower layers (HTTP transports)
+# can attribute what they observe to it.
+current_tool = contextvars.ContextVar("current_tool", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        with _lock:
+            _metrics.append(self)
+
+    @abstractmethod
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """(sample name, labels, value) rows; called with the registry lock held."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with _lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def _samples(self):
+        return [(self.name, dict(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        samples = []
+        for key, (counts, total, count) in self._values.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                samples.append((self.name + "_bucket", dict(labels, le=_number(bound)), cumulative))
+            samples.append((self.name + "_sum", labels, total))
+            samples.append((self.name + "_count", labels, count))
+        return samples
+
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+    """
+    Adds a scrape-time callback yielding (name, type, help, labels, value)
+    tuples, e.g. gauges read from a scheduler's stats().
+    """
+    with _lock:
+        _collectors.append(collector)
+    return collector
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format (0.0.4)."""
+    lines = []
+    with _lock:
+        metrics = list(_metrics)
+        snapshot = [(m, m._samples()) for m in metrics]
+        collectors = list(_collectors)
+    for metric, samples in snapshot:
+        if not samples:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in samples:
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    seen = set()
+    for collector in collectors:
+        try:
+            samples = list(collector())
+        except Exception:
+            continue
+        for name, kind, help_text, labels, value in samples:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str):
+    """Atomically writes the exposition to `path` (for a textfile collector)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_servers: Dict[Tuple[str, int], ThreadingHTTPServer] = {}
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves /metrics from a daemon thread. Idempotent per address/port."""
+    with _lock:
+        server = _servers.get((addr, port))
+        if server is None:
+            server = _servers[(addr, port)] = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="antigravity-metrics", daemon=True).start()
+        return server
+
+
+def publish_from_env():
+    """
+    Publishes according to MACRO_AGENT_METRICS_PORT (start /metrics server)
+    and MACRO_AGENT_METRICS_FILE (write the textfile now).
+    """
+    port = os.environ.get("MACRO_AGENT_METRICS_PORT")
+    if port:
+        start_http_server(int(port))
+    path = os.environ.get("MACRO_AGENT_METRICS_FILE")
+    if path:
+        write_textfile(path)
+
+
+# Per-tool instrumentation, recorded by the @tool wrapper
+TOOL_CALLS = Counter("antigravity_tool_calls_total", "Tool invocations.")
+TOOL_ERRORS = Counter("antigravity_tool_errors_total", "Tool invocations that raised or returned an error result.")
+TOOL_LATENCY = Histogram("antigravity_tool_latency_seconds", "Tool invocation latency, including cache hits.")
+TOOL_CACHE_HITS = Counter("antigravity_tool_cache_hits_total", "Tool results served from the TTL cache.")
+TOOL_CACHE_MISSES = Counter("antigravity_tool_cache_misses_total", "Tool calls that went upstream.")
+# Counted in the httpx transport (FRED, FINRA). yfinance downloads go through
+# its own session, batched across tools, so Yahoo-backed tools report none.
+TOOL_BYTES = Counter("antigravity_tool_bytes_received_total",
+                     "HTTP response bytes received on behalf of a tool (httpx only; yfinance traffic is not counted).")
+
+
+def record_bytes(n: int):
+    """Attributes received HTTP bytes to the tool running in this context."""
+    TOOL_BYTES.inc(n, tool=current_tool.get() or "none")
@@ -0,0 +1,96 @@
+"""
+Declarative tool dispatch.
+
+Tools declare which prompt keywords trigger them, with what arguments and
+under which result key:
+
+    @tool(bindings=[Binding("Metals", keywords=("Gold", "Copper"))])
+    def get_metal_prices(): ...
+
+A Planner compiles every keyword of every tool into one regex, so planning a
+prompt is a single scan whatever the number of tools, and caches the
+resulting plan by prompt hash so a scheduled prompt is only planned once.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+PLAN_CACHE_SIZE = 128
+
+
+@dataclass(frozen=True)
+class Binding:
+    """One way a tool can be called: any `keywords` (case-sensitive) triggers it."""
+    result_key: str
+    keywords: Tuple[str, ...]
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    # If set, the lowercased prompt must also contain one of these words
+    requires: Tuple[str, ...] = ()
+
+
+PlanStep = Tuple[str, Callable, Dict[str, Any]]
+
+
+class Planner:
+    def __init__(self, tools: Sequence[Callable]):
+        self.tools = list(tools)
+        # (tool, binding) in registration order; plans keep this order
+        self._bindings = [(t, b) for t in self.tools for b in getattr(t, "_bindings", ())]
+        keywords = {kw for _, b in self._bindings for kw in b.keywords}
+        # Keywords that appear inside a longer one (M2 in M2SL) are implied by it,
+        # since the scan reports a single keyword per position
+        self._implied = {kw: {other for other in keywords if other in kw} for kw in keywords}
+        alternatives = "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+        # Zero-width lookahead so overlapping keywords are all found
+        self._pattern = re.compile(f"(?=({alternatives}))") if keywords else None
+        self._plans: "OrderedDict[str, Tuple[PlanStep, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, prompt: str) -> List[PlanStep]:
+        """(result_key, tool, kwargs) calls for `prompt`, from cache when seen before."""
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        with self._lock:
+            steps = self._plans.get(digest)
+            if steps is not None:
+                self._plans.move_to_end(digest)
+                self.hits += 1
+                return list(steps)
+            self.misses += 1
+
+        steps = self._compile(prompt)
+        with self._lock:
+            self._plans[digest] = steps
+            if len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return list(steps)
+
+    def _compile(self, prompt: str) -> Tuple[PlanStep, ...]:
+        found = set()
+        if self._pattern is not None:
+            for match in self._pattern.finditer(prompt):
+                found |= self._implied[match.group(1)]
+        lowered = prompt.lower()
+        return tuple(
+            (b.result_key, t, b.kwargs)
+            for t, b in self._bindings
+            if found.intersection(b.keywords) and (not b.requires or any(w in lowered for w in b.requires))
+        )
+
+
+_planners: Dict[Tuple[Callable, ...], Planner] = {}
+_planners_lock = threading.Lock()
+
+
+def planner_for(tools: Sequence[Callable]) -> Planner:
+    """The shared Planner for a tool set, so its plan cache outlives a Session."""
+    key = tuple(tools)
+    with _planners_lock:
+        planner = _planners.get(key)
+        if planner is None:
+            planner = _planners[key] = Planner(key)
+        return planner
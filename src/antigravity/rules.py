@@ -0,0 +1,214 @@
+"""
+Declarative scoring rules, compiled into a vectorized evaluator.
+
+Rules are data: a Condition compares an indicator with a threshold (or with
+another indicator), a Rule adds its weight to a score when its conditions
+hold, an Allocation emits a tagged recommendation, a Verdict labels a score.
+
+    engine = RuleEngine(
+        scores=[Score("score", [Rule((Condition("vix", ">", 30),), -2, group="vix"), ...])],
+        allocations=[Allocation("DEFENSIVE", "...", (Condition("score", "<=", 0),))],
+        verdicts=[Verdict("CAUTION", (Condition("score", "<", 0),))],
+        default_verdict="NEUTRAL",
+    )
+    engine.evaluate_one({"vix": 31.2})          # one snapshot
+    engine.evaluate({"vix": vix_array, ...})    # any number of rows, one pass
+
+A missing value is NaN: every comparison with it is False, so a rule on an
+unknown indicator simply doesn't fire. Scores are evaluated in order and can
+be used as indicators by the scores, allocations and verdicts after them.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from src.antigravity.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+OPERATORS = (">", ">=", "<", "<=", "==", "!=")
+
+
+@dataclass(frozen=True)
+class Condition:
+    indicator: str
+    op: str
+    # A number, or the name of another indicator to compare with
+    threshold: Union[float, str]
+
+    def __post_init__(self):
+        if self.op not in OPERATORS:
+            raise ValueError(f"unknown operator {self.op!r} (one of {', '.join(OPERATORS)})")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Adds `weight` when every condition holds. Within a `group` only the first matching rule counts (if/elif)."""
+    when: Tuple[Condition, ...]
+    weight: int
+    group: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Score:
+    """Sum of its rules' weights, on top of an earlier score (`base`) if given."""
+    name: str
+    rules: Sequence[Rule]
+    base: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Allocation:
+    """
+    Recommendation `text` (tagged `tag`) when all (match="all") or any
+    (match="any") of its conditions hold. `replaces` drops every allocation
+    listed before it when it fires.
+    """
+    tag: str
+    text: str
+    when: Tuple[Condition, ...]
+    match: str = "all"
+    replaces: bool = False
+
+
+@dataclass(frozen=True)
+class Verdict:
+    """Label for rows where every condition holds; the first matching verdict wins."""
+    label: str
+    when: Tuple[Condition, ...]
+
+
+@dataclass
+class Evaluation:
+    """Results for every evaluated row."""
+    scores: Dict[str, "np.ndarray"]
+    # Row x allocation boolean matrix, in RuleEngine.allocations order
+    allocations: "np.ndarray"
+    # Index into `labels` per row (the verdicts in order, then the default)
+    verdict_codes: "np.ndarray"
+    labels: "np.ndarray"
+
+    @property
+    def verdicts(self) -> "np.ndarray":
+        return self.labels[self.verdict_codes]
+
+
+@dataclass
+class Outcome:
+    """Results for one snapshot."""
+    scores: Dict[str, int]
+    allocations: List[str] = field(default_factory=list)
+    verdict: str = ""
+
+
+class RuleEngine:
+    def __init__(self, scores: Sequence[Score], allocations: Sequence[Allocation] = (),
+                 verdicts: Sequence[Verdict] = (), default_verdict: str = ""):
+        self.scores = list(scores)
+        self.allocations = list(allocations)
+        self.verdicts = list(verdicts)
+        self.default_verdict = default_verdict
+        for allocation in self.allocations:
+            if allocation.match not in ("all", "any"):
+                raise ValueError(f"allocation {allocation.tag}: match must be 'all' or 'any'")
+
+        conditions = [c for s in self.scores for r in s.rules for c in r.when]
+        conditions += [c for a in self.allocations for c in a.when]
+        conditions += [c for v in self.verdicts for c in v.when]
+        self._conditions = list(dict.fromkeys(conditions))
+        score_names = {s.name for s in self.scores}
+        referenced = {c.indicator for c in self._conditions}
+        referenced |= {c.threshold for c in self._conditions if isinstance(c.threshold, str)}
+        # Inputs the caller provides (the rest are scores computed here)
+        self.indicators = sorted(referenced - score_names)
+        self._compiled = None
+
+    def _compile(self):
+        """Every distinct condition as (ufunc, lhs, rhs indicator or None, constant); done on first use."""
+        if self._compiled is None:
+            ufuncs = dict(zip(OPERATORS, (np.greater, np.greater_equal, np.less, np.less_equal, np.equal, np.not_equal)))
+            tests = {c: (ufuncs[c.op], c.indicator) + ((c.threshold, None) if isinstance(c.threshold, str) else (None, c.threshold))
+                     for c in self._conditions}
+            labels = np.array([v.label for v in self.verdicts] + [self.default_verdict], dtype=object)
+            self._compiled = (tests, labels)
+        return self._compiled
+
+    def with_thresholds(self, thresholds: Mapping[Condition, Union[float, str]]) -> "RuleEngine":
+        """
+        A copy with the given conditions' thresholds replaced, wherever they
+        are used. A string threshold names an input column, so a parameter
+        sweep can give every row its own threshold and evaluate in one pass.
+        """
+        unknown = [c for c in thresholds if c not in self._conditions]
+        if unknown:
+            raise ValueError(f"no rule uses {', '.join(f'{c.indicator} {c.op} {c.threshold}' for c in unknown)}")
+
+        def swap(conditions: Tuple[Condition, ...]) -> Tuple[Condition, ...]:
+            return tuple(replace(c, threshold=thresholds[c]) if c in thresholds else c for c in conditions)
+
+        return RuleEngine(
+            scores=[replace(s, rules=[replace(r, when=swap(r.when)) for r in s.rules]) for s in self.scores],
+            allocations=[replace(a, when=swap(a.when)) for a in self.allocations],
+            verdicts=[replace(v, when=swap(v.when)) for v in self.verdicts],
+            default_verdict=self.default_verdict,
+        )
+
+    def evaluate(self, inputs: Mapping[str, Sequence[float]]) -> Evaluation:
+        """Scores, allocations and verdicts for every row of `inputs` (indicator -> column)."""
+        tests, labels = self._compile()
+        columns = {name: np.asarray(inputs[name], dtype=float) for name in self.indicators if name in inputs}
+        rows = len(next(iter(columns.values()))) if columns else 1
+        env = {name: columns.get(name, np.full(rows, np.nan)) for name in self.indicators}
+        tested: Dict[Condition, np.ndarray] = {}
+
+        def test(condition: Condition) -> np.ndarray:
+            hit = tested.get(condition)
+            if hit is None:
+                ufunc, lhs, rhs, constant = tests[condition]
+                hit = tested[condition] = ufunc(env[lhs], env[rhs] if rhs is not None else constant)
+            return hit
+
+        def holds(conditions: Tuple[Condition, ...], match: str = "all") -> np.ndarray:
+            hits = [test(c) for c in conditions]
+            if not hits:
+                return np.ones(rows, dtype=bool)
+            return np.logical_and.reduce(hits) if match == "all" else np.logical_or.reduce(hits)
+
+        scores = {}
+        for score in self.scores:
+            total = env[score.base].copy() if score.base else np.zeros(rows, dtype=np.int64)
+            claimed: Dict[str, np.ndarray] = {}
+            for rule in score.rules:
+                hit = holds(rule.when)
+                if rule.group is not None:
+                    taken = claimed.get(rule.group)
+                    if taken is not None:
+                        hit = hit & ~taken
+                        claimed[rule.group] = taken | hit
+                    else:
+                        claimed[rule.group] = hit
+                total += rule.weight * hit
+            env[score.name] = scores[score.name] = total
+
+        chosen = np.zeros((rows, len(self.allocations)), dtype=bool)
+        for k, allocation in enumerate(self.allocations):
+            chosen[:, k] = holds(allocation.when, allocation.match)
+            if allocation.replaces:
+                chosen[:, :k] &= ~chosen[:, k:k + 1]
+
+        # Index of the first matching verdict; the default label sits last
+        picked = np.full(rows, len(self.verdicts))
+        for i in reversed(range(len(self.verdicts))):
+            picked = np.where(holds(self.verdicts[i].when), i, picked)
+        return Evaluation(scores=scores, allocations=chosen, verdict_codes=picked, labels=labels)
+
+    def evaluate_one(self, snapshot: Mapping[str, Optional[float]]) -> Outcome:
+        """evaluate() for a single snapshot (indicator -> value, None = missing)."""
+        result = self.evaluate({name: [np.nan if value is None else value]
+                                for name, value in snapshot.items() if name in self.indicators})
+        return Outcome(
+            scores={name: int(values[0]) for name, values in result.scores.items()},
+            allocations=[a.text for a, on in zip(self.allocations, result.allocations[0]) if on],
+            verdict=str(result.verdicts[0]),
+        )
@@ -0,0 +1,69 @@
+import asyncio
+import atexit
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List
+
+# Coroutines to await on the background loop before it shuts down
+# (e.g. closing pooled HTTP clients).
+_shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+
+_loop = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="antigravity-loop", daemon=True)
+            thread.start()
+            atexit.register(_shutdown)
+        return _loop
+
+
+def run_sync(coro: Awaitable[Any], timeout: float = None) -> Any:
+    """
+    Runs a coroutine on the long-lived background event loop and waits for it.
+    Use this instead of asyncio.run() from synchronous code (Streamlit) so
+    loop-bound resources such as pooled HTTP connections survive between calls.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    return future.result(timeout)
+
+
+def stream_sync(agen: AsyncIterator[Any], timeout: float = None) -> Iterator[Any]:
+    """
+    Iterates an async generator (e.g. Session.ask_stream) from synchronous
+    code, one item at a time, on the background loop. `timeout` bounds the
+    wait for each item.
+    """
+    try:
+        while True:
+            try:
+                yield run_sync(agen.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+    finally:
+        run_sync(agen.aclose(), timeout)
+
+
+def on_shutdown(hook: Callable[[], Awaitable[Any]]):
+    """Registers an async cleanup hook for the background loop."""
+    _shutdown_hooks.append(hook)
+    return hook
+
+
+def _shutdown():
+    async def _run_hooks():
+        for hook in _shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                pass
+
+    try:
+        asyncio.run_coroutine_threadsafe(_run_hooks(), _loop).result(5)
+    except Exception:
+        pass
+    _loop.call_soon_threadsafe(_loop.stop)
@@ -1,19 +1,243 @@
+import asyncio
+import concurrent.futures
+import contextvars
 import inspect
-from functools import wraps
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
 
-def tool(func):
+from src.antigravity import metrics, tracing
+
+# Bounded pool for tools that make blocking calls (yfinance, pandas.read_html).
+# Sized so every blocking tool in an audit can overlap with the FRED fetches.
+TOOL_THREADS = int(os.environ.get("ANTIGRAVITY_TOOL_THREADS", "8"))
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="antigravity-tool")
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking callable on the shared tool thread pool and awaits it.
+    Context variables are carried over, like asyncio.to_thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), partial(ctx.run, func, *args, **kwargs))
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "coalesced", "maxsize", "currsize"])
+
+
+class _LeaderCancelled(Exception):
+    """The in-flight call other callers were waiting on was cancelled."""
+
+
+def _freeze(value):
+    """Turns call arguments into a hashable cache key component."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_freeze(v) for v in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else items
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _is_failure(result) -> bool:
+    """Error dicts and empty results are shared with waiters but never cached."""
+    return (isinstance(result, dict) and "error" in result) or (isinstance(result, (dict, list)) and not result)
+
+
+class _ToolCache:
+    """
+    TTL + LRU result cache with single-flight: while a call is running,
+    identical calls (from any thread or event loop) wait on it instead of
+    hitting the upstream again.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, result)
+        self._inflight = {}             # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = 0
+
+    async def get_or_call(self, key, call):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.TOOL_CACHE_HITS.inc(tool=self.name)
+                    tracing.annotate(cache="hit")
+                    return entry[1]
+                if entry is not None:
+                    del self._entries[key]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = concurrent.futures.Future()
+                    leader = True
+                    self.misses += 1
+                    metrics.TOOL_CACHE_MISSES.inc(tool=self.name)
+                    tracing.annotate(cache="miss")
+                else:
+                    leader = False
+                    self.coalesced += 1
+                    tracing.annotate(cache="coalesced")
+
+            if not leader:
+                try:
+                    # Shielded: a joiner that gets cancelled (deadline, losing
+                    # hedge) must not cancel the future every other caller shares
+                    return await asyncio.shield(asyncio.wrap_future(pending))
+                except _LeaderCancelled:
+                    continue  # retry, possibly as the new leader
+
+            # The call runs as its own task, so cancelling the caller that
+            # started it (deadline, losing hedge) doesn't cancel it for joiners
+            task = asyncio.ensure_future(call())
+            task.add_done_callback(partial(self._publish, key, pending))
+            return await asyncio.shield(task)
+
+    def _publish(self, key, pending: concurrent.futures.Future, task: asyncio.Future):
+        """Hands a finished leader call to its joiners and caches a good result."""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if not task.cancelled() and task.exception() is None and not _is_failure(task.result()):
+                self._entries[key] = (time.monotonic() + self.ttl, task.result())
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if pending.done():
+            return
+        if task.cancelled():
+            pending.set_exception(_LeaderCancelled())
+        elif task.exception() is not None:
+            pending.set_exception(task.exception())
+        else:
+            pending.set_result(task.result())
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.coalesced, self.max_entries, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def tool(func=None, *, blocking=None, ttl=None, max_entries=128, key=None, hedge=False, bindings=None,
+         inputs=None):
     """
     Decorator to register a function as a tool.
     In a real system, this might add metadata for the LLM.
+
+    Tools are always awaitable. Plain `def` functions are treated as blocking
+    and run on a bounded thread pool so they don't stall the event loop;
+    `blocking=True` also offloads an `async def` whose body blocks (it then
+    gets its own loop on the worker thread).
+
+    `ttl` (seconds) enables result caching: up to `max_entries` results are
+    kept (LRU), keyed on the bound arguments (defaults applied) or on
+    `key(*args, **kwargs)` if given. Identical concurrent calls share one
+    upstream call. Cached results are shared objects - don't mutate them.
+    Counters are available via `tool_func.cache_info()`.
+
+    `hedge=True` marks an idempotent read the Session may duplicate when
+    the first attempt is slow; the duplicate goes through
+    `tool_func.uncached(...)` so it doesn't just join the slow call.
+
+    `bindings` (planner.Binding) declare which prompt keywords call the tool,
+    with what arguments and under which result key. `inputs` (dag.Input)
+    declare the raw datasets it derives from, so a Session can load them
+    once for every tool that needs them.
     """
+    if func is None:
+        return partial(tool, blocking=blocking, ttl=ttl, max_entries=max_entries, key=key,
+                       hedge=hedge, bindings=bindings, inputs=inputs)
+
+    is_async = inspect.iscoroutinefunction(func)
+    if blocking is None:
+        blocking = not is_async
+    sig = inspect.signature(func)
+
+    if not blocking:
+        async def invoke(*args, **kwargs):
+            return await func(*args, **kwargs)
+    elif is_async:
+        async def invoke(*args, **kwargs):
+            return await run_blocking(lambda: asyncio.run(func(*args, **kwargs)))
+    else:
+        async def invoke(*args, **kwargs):
+            return await run_blocking(func, *args, **kwargs)
+
+    name = func.__name__
+    cache = _ToolCache(name, ttl, max_entries) if ttl is not None else None
+
+    def cache_key(args, kwargs):
+        if key is not None:
+            return key(*args, **kwargs)
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return _freeze(bound.arguments)
+
+    async def call(args, kwargs, cached=True):
+        token = metrics.current_tool.set(name)
+        started = time.perf_counter()
+        failed = True
+        try:
+            with tracing.span(f"tool {name}", tool=name, **{k: str(v) for k, v in kwargs.items()}) as span:
+                if not cached:
+                    span.set(hedge=True)
+                if cache is None or not cached:
+                    result = await invoke(*args, **kwargs)
+                else:
+                    result = await cache.get_or_call(cache_key(args, kwargs), lambda: invoke(*args, **kwargs))
+                failed = isinstance(result, dict) and "error" in result
+                if failed:
+                    span.set(error=result["error"])
+                return result
+        finally:
+            metrics.TOOL_CALLS.inc(tool=name)
+            metrics.TOOL_LATENCY.observe(time.perf_counter() - started, tool=name)
+            if failed:
+                metrics.TOOL_ERRORS.inc(tool=name)
+            metrics.current_tool.reset(token)
+
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        return await func(*args, **kwargs)
+        return await call(args, kwargs)
+
+    async def uncached(*args, **kwargs):
+        return await call(args, kwargs, cached=False)
     
     # Attach metadata to the wrapper function
     wrapper._is_tool = True
-    wrapper._name = func.__name__
+    wrapper._name = name
     wrapper._doc = inspect.getdoc(func)
-    wrapper._sig = inspect.signature(func)
+    wrapper._sig = sig
+    wrapper._blocking = blocking
+    wrapper._ttl = ttl
+    wrapper._hedge = hedge
+    wrapper._bindings = tuple(bindings or ())
+    wrapper._inputs = tuple(inputs or ())
+    wrapper.uncached = uncached
+    wrapper.cache_info = cache.info if cache else (lambda: CacheInfo(0, 0, 0, 0, 0))
+    wrapper.cache_clear = cache.clear if cache else (lambda: None)
     
     return wrapper
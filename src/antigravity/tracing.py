@@ -0,0 +1,143 @@
+"""
+Lightweight span tracing with Chrome trace-event JSON export.
+
+Spans nest through a context variable, so parent/child links follow the
+asyncio tasks and the thread pool (run_blocking copies the context). Tracing
+is off unless MACRO_AGENT_TRACE names an output file or enable() is called;
+disabled spans cost one contextvar lookup.
+
+Open the exported file in chrome://tracing or https://ui.perfetto.dev.
+"""
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+MAX_SPANS = 100_000
+
+_current = contextvars.ContextVar("current_span", default=None)
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_finished: List["Span"] = []
+_enabled = bool(os.environ.get("MACRO_AGENT_TRACE"))
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent", "start_ns", "end_ns", "attrs", "thread")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict):
+        self.name = name
+        self.span_id = next(_ids)
+        self.parent = parent
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def parent_id(self) -> Optional[int]:
+        return self.parent.span_id if self.parent else None
+
+    @property
+    def lane(self) -> int:
+        """The top-level span under the root this span belongs to (one row per concurrent branch)."""
+        span = self
+        while span.parent is not None and span.parent.parent is not None:
+            span = span.parent
+        return span.span_id if span.parent is not None else 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Times the enclosed block as a child of the current span."""
+    if not _enabled:
+        yield _NOOP
+        return
+    current = Span(name, _current.get(), attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current.reset(token)
+        with _lock:
+            if len(_finished) < MAX_SPANS:
+                _finished.append(current)
+
+
+def annotate(**attrs):
+    """Adds attributes to the current span, if any (e.g. cache status)."""
+    current = _current.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def spans() -> List[Span]:
+    with _lock:
+        return list(_finished)
+
+
+def clear():
+    with _lock:
+        _finished.clear()
+
+
+def chrome_trace() -> Dict:
+    """Finished spans as Chrome trace-event JSON (complete 'X' events)."""
+    events = []
+    lanes = {}
+    for s in sorted(spans(), key=lambda s: s.start_ns):
+        tid = lanes.setdefault(s.lane, len(lanes))
+        args = {k: v if isinstance(v, (int, float, bool, str)) or v is None else str(v) for k, v in s.attrs.items()}
+        args.update(span_id=s.span_id, parent_id=s.parent_id, thread=s.thread)
+        events.append({
+            "name": s.name,
+            "ph": "X",
+            "ts": s.start_ns / 1000,
+            "dur": (s.end_ns - s.start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome(path: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(chrome_trace(), f)
+    os.replace(tmp, path)
+
+
+def export_from_env():
+    """Writes the trace to MACRO_AGENT_TRACE, if set."""
+    path = os.environ.get("MACRO_AGENT_TRACE")
+    if path and _enabled:
+        export_chrome(path)
@@ -0,0 +1,169 @@
+"""
+Long-running MacroWatchdog: keeps one warm process (HTTP pools, tool and
+market-data caches, the FRED store) and refreshes each data source on its
+own cadence, so an up-to-date report is always ready.
+
+    python src/main.py --daemon [--report-file report.txt]
+
+Press Enter to print the latest report, or `q` + Enter to quit. The report
+file (if given) is rewritten after every refresh.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.antigravity import metrics, tracing
+from src.antigravity.core import Agent, Session
+
+# Seconds between refreshes of each source. FRED is polled often but only
+# refetches a series when its release calendar says new data could exist;
+# FINRA publishes monthly and is revalidated with a conditional GET.
+REFRESH_SECONDS = {
+    "market": float(os.environ.get("MACRO_AGENT_REFRESH_MARKET", "300")),
+    "fred": float(os.environ.get("MACRO_AGENT_REFRESH_FRED", "900")),
+    "finra": float(os.environ.get("MACRO_AGENT_REFRESH_FINRA", str(24 * 3600))),
+}
+
+DAEMON_REFRESHES = metrics.Counter("macro_agent_daemon_refreshes_total", "Source refreshes run by the daemon.")
+
+# Tool module -> source; anything else is yfinance market data
+_SOURCE_BY_MODULE = {"src.tools.fred": "fred", "src.tools.finra": "finra"}
+
+
+def source_of(tool_func: Callable) -> str:
+    return _SOURCE_BY_MODULE.get(tool_func.__module__, "market")
+
+
+class ReportDaemon:
+    """
+    Holds the latest result of every planned call and the report rendered
+    from them. refresh() re-runs one source's calls (or all of them);
+    concurrent refreshes of the same source share one run.
+    """
+
+    def __init__(self, agent: Agent, prompt: str, deadline: Optional[float] = None,
+                 hedge_after: Optional[float] = None, report_file: Optional[str] = None,
+                 cadence: Optional[Dict[str, float]] = None):
+        # Plans and renders; the calls run on a Session per source (below)
+        self.session = Session(agent, hedge_after=hedge_after)
+        self.deadline = deadline
+        self.report_file = report_file
+        self.cadence = dict(REFRESH_SECONDS, **(cadence or {}))
+        # Compiled once; every scheduled refresh replays its slice of it
+        self.plan = self.session.plan(prompt)
+        self.groups: Dict[str, List[Tuple[str, Callable, Dict[str, Any]]]] = {}
+        for step in self.plan:
+            self.groups.setdefault(source_of(step[1]), []).append(step)
+        # Sources refresh concurrently, and execute() resets its session's
+        # last_timings, so each source gets a session of its own
+        self.sessions = {source: Session(agent, hedge_after=hedge_after) for source in self.groups}
+        # Per-call timings of each source's latest refresh
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.results: Dict[str, Any] = {}
+        self.refreshed_at: Dict[str, float] = {}
+        self.report: Optional[str] = None
+        self.report_at: Optional[float] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def refresh(self, source: Optional[str] = None) -> str:
+        """Re-runs `source`'s calls (all sources if None) and returns the new report."""
+        sources = [source] if source else list(self.groups)
+        await asyncio.gather(*(self._refresh_source(s) for s in sources))
+        return self.report
+
+    async def ensure_fresh(self, max_age: float) -> str:
+        """Refreshes every source older than `max_age` seconds (joining refreshes already running)."""
+        now = time.time()
+        stale = [s for s in self.groups if now - self.refreshed_at.get(s, 0) > max_age]
+        await asyncio.gather(*(self._refresh_source(s) for s in stale))
+        return self.report
+
+    def missing(self) -> List[str]:
+        """Result keys with no good value yet."""
+        return [key for key, value in self.results.items() if isinstance(value, dict) and "error" in value]
+
+    async def _refresh_source(self, source: str):
+        pending = self._inflight.get(source)
+        if pending is None:
+            pending = self._inflight[source] = asyncio.ensure_future(self._run_source(source))
+            pending.add_done_callback(lambda _: self._inflight.pop(source, None))
+        await asyncio.shield(pending)
+
+    async def _run_source(self, source: str):
+        started = time.perf_counter()
+        with tracing.span("daemon.refresh", source=source):
+            session = self.sessions[source]
+            results = await session.execute(self.groups[source], self.deadline)
+        self.timings[source] = dict(session.last_timings)
+        for key, value in results.items():
+            # Keep the last good value over a transient failure
+            if not (isinstance(value, dict) and "error" in value) or key not in self.results:
+                self.results[key] = value
+        self.refreshed_at[source] = time.time()
+        DAEMON_REFRESHES.inc(source=source)
+        self._render()
+        print(f"[daemon] refreshed {source} ({len(results)} calls) in {time.perf_counter() - started:.1f}s")
+
+    def _render(self):
+        # Plan order, like a one-shot audit
+        ordered = {key: self.results[key] for key, _, _ in self.plan if key in self.results}
+        self.report = self.session.render(ordered)
+        self.report_at = time.time()
+        if self.report_file:
+            tmp = f"{self.report_file}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.report)
+            os.replace(tmp, self.report_file)
+        metrics.publish_from_env()
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Full refresh, then each source on its own cadence until `stop` is set."""
+        stop = stop or asyncio.Event()
+        await self.refresh()
+        loops = [asyncio.ensure_future(self._every(source, stop)) for source in self.groups]
+        try:
+            await stop.wait()
+        finally:
+            for task in loops:
+                task.cancel()
+
+    async def _every(self, source: str, stop: asyncio.Event):
+        interval = self.cadence.get(source, REFRESH_SECONDS["market"])
+        while not stop.is_set():
+            due = self.refreshed_at.get(source, 0) + interval
+            await asyncio.sleep(max(0.0, due - time.time()))
+            try:
+                await self._refresh_source(source)
+            except Exception as e:
+                print(f"[daemon] refresh of {source} failed: {e}")
+                await asyncio.sleep(min(interval, 60))
+
+
+def _watch_stdin(loop: asyncio.AbstractEventLoop, daemon: ReportDaemon, stop: asyncio.Event):
+    """Enter prints the latest report; `q` quits (a thread: stdin isn't pollable on Windows)."""
+    for line in sys.stdin:
+        if line.strip().lower() in ("q", "quit", "exit"):
+            loop.call_soon_threadsafe(stop.set)
+            return
+        loop.call_soon_threadsafe(_print_report, daemon)
+    # EOF (no console, e.g. run as a service): keep refreshing the report file
+
+
+def _print_report(daemon: ReportDaemon):
+    if daemon.report is None:
+        print("[daemon] first refresh still running...")
+        return
+    age = time.time() - daemon.report_at
+    print(f"\nDAILY MACRO REPORT (rendered {age:.0f}s ago):\n{daemon.report}")
+
+
+async def run_daemon(agent: Agent, prompt: str, **options):
+    daemon = ReportDaemon(agent, prompt, **options)
+    stop = asyncio.Event()
+    threading.Thread(target=_watch_stdin, args=(asyncio.get_running_loop(), daemon, stop),
+                     name="daemon-stdin", daemon=True).start()
+    print(f"--- Macro daemon running (refresh every {daemon.cadence}s); Enter = print report, q = quit ---")
+    await daemon.run(stop)
@@ -1,5 +1,4 @@
 import streamlit as st
-import asyncio
 import os
 import sys
 
@@ -32,7 +31,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.agents.macro_watchdog import macro_agent
+from src.antigravity import metrics, tracing
 from src.antigravity.core import Session
+from src.antigravity.runtime import run_sync, stream_sync
+from src.main import AUDIT_DEADLINE, HEDGE_AFTER
 
 from src.tools.fred import get_fred_history, SERIES_MAP
 from src.tools.finra import get_margin_debt_history
@@ -44,6 +46,9 @@ import altair as alt
 
 st.set_page_config(page_title="Macro Watchdog", page_icon="📉", layout="wide")
 
+# Serve /metrics for the life of the Streamlit process (idempotent across reruns)
+metrics.publish_from_env()
+
 # --- UI POLISH (Phase 21) ---
 def load_css(file_name):
     with open(file_name) as f:
@@ -87,25 +92,38 @@ def plot_metric(df, title, color='#29b5e8'):
 
 if st.button("Run Daily Audit"):
     with st.spinner("Agent is analyzing markets..."):
-        # 1. Run the textual Agent Audit
-        async def run_audit():
-             session = await Session.start(agent=macro_agent)
-             prompt = """
-             Perform the daily macro audit:
-             1. Fetch current US Debt-to-GDP (GFDEGDQ188S).
-             2. Fetch Liquidity: M2 Money Supply (M2SL) and Reverse Repo (RRPONTSYD).
-             3. Fetch Fed Funds Rate (FEDFUNDS) and Industrial Production (INDPRO).
-             4. Fetch latest FINRA Margin Debt.
-             5. Fetch Market Risk Sentiment (VIX).
-             6. Fetch Copper/Gold/Silver/Platinum prices to check for deleveraging spikes.
-             7. Fetch Sector Performance (1 Month).
-             8. Fetch Global (EZU, EWJ, EEM) and Crypto (BTC, ETH) data.
-             9. Provide a summary of the 'Macro Health Score' and 'Sector Rotation'.
-             """
-             return await session.ask(prompt)
+        # 1. Run the textual Agent Audit, streamed: indicators and analysis
+        # sections show up as soon as their tools return
+        session = Session(macro_agent, hedge_after=HEDGE_AFTER)
+        prompt = """
+        Perform the daily macro audit:
+        1. Fetch current US Debt-to-GDP (GFDEGDQ188S).
+        2. Fetch Liquidity: M2 Money Supply (M2SL) and Reverse Repo (RRPONTSYD).
+        3. Fetch Fed Funds Rate (FEDFUNDS) and Industrial Production (INDPRO).
+        4. Fetch latest FINRA Margin Debt.
+        5. Fetch Market Risk Sentiment (VIX).
+        6. Fetch Copper/Gold/Silver/Platinum prices to check for deleveraging spikes.
+        7. Fetch Sector Performance (1 Month).
+        8. Fetch Global (EZU, EWJ, EEM) and Crypto (BTC, ETH) data.
+        9. Provide a summary of the 'Macro Health Score' and 'Sector Rotation'.
+        """
 
         try:
-            response = asyncio.run(run_audit())
+            live_results, live_sections = st.empty(), st.empty()
+            lines, sections = [], []
+            for chunk in stream_sync(session.ask_stream(prompt, deadline=AUDIT_DEADLINE)):
+                if chunk.kind == "result":
+                    lines.append(chunk.text)
+                    live_results.markdown("\n".join(lines))
+                elif chunk.kind == "section":
+                    sections.append(chunk.text)
+                    live_sections.markdown("\n\n".join(sections))
+                elif chunk.kind == "response":
+                    response = chunk.response
+            live_results.empty()
+            live_sections.empty()
+            metrics.publish_from_env()
+            tracing.export_from_env()
             st.success("Audit Complete!")
             st.markdown("---")
             # Use st.info or st.markdown to allow text wrapping for long sentences
@@ -137,12 +155,12 @@ if st.button("Run Daily Audit"):
         c1, c2 = st.columns(2)
         with c1:
             st.caption("US Debt-to-GDP Ratio (%)")
-            df = make_chart_df(asyncio.run(get_fred_history("GFDEGDQ188S", limit=20))) # Quarterly 5y
+            df = make_chart_df(run_sync(get_fred_history("GFDEGDQ188S", limit=20))) # Quarterly 5y
             plot_metric(df, "Debt/GDP", color="#FF5A5F")
             
         with c2:
             st.caption("Industrial Production Index")
-            df = make_chart_df(asyncio.run(get_fred_history("INDPRO", limit=60))) # Monthly 5y
+            df = make_chart_df(run_sync(get_fred_history("INDPRO", limit=60))) # Monthly 5y
             plot_metric(df, "IndPro", color="#00C781")
 
         # --- ROW 2: LIQUIDITY PLUMBING ---
@@ -150,12 +168,12 @@ if st.button("Run Daily Audit"):
         c3, c4 = st.columns(2)
         with c3:
             st.caption("M2 Money Supply ($ Billions)")
-            df = make_chart_df(asyncio.run(get_fred_history("M2SL", limit=60))) # Monthly 5y
+            df = make_chart_df(run_sync(get_fred_history("M2SL", limit=60))) # Monthly 5y
             plot_metric(df, "M2", color="#3B8ED0")
             
         with c4:
             st.caption("Reverse Repo Overnight Volume ($ Billions)")
-            df = make_chart_df(asyncio.run(get_fred_history("RRPONTSYD", limit=1250))) # Daily 5y approx
+            df = make_chart_df(run_sync(get_fred_history("RRPONTSYD", limit=1250))) # Daily 5y approx
             plot_metric(df, "RRP", color="#E040FB")
 
 
@@ -165,19 +183,19 @@ if st.button("Run Daily Audit"):
         with c7:
              st.caption("Yield Curve (10Y-2Y Spread)")
              st.markdown("*Negative = Inversion (Danger)*")
-             df = make_chart_df(asyncio.run(get_fred_history("T10Y2Y", limit=1250)))
+             df = make_chart_df(run_sync(get_fred_history("T10Y2Y", limit=1250)))
              plot_metric(df, "Yield Curve", color="#FF9100")
              
         with c8:
              st.caption("Consumer Sentiment (U of Mich)")
              st.markdown("*< 60 = Extreme Fear*")
-             df = make_chart_df(asyncio.run(get_fred_history("UMCSENT", limit=60)))
+             df = make_chart_df(run_sync(get_fred_history("UMCSENT", limit=60)))
              plot_metric(df, "Sentiment", color="#2962FF")
 
         with c9:
              st.caption("Unemployment Rate (%)")
              st.markdown("*Rising Baseline = Recession Trend*")
-             df = make_chart_df(asyncio.run(get_fred_history("UNRATE", limit=60)))
+             df = make_chart_df(run_sync(get_fred_history("UNRATE", limit=60)))
              plot_metric(df, "Unemployment", color="#D50000")
 
         # --- ROW 4: HOUSING MARKET (NEW) ---
@@ -186,19 +204,19 @@ if st.button("Run Daily Audit"):
         with c10:
              st.caption("Housing Starts (Millions)")
              st.markdown("*Cycle Highs = Bullish, Crashing = Recession*")
-             df_houst = make_chart_df(asyncio.run(get_fred_history("HOUST", limit=60)))
+             df_houst = make_chart_df(run_sync(get_fred_history("HOUST", limit=60)))
              plot_metric(df_houst, "Housing Starts", color="#795548")
              
         with c11:
              st.caption("30-Year Fixed Mortgage Rate (%)")
              st.markdown("*Inverse correlation to Affordability*")
-             df_mort = make_chart_df(asyncio.run(get_fred_history("MORTGAGE30US", limit=250)))
+             df_mort = make_chart_df(run_sync(get_fred_history("MORTGAGE30US", limit=250)))
              plot_metric(df_mort, "Mortgage Rate", color="#607D8B")
 
         # --- ROW 5: RISK APPETITE ---
         st.subheader("5. Risk Appetite & Sentiment")
         # Fetch Market Data once
-        mkt_data = asyncio.run(get_market_history())
+        mkt_data = run_sync(get_market_history())
         
         c5, c6, c_finra = st.columns(3)
         with c5:
@@ -217,13 +235,13 @@ if st.button("Run Daily Audit"):
         with c_finra:
              st.caption("FINRA Margin Debt ($ Millions)")
              st.markdown("*Rising = Leveraged Upside, Falling = Deleveraging*")
-             finra_hist = asyncio.run(get_margin_debt_history(limit=60))
+             finra_hist = run_sync(get_margin_debt_history(limit=60))
              df_finra = make_chart_df(finra_hist)
              plot_metric(df_finra, "Margin Debt", color="#6200EA")
 
         # --- ROW 6: SECTORS ---
         st.subheader("6. Sector Rotation")
-        sectors_hist = asyncio.run(get_sector_history())
+        sectors_hist = run_sync(get_sector_history())
         if sectors_hist and "Date" in sectors_hist:
              df_sectors = pd.DataFrame(sectors_hist)
              if 'Date' in df_sectors.columns:
@@ -252,24 +270,24 @@ if st.button("Run Daily Audit"):
         g1, g2 = st.columns(2)
         with g1:
             st.caption("Bitcoin (BTC-USD)")
-            df_btc = make_chart_df(asyncio.run(get_global_history("BTC-USD", period="2y")))
+            df_btc = make_chart_df(run_sync(get_global_history("BTC-USD", period="2y")))
             plot_metric(df_btc, "Bitcoin", color="#F7931A")
         with g2:
             st.caption("Ethereum (ETH-USD)")
-            df_eth = make_chart_df(asyncio.run(get_global_history("ETH-USD", period="2y")))
+            df_eth = make_chart_df(run_sync(get_global_history("ETH-USD", period="2y")))
             plot_metric(df_eth, "Ethereum", color="#627EEA")
 
         st.subheader("🌍 Global Market Divergence")
         g3, g4, g5 = st.columns(3)
         with g3:
             st.caption("Europe (EZU)")
-            plot_metric(make_chart_df(asyncio.run(get_global_history("EZU", period="2y"))), "Europe", color="#003399")
+            plot_metric(make_chart_df(run_sync(get_global_history("EZU", period="2y"))), "Europe", color="#003399")
         with g4:
             st.caption("Japan (EWJ)")
-            plot_metric(make_chart_df(asyncio.run(get_global_history("EWJ", period="2y"))), "Japan", color="#BC002D")
+            plot_metric(make_chart_df(run_sync(get_global_history("EWJ", period="2y"))), "Japan", color="#BC002D")
         with g5:
             st.caption("Emerging Markets (EEM)")
-            plot_metric(make_chart_df(asyncio.run(get_global_history("EEM", period="2y"))), "Emerging", color="#FFC107")
+            plot_metric(make_chart_df(run_sync(get_global_history("EEM", period="2y"))), "Emerging", color="#FFC107")
 
 
     st.info("Check `d:\\projects\\economic_indicators\\src\\main.py` for CLI version.")
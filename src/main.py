@@ -1,6 +1,8 @@
+import argparse
 import asyncio
 import os
 import sys
+import time
 
 # Add project root to path to ensure imports work if run from nested dirs
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,21 +12,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.agents.macro_watchdog import macro_agent
+from src.antigravity import metrics, tracing
 from src.antigravity.core import Session
+from src.tools.http_client import close_client
 
-async def run_daily_macro_report():
-    print("--- Starting Daily Macro Audit ---")
-    
-    # Check for API Key
-    if not os.environ.get("FRED_API_KEY"):
-        print("WARNING: FRED_API_KEY not found in environment.")
-        print("Data fetching tools will return errors.")
+# Bound on the audit's wall time: tools still running when it expires are
+# reported as missing. Hedgeable tools slower than HEDGE_AFTER get a
+# duplicate call.
+AUDIT_DEADLINE = float(os.environ.get("MACRO_AGENT_AUDIT_DEADLINE", "45"))
+HEDGE_AFTER = float(os.environ.get("MACRO_AGENT_HEDGE_AFTER", "3"))
 
-    # 1. Start the session
-    session = await Session.start(agent=macro_agent)
-    
-    # 2. Ask the agent to perform the daily audit
-    prompt = """
+# The daily audit request (also replayed by benchmarks/bench_audit.py)
+DAILY_AUDIT_PROMPT = """
     Perform the daily macro audit:
     1. Fetch current US Debt-to-GDP (GFDEGDQ188S).
     2. Fetch Liquidity: M2 Money Supply (M2SL) and Reverse Repo (RRPONTSYD).
@@ -38,10 +37,85 @@ async def run_daily_macro_report():
     10. Provide a summary of 'Macro Health', 'Housing Stress', and 'Recession Risk'.
     11. BASED ON THE SCORE, PROVIDE ETF SECTOR RECOMMENDATIONS.
     """
+
+def scenario_count(value):
+    """argparse type for --scenarios: a positive integer."""
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return count
+
+def parse_shocks(specs):
+    """`--shock vix=10` / `--shock rrp=-20%` into scenario shocks (indicator -> Shock)."""
+    from src.agents.scenarios import Shock
+    shocks = {}
+    for spec in specs:
+        name, _, value = spec.partition("=")
+        relative = value.endswith("%")
+        shift = float(value.rstrip("%")) / (100.0 if relative else 1.0)
+        shocks[name.strip()] = Shock(shift=shift, relative=relative)
+    return shocks
+
+async def run_daily_macro_report(shocks=None, scenarios=None):
+    print("--- Starting Daily Macro Audit ---")
+    
+    # Check for API Key
+    if not os.environ.get("FRED_API_KEY"):
+        print("WARNING: FRED_API_KEY not found in environment.")
+        print("Data fetching tools will return errors.")
+
+    # 1. Start the session
+    session = await Session.start(agent=macro_agent, hedge_after=HEDGE_AFTER)
     
-    response = await session.ask(prompt)
+    # 2. Ask the agent to perform the daily audit, printing each indicator
+    # and analysis section as soon as it is in
+    print("\nDAILY MACRO REPORT (live):")
+    started = time.perf_counter()
+    try:
+        async for chunk in session.ask_stream(DAILY_AUDIT_PROMPT, deadline=AUDIT_DEADLINE):
+            if chunk.kind in ("result", "section"):
+                print(f"[{time.perf_counter() - started:5.1f}s] {chunk.text}", flush=True)
+            elif chunk.kind == "response":
+                response = chunk.response
+    finally:
+        # Drain the pooled FRED connections before the loop closes
+        await close_client()
+        # Per-tool metrics (MACRO_AGENT_METRICS_FILE / MACRO_AGENT_METRICS_PORT)
+        metrics.publish_from_env()
+        # Chrome trace of the audit (MACRO_AGENT_TRACE)
+        tracing.export_from_env()
     print(f"\nDAILY MACRO REPORT:\n{response.text}")
+    if response.missing:
+        print(f"WARNING: partial report, missing: {', '.join(response.missing)}")
+    if shocks is not None:
+        from src.agents.scenarios import SCENARIOS, stress
+        report = stress(response.results, shocks, scenarios=scenarios or SCENARIOS)
+        print(f"\nSTRESS SCENARIOS:\n{report.summary()}")
     print("--- Audit Complete ---")
 
+async def run_macro_daemon(report_file=None):
+    """Keeps the audit warm in one process; see src/daemon.py."""
+    from src.daemon import run_daemon
+    try:
+        await run_daemon(macro_agent, DAILY_AUDIT_PROMPT, deadline=AUDIT_DEADLINE,
+                         hedge_after=HEDGE_AFTER, report_file=report_file)
+    finally:
+        await close_client()
+        tracing.export_from_env()
+
 if __name__ == "__main__":
-    asyncio.run(run_daily_macro_report())
+    parser = argparse.ArgumentParser(description="MacroWatchdog daily audit")
+    parser.add_argument("--daemon", action="store_true",
+                        help="stay running, refresh each source on its own schedule")
+    parser.add_argument("--report-file", help="(daemon) keep the latest report in this file")
+    parser.add_argument("--stress", action="store_true",
+                        help="after the audit, run Monte Carlo scenarios over its inputs")
+    parser.add_argument("--shock", action="append", default=[], metavar="INDICATOR=SHIFT",
+                        help="(stress) shift an input, e.g. vix=10 or rrp=-20%%; repeatable")
+    parser.add_argument("--scenarios", type=scenario_count, help="(stress) number of scenarios")
+    args = parser.parse_args()
+    if args.daemon:
+        asyncio.run(run_macro_daemon(args.report_file))
+    else:
+        stressed = args.stress or args.shock
+        asyncio.run(run_daily_macro_report(parse_shocks(args.shock) if stressed else None, args.scenarios))
@@ -0,0 +1,203 @@
+"""
+Report API: serves the MacroWatchdog assessment and the latest indicator
+values to any number of internal consumers from one shared ReportDaemon.
+
+    python src/server.py [--host 127.0.0.1] [--port 8765]
+
+    GET /report              latest report + missing factors
+    GET /indicators[?key=M2SL&key=Metals]
+    GET /metrics             Prometheus text
+    GET /healthz             503 once the background refresh loop has died
+
+Every endpoint accepts `max_age` (seconds, default MACRO_AGENT_REPORT_MAX_AGE).
+Sources older than that are refreshed before answering; concurrent requests
+wait on the same refresh instead of each starting their own, so upstream
+load does not grow with the number of clients.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Add project root to path to ensure imports work if run from nested dirs
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.agents.macro_watchdog import macro_agent
+from src.antigravity import metrics
+from src.daemon import ReportDaemon
+from src.main import AUDIT_DEADLINE, DAILY_AUDIT_PROMPT, HEDGE_AFTER
+from src.tools.http_client import close_client
+
+# Oldest data a request will be answered with. The daemon's own cadence
+# normally keeps everything fresher than this.
+MAX_AGE = float(os.environ.get("MACRO_AGENT_REPORT_MAX_AGE", "900"))
+MAX_HEADER_BYTES = 16 * 1024
+# GET requests carry no meaningful body; anything sent is read and dropped
+MAX_BODY_BYTES = 64 * 1024
+
+API_REQUESTS = metrics.Counter("macro_agent_api_requests_total", "Report API requests by route and status.")
+
+ROUTES = ("/healthz", "/metrics", "/report", "/indicators")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+def _iso(ts) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def _json_default(value):
+    # numpy scalars from the pandas-based tools
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class ReportServer:
+    def __init__(self, daemon: ReportDaemon, max_age: float = MAX_AGE):
+        self.daemon = daemon
+        self.max_age = max_age
+        # Why the background refresh loop stopped, once it has
+        self.refresher_error: Optional[str] = None
+
+    def watch(self, refresher: asyncio.Future):
+        """Reports (and fails /healthz) if the daemon's background loop ends other than by cancellation."""
+        refresher.add_done_callback(self._refresher_done)
+
+    def _refresher_done(self, task: asyncio.Future):
+        if task.cancelled():
+            return
+        error = task.exception()
+        self.refresher_error = repr(error) if error is not None else "refresh loop exited"
+        print(f"[server] background refresh stopped, serving on-demand refreshes only: {self.refresher_error}",
+              file=sys.stderr, flush=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One connection; HTTP/1.1 keep-alive, GET only."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, {"error": "malformed request line"}, close=True)
+                    return
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self._send(writer, 400, {"error": "invalid or oversized content-length"}, close=True)
+                    return
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        return
+
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                try:
+                    status, body = await self.route(method, target)
+                except Exception as e:
+                    status, body = 500, {"error": str(e)}
+                path = urlsplit(target).path
+                # Label by route: raw paths would let any client grow the registry without bound
+                API_REQUESTS.inc(path=path if path in ROUTES else "other", status=status)
+                await self._send(writer, status, body, close=close)
+                if close:
+                    return
+        finally:
+            writer.close()
+
+    async def route(self, method: str, target: str) -> Tuple[int, object]:
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        try:
+            max_age = float(query.get("max_age", [self.max_age])[0])
+        except ValueError:
+            return 400, {"error": "max_age must be a number"}
+
+        if url.path == "/healthz":
+            if self.refresher_error is not None:
+                return 503, {"status": "unhealthy", "error": self.refresher_error,
+                             "report_ready": self.daemon.report is not None}
+            return 200, {"status": "ok", "report_ready": self.daemon.report is not None}
+        if url.path == "/metrics":
+            return 200, metrics.render()
+        if url.path == "/report":
+            report = await self.daemon.ensure_fresh(max_age)
+            return 200, {
+                "report": report,
+                "generated_at": _iso(self.daemon.report_at),
+                "missing": self.daemon.missing(),
+                "sources": self._sources(),
+            }
+        if url.path == "/indicators":
+            await self.daemon.ensure_fresh(max_age)
+            keys = query.get("key")
+            indicators = {k: v for k, v in self.daemon.results.items() if not keys or k in keys}
+            return 200, {"generated_at": _iso(self.daemon.report_at), "indicators": indicators,
+                         "sources": self._sources()}
+        return 404, {"error": f"no route for {url.path}"}
+
+    def _sources(self) -> Dict[str, str]:
+        return {source: _iso(self.daemon.refreshed_at.get(source)) for source in self.daemon.groups}
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, body, close: bool):
+        if isinstance(body, str):
+            payload, content_type = body.encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            payload, content_type = json.dumps(body, default=_json_default).encode(), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode() + payload)
+        await writer.drain()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765):
+    daemon = ReportDaemon(macro_agent, DAILY_AUDIT_PROMPT, deadline=AUDIT_DEADLINE, hedge_after=HEDGE_AFTER)
+    server = ReportServer(daemon)
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"--- MacroWatchdog report API on http://{host}:{port} ---", flush=True)
+    # The daemon keeps every source on its refresh cadence in the background
+    refresher = asyncio.ensure_future(daemon.run())
+    server.watch(refresher)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        refresher.cancel()
+        await close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MacroWatchdog report API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MACRO_AGENT_API_PORT", "8765")))
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
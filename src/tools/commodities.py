@@ -1,8 +1,11 @@
-import yfinance as yf
+from src.antigravity.planner import Binding
 from src.antigravity.tools import tool
+from src.tools import market_data
+from src.tools.market_data import TICKER_REGISTRY
 
-@tool
-async def get_metal_prices():
+@tool(ttl=60, hedge=True, bindings=[Binding("Metals", ("Gold", "Copper", "Platinum"))],
+      inputs=[market_data.prices("metals", "5d")])
+def get_metal_prices():
     """
     Fetches recent price action for key Metals to detect liquidity/deleveraging spikes.
     Assets: Gold (GC=F), Silver (SI=F), Copper (HG=F), Platinum (PL=F).
@@ -10,10 +13,8 @@ async def get_metal_prices():
     """
     try:
         # Gold, Silver, Copper, Platinum Futures
-        tickers = yf.Tickers("GC=F SI=F HG=F PL=F")
-        
         # Get 5 days history to check for volatility/spikes
-        hist = tickers.history(period="5d")
+        hist = market_data.history(market_data.symbols("metals"), "5d")
         
         result = {
             "indicator": "Metal Commodities",
@@ -21,9 +22,9 @@ async def get_metal_prices():
         }
         
         # Process each metal
-        for symbol, name in [("GC=F", "Gold"), ("SI=F", "Silver"), ("HG=F", "Copper"), ("PL=F", "Platinum")]:
+        for symbol, name in TICKER_REGISTRY["metals"].items():
             try:
-                closes = hist['Close'][symbol]
+                closes = hist['Close'][symbol].dropna()
                 if not closes.empty:
                     latest = closes.iloc[-1]
                     prev_5d = closes.iloc[0]
@@ -42,15 +43,14 @@ async def get_metal_prices():
     except Exception as e:
         return {"error": f"Failed to fetch metals data: {str(e)}"}
 
-@tool
-async def get_metal_history():
+@tool(ttl=900)
+def get_metal_history():
     """
     Fetches 5-year price history for Gold, Silver, Copper, Platinum.
     Returns a dict with 'dates' and separate lists for each metal prices.
     """
     try:
-        tickers = yf.Tickers("GC=F SI=F HG=F PL=F")
-        hist = tickers.history(period="5y")
+        hist = market_data.history(market_data.symbols("metals"), "5y")
         
         # yfinance returns a MultiIndex column DataFrame if multiple tickers
         # We need to flatten this for creating simple structure
@@ -73,10 +73,8 @@ async def get_metal_history():
         # We'll just take 'Close'
         closes = hist['Close']
         
-        if "GC=F" in closes: data["Gold"] = closes["GC=F"].fillna(method='ffill').tolist()
-        if "SI=F" in closes: data["Silver"] = closes["SI=F"].fillna(method='ffill').tolist()
-        if "HG=F" in closes: data["Copper"] = closes["HG=F"].fillna(method='ffill').tolist()
-        if "PL=F" in closes: data["Platinum"] = closes["PL=F"].fillna(method='ffill').tolist()
+        for symbol, name in TICKER_REGISTRY["metals"].items():
+            if symbol in closes: data[name] = closes[symbol].ffill().tolist()
         
         return data
 
@@ -1,59 +1,191 @@
-import pandas as pd
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from src.antigravity import deadline, tracing
+from src.antigravity.lazy import lazy_import
+from src.antigravity.planner import Binding
 from src.antigravity.tools import tool
+from src.tools.http_client import get_sync_client
+from src.tools.storage import cache_path
 import logging
 
-def _fetch_finra_data():
-    """Helper to fetch and clean FINRA data"""
-    url = "https://www.finra.org/rules-guidance/key-topics/margin-accounts/margin-statistics"
+pd = lazy_import("pandas")
+
+FINRA_URL = "https://www.finra.org/rules-guidance/key-topics/margin-accounts/margin-statistics"
+
+# FINRA publishes margin statistics monthly, so the page is only revalidated
+# (with a conditional GET) this often; otherwise the parsed table is reused.
+FINRA_REVALIDATE_SECONDS = float(os.environ.get("FINRA_REVALIDATE_SECONDS", str(6 * 3600)))
+
+# Parsed table plus the validators of the page it came from. Shared by
+# get_margin_debt and get_margin_debt_history, persisted to the cache dir.
+_cache = {"df": None, "etag": None, "last_modified": None, "sha256": None, "checked_at": 0.0}
+_cache_lock = threading.Lock()
+_cache_loaded = False
+# The revalidation in progress, if any (resolves to the table it produced)
+_inflight: Optional[Future] = None
+
+def _cache_file():
+    return cache_path("finra_margin.pkl")
+
+def _load_cache():
+    global _cache_loaded
+    _cache_loaded = True
+    if os.path.exists(_cache_file()):
+        try:
+            _cache.update(pd.read_pickle(_cache_file()))
+        except Exception as e:
+            logging.error(f"Ignoring unreadable FINRA cache: {e}")
+
+def _save_cache():
+    tmp = _cache_file() + ".tmp"
+    pd.to_pickle(dict(_cache), tmp)
+    os.replace(tmp, _cache_file())
+
+def _parse_finra_table(html: str):
+    """Extracts the cleaned Date/DebitBalances table from the FINRA page"""
+    # pandas read_html returns a list of dataframes
+    dfs = pd.read_html(io.StringIO(html))
+    
+    target_df = None
+    for df in dfs:
+        # Look for the relevant column header
+        if any("Debit Balances" in str(col) for col in df.columns):
+            target_df = df
+            break
+    
+    if target_df is None:
+        return None
+
+    # Clean up column names
+    # Identify the Debit Column and Date Column
+    debit_col = [c for c in target_df.columns if "Debit Balances" in str(c)][0]
+    date_col = [c for c in target_df.columns if "Month" in str(c) or "Year" in str(c)][0]
+    
+    # Renaissance the dataframe
+    clean_df = target_df[[date_col, debit_col]].copy()
+    clean_df.columns = ["Date", "DebitBalances"]
+    
+    # Explicitly invoke to_datetime with format if possible, or robustly handle it
+    # usually FINRA uses "Jan-24", "Feb-24" etc. (%b-%y)
     try:
-        # pandas read_html returns a list of dataframes
-        dfs = pd.read_html(url)
-        
-        target_df = None
-        for df in dfs:
-            # Look for the relevant column header
-            if any("Debit Balances" in str(col) for col in df.columns):
-                target_df = df
-                break
+         clean_df["Date"] = pd.to_datetime(clean_df["Date"], format="%b-%y")
+    except:
+         # Fallback to default
+         clean_df["Date"] = pd.to_datetime(clean_df["Date"], errors='coerce')
+    
+    clean_df = clean_df.dropna().sort_values("Date", ascending=False)
+    
+    if clean_df.empty:
+        logging.error("Dataframe empty after date parsing.")
+        return None
         
-        if target_df is None:
-            return None
+    return clean_df
 
-        # Clean up column names
-        # Identify the Debit Column and Date Column
-        debit_col = [c for c in target_df.columns if "Debit Balances" in str(c)][0]
-        date_col = [c for c in target_df.columns if "Month" in str(c) or "Year" in str(c)][0]
-        
-        # Renaissance the dataframe
-        clean_df = target_df[[date_col, debit_col]].copy()
-        clean_df.columns = ["Date", "DebitBalances"]
-        
-        # Debug: Print first few raw dates
-        # print(f"DEBUG RAW DATES: {clean_df['Date'].head().tolist()}")
-        
-        # Explicitly invoke to_datetime with format if possible, or robustly handle it
-        # usually FINRA uses "Jan-24", "Feb-24" etc. (%b-%y)
+def _fetch_finra_data():
+    """
+    Helper to fetch and clean FINRA data.
+    Serves the cached table while it is fresh, then revalidates with
+    If-None-Match/If-Modified-Since and only re-parses a changed page.
+    """
+    with tracing.span("finra.fetch", url=FINRA_URL):
+        return _load_finra_data()
+
+def _load_finra_data():
+    global _inflight
+    with _cache_lock:
+        # Held only to read and update the cache; the GET runs outside it
+        if not _cache_loaded:
+            _load_cache()
+
+        cached = _cache["df"]
+        if cached is not None and time.time() - _cache["checked_at"] < FINRA_REVALIDATE_SECONDS:
+            tracing.annotate(cache="fresh")
+            return cached.copy()
+
+        # Concurrent callers share one in-flight download/parse
+        pending, leader = _inflight, _inflight is None
+        if leader:
+            pending = _inflight = Future()
+            validators = {"etag": _cache["etag"], "last_modified": _cache["last_modified"], "sha256": _cache["sha256"]}
+
+    if not leader:
         try:
-             clean_df["Date"] = pd.to_datetime(clean_df["Date"], format="%b-%y")
-        except:
-             # Fallback to default
-             clean_df["Date"] = pd.to_datetime(clean_df["Date"], errors='coerce')
-        
-        clean_df = clean_df.dropna().sort_values("Date", ascending=False)
-        
-        if clean_df.empty:
-            logging.error("Dataframe empty after date parsing.")
-            return None
-            
-        return clean_df
-            
+            df = pending.result(timeout=deadline.remaining())
+        except FutureTimeoutError:
+            # Out of time waiting on the shared download: stale data beats none
+            tracing.annotate(cache="stale" if cached is not None else "miss", error="deadline")
+            return cached.copy() if cached is not None else None
+        tracing.annotate(cache="joined")
+        return df.copy() if df is not None else None
+
+    df = None
+    try:
+        df = _revalidate(cached, validators)
+    finally:
+        with _cache_lock:
+            _inflight = None
+        pending.set_result(df)
+    return df.copy() if df is not None else None
+
+def _revalidate(cached, validators: dict):
+    """Conditional GET of the FINRA page; the table to serve (stale on failure), or None."""
+    headers = {"User-Agent": "Mozilla/5.0 (compatible; MacroAgent)"}
+    if cached is not None:
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    try:
+        response = get_sync_client().get(FINRA_URL, headers=headers, timeout=deadline.timeout(30.0))
+        tracing.annotate(status=response.status_code, bytes=len(response.content))
+        if response.status_code == 304 and cached is not None:
+            tracing.annotate(cache="not_modified")
+            with _cache_lock:
+                _cache["checked_at"] = time.time()
+                _save_cache()
+            return cached
+        response.raise_for_status()
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        if cached is not None and digest == validators["sha256"]:
+            # Server ignored the validators but the page is unchanged
+            tracing.annotate(cache="unchanged")
+            df = cached
+        else:
+            tracing.annotate(cache="miss")
+            df = _parse_finra_table(response.text)
+            if df is None:
+                return cached
+
+        with _cache_lock:
+            _cache.update({
+                "df": df,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest,
+                "checked_at": time.time(),
+            })
+            _save_cache()
+        return df
+
     except Exception as e:
         logging.error(f"Error fetching FINRA data: {e}")
-        # print(f"DEBUG ERROR: {e}")
-        return None
+        tracing.annotate(error=str(e), cache="stale" if cached is not None else "miss")
+        # Stale data beats no data for a monthly series
+        return cached
 
-@tool
-async def get_margin_debt(limit: int = 1):
+# Not hedged: a duplicate call would join the same in-flight download
+@tool(ttl=3600, bindings=[Binding("Margin Debt", ("Margin",))])
+def get_margin_debt(limit: int = 1):
     """
     Fetches the latest Margin Debt statistics from FINRA.
     Returns the latest 'Debit Balances in Customers' Securities Margin Accounts'.
@@ -71,7 +203,8 @@ async def get_margin_debt(limit: int = 1):
     else:
         return {"error": "Could not fetch Margin Statistics from FINRA."}
 
-async def get_margin_debt_history(limit: int = 60):
+@tool(ttl=3600)
+def get_margin_debt_history(limit: int = 60):
     """
     Returns historical margin debt data for plotting.
     Limit defaults to 5 years (60 months).
@@ -1,25 +1,256 @@
 import os
-import httpx
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from src.antigravity import metrics, tracing
+from src.antigravity.planner import Binding
 from src.antigravity.tools import tool
+from src.tools.fred_store import VintageIndex, get_store
+from src.tools.http_client import get_client, request_timeout
+from src.tools.rate_limit import get_scheduler
 
 # API Key handling
 FRED_API_KEY = os.environ.get("FRED_API_KEY")
+# Overridable so benchmarks can point at a local stub server
+FRED_API_URL = os.environ.get("FRED_API_URL", "https://api.stlouisfed.org/fred")
 
-# Friendly names for common series
-SERIES_MAP = {
-    'GFDEGDQ188S': 'US Debt-to-GDP Ratio (%)',
-    'FEDFUNDS': 'Fed Funds Rate (%)',
-    'INDPRO': 'Industrial Production Index',
-    'M2SL': 'M2 Money Supply ($ Billions)',
-    'RRPONTSYD': 'Reverse Repo Volume ($ Billions)',
-    'T10Y2Y': '10-Year minus 2-Year Treasury Spread',
-    'UMCSENT': 'Consumer Sentiment (Univ. of Michigan)',
-    'UNRATE': 'Unemployment Rate (%)',
-    'HOUST': 'Housing Starts (New Privately Owned)',
-    'MORTGAGE30US': '30-Year Fixed Rate Mortgage Average'
+# FRED allows 120 requests/minute per API key. The burst lets a full audit
+# (10 series) go out at once; anything beyond is paced to the quota.
+FRED_RATE_LIMIT_PER_MIN = float(os.environ.get("FRED_RATE_LIMIT_PER_MIN", "120"))
+FRED_BURST = float(os.environ.get("FRED_BURST", "10"))
+FRED_MAX_IN_FLIGHT = int(os.environ.get("FRED_MAX_IN_FLIGHT", "8"))
+
+@dataclass(frozen=True)
+class SeriesInfo:
+    name: str
+    # FRED frequency_short (D/W/M/Q). Used until live metadata has been fetched.
+    frequency: str
+    # Prompt phrases (besides the series ID) that ask for this series
+    keywords: Tuple[str, ...] = ()
+
+# Metadata registry for the series the agent tracks (in report order)
+SERIES_REGISTRY = {
+    'GFDEGDQ188S': SeriesInfo('US Debt-to-GDP Ratio (%)', 'Q', ('Debt-to-GDP',)),
+    'FEDFUNDS': SeriesInfo('Fed Funds Rate (%)', 'M', ('Fed Funds',)),
+    'INDPRO': SeriesInfo('Industrial Production Index', 'M', ('Industrial Production',)),
+    'M2SL': SeriesInfo('M2 Money Supply ($ Billions)', 'M', ('M2',)),
+    'RRPONTSYD': SeriesInfo('Reverse Repo Volume ($ Billions)', 'D', ('Repo',)),
+    'HOUST': SeriesInfo('Housing Starts (New Privately Owned)', 'M', ('Housing',)),
+    'MORTGAGE30US': SeriesInfo('30-Year Fixed Rate Mortgage Average', 'W', ('MORTGAGE',)),
+    'T10Y2Y': SeriesInfo('10-Year minus 2-Year Treasury Spread', 'D', ('Yield',)),
+    'UMCSENT': SeriesInfo('Consumer Sentiment (Univ. of Michigan)', 'M', ('Sentiment',)),
+    'UNRATE': SeriesInfo('Unemployment Rate (%)', 'M', ('Unemployment',)),
 }
 
-@tool
+# Friendly names for common series
+SERIES_MAP = {series_id: info.name for series_id, info in SERIES_REGISTRY.items()}
+
+# Without a release calendar, re-check a series at most this often (seconds)
+RECHECK_BY_FREQUENCY = {'D': 3600, 'W': 6 * 3600, 'BW': 12 * 3600, 'M': 12 * 3600, 'Q': 24 * 3600, 'SA': 24 * 3600, 'A': 24 * 3600}
+# On a release day the publish time is unknown, so poll at this interval
+RELEASE_DAY_RECHECK = 1800
+# Series metadata and release dates are refreshed once a day
+META_TTL = 24 * 3600
+# ALFRED: the full real-time period, and the most rows one request returns
+REALTIME_START = "1776-07-04"
+REALTIME_END = "9999-12-31"
+VINTAGE_PAGE = 100000
+
+def _scheduler():
+    return get_scheduler(
+        FRED_API_KEY,
+        rate=FRED_RATE_LIMIT_PER_MIN / 60.0,
+        burst=FRED_BURST,
+        max_in_flight=FRED_MAX_IN_FLIGHT,
+    )
+
+def fred_scheduler_stats() -> dict:
+    """Queue depth, in-flight and wait-time metrics for the FRED scheduler."""
+    return _scheduler().stats()
+
+@metrics.register_collector
+def _collect_scheduler_stats():
+    if not FRED_API_KEY:
+        return
+    for stat, value in fred_scheduler_stats().items():
+        kind = "gauge" if stat in ("queue_depth", "in_flight", "wait_max_s", "wait_avg_s") else "counter"
+        yield (f"macro_agent_fred_scheduler_{stat}", kind, f"FRED request scheduler {stat}.", {}, value)
+
+async def _fred_get(endpoint: str, params: dict) -> dict:
+    """
+    GET a FRED API endpoint through the shared, keep-alive client,
+    paced by the per-key rate-limit scheduler.
+    """
+    with tracing.span("fred.http", endpoint=endpoint, series_id=params.get("series_id")) as span:
+        params = {**params, "api_key": FRED_API_KEY, "file_type": "json"}
+        url = f"{FRED_API_URL}/{endpoint}"
+        response = await _scheduler().submit(lambda: get_client().get(url, params=params, timeout=request_timeout()))
+        span.set(status=response.status_code, bytes=len(response.content))
+        response.raise_for_status()
+        return response.json()
+
+def _parse_last_updated(value: Optional[str]) -> Optional[float]:
+    """FRED's last_updated ('2024-05-15 07:46:03-05') as epoch seconds."""
+    try:
+        return datetime.strptime(value + "00", "%Y-%m-%d %H:%M:%S%z").timestamp()
+    except (TypeError, ValueError):
+        return None
+
+async def _refresh_metadata(series_id: str) -> dict:
+    """
+    Fetches frequency/last_updated for a series and, where FRED has one,
+    the nearest past and upcoming dates of its release calendar.
+    """
+    info = (await _fred_get("series", {"series_id": series_id}))["seriess"][0]
+    meta = {
+        "frequency": info.get("frequency_short"),
+        "last_updated": info.get("last_updated"),
+        "checked_at": time.time(),
+    }
+    try:
+        release = (await _fred_get("series/release", {"series_id": series_id}))["releases"][0]
+        today = date.today().isoformat()
+        params = {
+            "release_id": release["id"],
+            "realtime_start": (date.today() - timedelta(days=90)).isoformat(),
+            "include_release_dates_with_no_data": "true",
+            "sort_order": "asc",
+            "limit": 1000
+        }
+        dates = [d["date"] for d in (await _fred_get("release/dates", params)).get("release_dates", [])]
+        meta["release_id"] = release["id"]
+        meta["prev_release"] = max((d for d in dates if d <= today), default=None)
+        meta["next_release"] = min((d for d in dates if d > today), default=None)
+    except Exception:
+        pass # No calendar: freshness falls back to last_updated/frequency
+    get_store().save_meta(series_id, meta)
+    return meta
+
+async def _needs_refresh(series_id: str) -> bool:
+    """
+    True if a new observation could have been released since the series was
+    last fetched, judged from the release calendar when FRED has one,
+    otherwise from last_updated and the series frequency.
+    """
+    store = get_store()
+    refreshed_at = store.refreshed_at(series_id)
+    if refreshed_at is None:
+        return True
+
+    meta = store.meta(series_id)
+    today = date.today().isoformat()
+    if meta is None or time.time() - meta["checked_at"] > META_TTL or (meta["next_release"] or "9999") <= today:
+        try:
+            meta = await _refresh_metadata(series_id)
+        except Exception:
+            meta = meta or {}
+
+    age = time.time() - refreshed_at
+    if meta.get("prev_release") or meta.get("next_release"):
+        # A release since (or on the day of) the last fetch could carry new data
+        refreshed_day = date.fromtimestamp(refreshed_at).isoformat()
+        return bool(meta.get("prev_release") and meta["prev_release"] >= refreshed_day and age >= RELEASE_DAY_RECHECK)
+
+    last_updated = _parse_last_updated(meta.get("last_updated"))
+    if last_updated is not None and last_updated > refreshed_at:
+        return True
+    registered = SERIES_REGISTRY.get(series_id)
+    frequency = meta.get("frequency") or (registered.frequency if registered else 'D')
+    return age >= RECHECK_BY_FREQUENCY.get(frequency, 3600)
+
+async def _refresh_series(series_id: str, limit: int):
+    """
+    Brings the local store up to date for `series_id`.
+    The first call downloads the newest `limit` observations; after that only
+    observations from the last stored date onward are requested (the last
+    point is re-read because FRED revises recent values), and only when the
+    release calendar says a new release could exist.
+    """
+    store = get_store()
+    last_date = store.last_date(series_id)
+
+    if last_date is None or not store.covers(series_id, limit):
+        params = {
+            "series_id": series_id,
+            "sort_order": "desc",
+            "limit": limit
+        }
+        data = await _fred_get("series/observations", params)
+        observations = data.get('observations', [])
+        # Fewer rows than asked for means we now hold the whole series
+        store.upsert(series_id, observations, complete=len(observations) < limit)
+    elif await _needs_refresh(series_id):
+        params = {
+            "series_id": series_id,
+            "observation_start": last_date
+        }
+        data = await _fred_get("series/observations", params)
+        store.upsert(series_id, data.get('observations', []))
+
+async def _refresh_vintages(series_id: str):
+    """
+    Downloads every vintage of `series_id` (ALFRED real-time periods) into
+    the store: once, then again whenever the series was updated since.
+    """
+    store = get_store()
+    refreshed_at = store.vintages_refreshed_at(series_id)
+    if refreshed_at is not None:
+        meta = store.meta(series_id)
+        if meta is None or time.time() - meta["checked_at"] > META_TTL:
+            try:
+                meta = await _refresh_metadata(series_id)
+            except Exception:
+                meta = meta or {}
+        last_updated = _parse_last_updated(meta.get("last_updated"))
+        if last_updated is not None and last_updated <= refreshed_at:
+            return
+        registered = SERIES_REGISTRY.get(series_id)
+        frequency = meta.get("frequency") or (registered.frequency if registered else 'D')
+        if last_updated is None and time.time() - refreshed_at < RECHECK_BY_FREQUENCY.get(frequency, 3600):
+            return
+
+    # Revisions close a row's real-time period, so the whole history is
+    # re-read (in pages) rather than patched
+    observations = []
+    while True:
+        params = {
+            "series_id": series_id,
+            "realtime_start": REALTIME_START,
+            "realtime_end": REALTIME_END,
+            "limit": VINTAGE_PAGE,
+            "offset": len(observations)
+        }
+        data = await _fred_get("series/observations", params)
+        page = data.get('observations', [])
+        observations += page
+        if len(page) < VINTAGE_PAGE or len(observations) >= data.get('count', 0):
+            break
+    store.replace_vintages(series_id, observations)
+
+async def get_fred_vintages(series_id: str) -> Optional[VintageIndex]:
+    """
+    Every published vintage of a FRED series, for point-in-time ("as known
+    on date D") lookups; see VintageIndex. None without an API key or data.
+    """
+    if not FRED_API_KEY:
+        return None
+
+    try:
+        await _refresh_vintages(series_id)
+    except Exception:
+        # Fall back to whatever is stored
+        pass
+    return get_store().vintages(series_id)
+
+# A series is fetched when the prompt names it and asks to fetch/audit
+SERIES_BINDINGS = [
+    Binding(series_id, info.keywords + (series_id,), {"series_id": series_id}, requires=("fetch", "audit"))
+    for series_id, info in SERIES_REGISTRY.items()
+]
+
+@tool(ttl=300, hedge=True, bindings=SERIES_BINDINGS)
 async def get_macro_indicator(series_id: str):
     """
     Fetches the latest value for a specific FRED series.
@@ -27,35 +258,26 @@ async def get_macro_indicator(series_id: str):
     if not FRED_API_KEY:
         return {"error": "FRED_API_KEY not found. Please set environment variable."}
 
-    url = "https://api.stlouisfed.org/fred/series/observations"
-    params = {
-        "series_id": series_id,
-        "api_key": FRED_API_KEY,
-        "file_type": "json",
-        "sort_order": "desc",
-        "limit": 1
-    }
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'observations' in data and data['observations']:
-                obs = data['observations'][0]
-                readable_name = SERIES_MAP.get(series_id, series_id)
-                return {
-                    "indicator": readable_name, 
-                    "value": obs['value'], 
-                    "date": obs['date']
-                }
-            else:
-                return {"error": f"No observations found for {series_id}"}
-        except Exception as e:
+    try:
+        await _refresh_series(series_id, limit=1)
+    except Exception as e:
+        # Serve the stored value if FRED is unreachable
+        if not get_store().last_date(series_id):
             return {"error": f"Failed to fetch FRED data: {str(e)}"}
 
-@tool
+    observations = get_store().observations(series_id, limit=1)
+    if observations:
+        obs = observations[0]
+        readable_name = SERIES_MAP.get(series_id, series_id)
+        return {
+            "indicator": readable_name, 
+            "value": obs['value'], 
+            "date": obs['date']
+        }
+    else:
+        return {"error": f"No observations found for {series_id}"}
+
+@tool(ttl=300, hedge=True)
 async def get_fred_history(series_id: str, limit: int = 12):
     """
     Fetches historical data for a FRED series. 
@@ -65,36 +287,20 @@ async def get_fred_history(series_id: str, limit: int = 12):
     if not FRED_API_KEY:
         return []
 
-    url = "https://api.stlouisfed.org/fred/series/observations"
-    params = {
-        "series_id": series_id,
-        "api_key": FRED_API_KEY,
-        "file_type": "json",
-        "sort_order": "desc",
-        "limit": limit
-    }
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            history = []
-            if 'observations' in data:
-                # Observations come in desc order (newest first)
-                # We want them sorted by date for charting
-                obs_list = sorted(data['observations'], key=lambda x: x['date'])
-                
-                for obs in obs_list:
-                    try:
-                        val = float(obs['value'])
-                        history.append({'date': obs['date'], 'value': val})
-                    except ValueError:
-                        continue # Skip "." or invalid values
-            
-            return history
-        except Exception as e:
-            return []
-                
+    try:
+        await _refresh_series(series_id, limit=limit)
+    except Exception:
+        # Fall back to whatever is stored
+        pass
 
+    history = []
+    # Stored observations come in desc order (newest first)
+    # We want them sorted by date for charting
+    for obs in reversed(get_store().observations(series_id, limit=limit)):
+        try:
+            val = float(obs['value'])
+            history.append({'date': obs['date'], 'value': val})
+        except ValueError:
+            continue # Skip "." or invalid values
+    
+    return history
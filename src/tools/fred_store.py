@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.antigravity.lazy import lazy_import
+from src.tools.storage import cache_path
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    series_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (series_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    series_id TEXT PRIMARY KEY,
+    complete INTEGER NOT NULL DEFAULT 0,
+    refreshed_at REAL
+);
+CREATE TABLE IF NOT EXISTS series_meta (
+    series_id TEXT PRIMARY KEY,
+    frequency TEXT,
+    last_updated TEXT,
+    release_id INTEGER,
+    prev_release TEXT,
+    next_release TEXT,
+    checked_at REAL NOT NULL
+);
+-- ALFRED vintages: each row is one observation's value while it was current
+-- (realtime_start to realtime_end, inclusive). Dates are days since
+-- 1970-01-01, a missing value is NULL.
+CREATE TABLE IF NOT EXISTS vintages (
+    series_id TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    realtime_start INTEGER NOT NULL,
+    realtime_end INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (series_id, date, realtime_start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS vintage_series (
+    series_id TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+_META_COLUMNS = ("frequency", "last_updated", "release_id", "prev_release", "next_release", "checked_at")
+
+
+def _days(dates) -> np.ndarray:
+    """Dates (strings, date/datetime objects, a DatetimeIndex...) as int64 days since 1970-01-01."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+class VintageIndex:
+    """
+    Every vintage of one series, indexed for "as known on date D" lookups.
+    Rows are sorted by (observation date, realtime_start), so each lookup is
+    a binary search and a whole column of dates is answered in one numpy call:
+
+        index.latest_as_of(pd.bdate_range("2005-01-01", "2024-12-31"))
+        index.value_as_of(["2008-09-01"], ["2008-10-16"])   # first print of Sep 2008
+        index.vintage("2009-01-01")                         # the series as published then
+    """
+
+    def __init__(self, dates: np.ndarray, starts: np.ndarray, ends: np.ndarray, values: np.ndarray):
+        order = np.lexsort((starts, dates))
+        self.dates, self.starts, self.ends, self.values = dates[order], starts[order], ends[order], values[order]
+        # Composite (observation, realtime_start) key for value_as_of
+        self._first_day = int(self.starts.min()) if len(self.starts) else 0
+        self._span = (int(self.starts.max()) - self._first_day + 2) if len(self.starts) else 1
+        self._origin = int(self.dates.min()) if len(self.dates) else 0
+        self._keys = (self.dates - self._origin) * self._span + (self.starts - self._first_day + 1)
+        # When each observation was first published, and the newest
+        # observation out by then (releases can come out of date order)
+        observed, first = np.unique(self.dates, return_index=True)
+        released = self.starts[first]
+        by_release = np.argsort(released, kind="stable")
+        self._released = released[by_release]
+        self._newest = np.maximum.accumulate(observed[by_release]) if len(observed) else observed
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def value_as_of(self, dates, known_on) -> np.ndarray:
+        """The value of each observation `dates[i]` as published on `known_on[i]` (NaN if not out yet)."""
+        dates, known_on = np.broadcast_arrays(_days(dates), _days(known_on))
+        if not len(self):
+            return np.full(dates.shape, np.nan)
+        day = np.clip(known_on, self._first_day - 1, self._first_day + self._span - 2)
+        row = np.searchsorted(self._keys, (dates - self._origin) * self._span + (day - self._first_day + 1),
+                              side="right") - 1
+        safe = np.maximum(row, 0)
+        found = (row >= 0) & (self.dates[safe] == dates) & (self.starts[safe] <= known_on) & (known_on <= self.ends[safe])
+        return np.where(found, self.values[safe], np.nan)
+
+    def latest_as_of(self, known_on) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The newest observation published by each date of `known_on`: its
+        date (datetime64, NaT before the first release) and value then.
+        """
+        known_on = _days(known_on)
+        position = np.searchsorted(self._released, known_on, side="right") - 1
+        if not len(self):
+            return np.full(known_on.shape, np.datetime64("NaT"), dtype="datetime64[D]"), np.full(known_on.shape, np.nan)
+        newest = self._newest[np.maximum(position, 0)]
+        values = np.where(position >= 0, self.value_as_of(newest, known_on), np.nan)
+        dates = np.where(position >= 0, newest, np.iinfo(np.int64).min).astype("datetime64[D]")
+        return dates, values
+
+    def vintage(self, known_on) -> pd.Series:
+        """The whole series as published on `known_on`."""
+        day = int(_days(known_on))
+        current = (self.starts <= day) & (day <= self.ends)
+        return pd.Series(self.values[current], index=pd.DatetimeIndex(self.dates[current].astype("datetime64[D]")),
+                         name="value")
+
+
+class FredStore:
+    """
+    On-disk (SQLite) store of FRED observations keyed by series ID.
+    Values are kept exactly as FRED sends them ("." marks a missing value),
+    so reads reproduce what a direct API call would have returned.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # VintageIndex per series, until its vintages are replaced
+        self._vintages: Dict[str, VintageIndex] = {}
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def last_date(self, series_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(date) FROM observations WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        return row[0]
+
+    def covers(self, series_id: str, limit: int) -> bool:
+        """True if the newest `limit` observations (or the whole series) are stored."""
+        with self._lock:
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM observations WHERE series_id = ?", (series_id,)
+            ).fetchone()[0]
+            row = self._conn.execute(
+                "SELECT complete FROM series WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        return count >= limit or bool(row and row[0])
+
+    def upsert(self, series_id: str, observations: Iterable[Dict], complete: bool = False):
+        """Merges FRED observation dicts ({'date', 'value', ...}) into the store."""
+        rows = [(series_id, obs["date"], obs["value"]) for obs in observations]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations (series_id, date, value) VALUES (?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT INTO series (series_id, complete, refreshed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(series_id) DO UPDATE SET "
+                "complete = MAX(complete, excluded.complete), refreshed_at = excluded.refreshed_at",
+                (series_id, int(complete), time.time()),
+            )
+
+    def refreshed_at(self, series_id: str) -> Optional[float]:
+        """When observations for the series were last fetched (epoch seconds)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM series WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def meta(self, series_id: str) -> Optional[Dict]:
+        """Cached series metadata and release calendar, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_META_COLUMNS)} FROM series_meta WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        return dict(zip(_META_COLUMNS, row)) if row else None
+
+    def save_meta(self, series_id: str, meta: Dict):
+        values = [meta.get(col) for col in _META_COLUMNS]
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO series_meta (series_id, {', '.join(_META_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(_META_COLUMNS))})",
+                [series_id] + values,
+            )
+
+    def replace_vintages(self, series_id: str, observations: Iterable[Dict]):
+        """Stores a series' full ALFRED history (observation dicts with realtime_start/realtime_end)."""
+        observations = list(observations)
+        columns = [_days([obs[key] for obs in observations]).tolist() for key in ("date", "realtime_start", "realtime_end")]
+        values = [None if obs["value"] == "." else float(obs["value"]) for obs in observations]
+        rows = [(series_id, d, start, end, value) for d, start, end, value in zip(*columns, values)]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM vintages WHERE series_id = ?", (series_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vintages (series_id, date, realtime_start, realtime_end, value) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vintage_series (series_id, refreshed_at) VALUES (?, ?)",
+                (series_id, time.time()),
+            )
+            self._vintages.pop(series_id, None)
+
+    def vintages_refreshed_at(self, series_id: str) -> Optional[float]:
+        """When the series' vintages were last downloaded (epoch seconds)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM vintage_series WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def vintages(self, series_id: str) -> Optional[VintageIndex]:
+        """The stored vintages as a VintageIndex (built once per download), or None if there are none."""
+        with self._lock:
+            index = self._vintages.get(series_id)
+            if index is None:
+                rows = self._conn.execute(
+                    "SELECT date, realtime_start, realtime_end, value FROM vintages WHERE series_id = ?", (series_id,)
+                ).fetchall()
+                if not rows:
+                    return None
+                table = np.array(rows, dtype=float)
+                index = self._vintages[series_id] = VintageIndex(
+                    table[:, 0].astype(np.int64), table[:, 1].astype(np.int64), table[:, 2].astype(np.int64), table[:, 3])
+        return index
+
+    def observations(self, series_id: str, limit: int) -> List[Dict[str, str]]:
+        """The newest `limit` raw observations, newest first (like sort_order=desc)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, value FROM observations WHERE series_id = ? ORDER BY date DESC LIMIT ?",
+                (series_id, limit),
+            ).fetchall()
+        return [{"date": date, "value": value} for date, value in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> FredStore:
+    """The process-wide FRED store (cache dir/fred.sqlite3)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FredStore(cache_path("fred.sqlite3"))
+        return _store
@@ -1,24 +1,20 @@
-import yfinance as yf
-import pandas as pd
 from typing import Dict, Any
 
+from src.antigravity.planner import Binding
 from src.antigravity.tools import tool
+from src.tools import market_data
 
-@tool
-async def get_crypto_prices(tickers: list = ["BTC-USD", "ETH-USD"]) -> Dict[str, Any]:
+@tool(ttl=60, hedge=True, bindings=[Binding("Crypto", ("Crypto",))],
+      inputs=[market_data.prices("crypto", "5d")])
+def get_crypto_prices(tickers: list = ["BTC-USD", "ETH-USD"]) -> Dict[str, Any]:
     """
     Fetches current price and 7d trend for Crypto assets.
     """
     results = {}
     try:
         # Fetch data (1mo to calculate trends if needed, but 5d is standard for our report)
-        data = yf.download(tickers, period="5d", interval="1d", progress=False)
-        
-        # Handle multi-index columns if multiple tickers
-        if len(tickers) > 1:
-            closes = data['Close']
-        else:
-            closes = pd.DataFrame({tickers[0]: data['Close']})
+        data = market_data.history(tickers, "5d")
+        closes = data['Close']
 
         for ticker in tickers:
             try:
@@ -45,18 +41,19 @@ async def get_crypto_prices(tickers: list = ["BTC-USD", "ETH-USD"]) -> Dict[str,
     except Exception as e:
         return {"error": f"Failed to fetch crypto: {str(e)}"}
 
-@tool
-async def get_global_indices() -> Dict[str, Any]:
+@tool(ttl=60, hedge=True, bindings=[Binding("Global Markets", ("Global",))],
+      inputs=[market_data.prices("global", "5d")])
+def get_global_indices() -> Dict[str, Any]:
     """
     Fetches major global ETFs to detect divergences.
     EZU: Eurozone
     EWJ: Japan
     EEM: Emerging Markets
     """
-    tickers = ["EZU", "EWJ", "EEM", "SPY"] # SPY for comparison
+    tickers = market_data.symbols("global") # SPY for comparison
     results = {}
     try:
-        data = yf.download(tickers, period="5d", interval="1d", progress=False)
+        data = market_data.history(tickers, "5d")
         closes = data['Close']
         
         for ticker in tickers:
@@ -79,13 +76,14 @@ async def get_global_indices() -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to fetch global markets: {str(e)}"}
 
-async def get_global_history(ticker: str, period: str = "2y") -> list:
+@tool(ttl=900)
+def get_global_history(ticker: str, period: str = "2y") -> list:
     """
     Fetches historical data for plotting.
     """
     try:
-        df = yf.Ticker(ticker).history(period=period)
-        df = df.reset_index()
+        df = market_data.history([ticker], period)
+        df = df.xs(ticker, axis=1, level=1).dropna(subset=['Close']).reset_index()
         # Convert to list of dicts or return specific format
         # Dashboard expects list of dicts with 'Date' and 'value' (or similar)
         # Actually plot_metric handles DataFrames with Date column.
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Tuple
+
+from src.antigravity import deadline
+from src.antigravity.lazy import lazy_import
+from src.antigravity.runtime import on_shutdown
+
+# httpx (and the replay transports built on it) load with the first client
+httpx = lazy_import("httpx")
+
+# Pool sizing for upstream APIs. Keep-alive lets every FRED series after the
+# first reuse an open connection instead of paying a new TCP+TLS handshake.
+HTTP_LIMITS = dict(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+# Read / connect timeouts (seconds)
+HTTP_TIMEOUT = (15.0, 5.0)
+
+# HTTP/2 requires the optional `h2` package; opt in with MACRO_AGENT_HTTP2=1
+HTTP2 = os.environ.get("MACRO_AGENT_HTTP2") == "1" and importlib.util.find_spec("h2") is not None
+
+# One client per event loop: httpx connection pools cannot be shared across loops
+# (the dashboard used to call asyncio.run() once per chart).
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide AsyncClient for the running event loop,
+    creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        from src.tools.replay import AsyncRecordReplayTransport
+        # Wrapped so upstream calls can be counted, recorded and replayed
+        transport = AsyncRecordReplayTransport(httpx.AsyncHTTPTransport(http2=HTTP2, limits=httpx.Limits(**HTTP_LIMITS)))
+        read, connect = HTTP_TIMEOUT
+        client = httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(read, connect=connect))
+        _clients[loop] = client
+    return client
+
+
+def request_timeout(default: Tuple[float, float] = HTTP_TIMEOUT) -> httpx.Timeout:
+    """The `default` (read, connect) timeouts, capped to what is left of the caller's deadline (if any)."""
+    read, connect = default
+    if deadline.remaining() is None:
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(deadline.timeout(read), connect=deadline.timeout(connect))
+
+
+_sync_client = None
+_sync_lock = threading.Lock()
+
+
+def get_sync_client() -> httpx.Client:
+    """Process-wide blocking client for tools that run on the thread pool (FINRA)."""
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None:
+            from src.tools.replay import RecordReplayTransport
+            transport = RecordReplayTransport(httpx.HTTPTransport(limits=httpx.Limits(**HTTP_LIMITS)))
+            read, connect = HTTP_TIMEOUT
+            _sync_client = httpx.Client(transport=transport, timeout=httpx.Timeout(read, connect=connect),
+                                        follow_redirects=True)
+        return _sync_client
+
+
+async def close_client():
+    """Closes the shared client of the running loop (safe to call twice)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# Release the background loop's pool when the process exits
+on_shutdown(close_client)
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from src.antigravity import deadline, metrics, tracing
+from src.antigravity.dag import Dataset, Input
+from src.antigravity.lazy import lazy_import
+from src.tools.storage import cache_path
+
+# Loaded on the first download, not when the tools are imported
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+yf = lazy_import("yfinance")
+replay = lazy_import("src.tools.replay")
+
+# Central registry of every Yahoo ticker the tools use, grouped by tool.
+# Tools ask for a group's symbols instead of hardcoding ticker strings, so a
+# symbol shared by several tools (e.g. SPY) is only ever downloaded once.
+TICKER_REGISTRY = {
+    "metals": {"GC=F": "Gold", "SI=F": "Silver", "HG=F": "Copper", "PL=F": "Platinum"},
+    "risk": {"^VIX": "VIX", "^GSPC": "S&P 500", "HYG": "High Yield Bonds", "TLT": "20Y Treasuries"},
+    "sectors": {
+        "XLK": "Tech", "XLE": "Energy", "XLP": "Staples", "XLU": "Utilities",
+        "XLV": "Health", "XLY": "Discretionary", "XLI": "Industrials", "SPY": "Market",
+    },
+    "crypto": {"BTC-USD": "Bitcoin", "ETH-USD": "Ethereum"},
+    "global": {"EZU": "Eurozone", "EWJ": "Japan", "EEM": "Emerging Markets", "SPY": "S&P 500"},
+    # Recommended ETFs not covered above (backtests of the allocations)
+    "allocations": {"GLD": "Gold", "NVDA": "Nvidia", "BIL": "T-Bills", "ITB": "Homebuilders"},
+}
+
+# Calendar span of each yfinance period. A batch downloads its longest
+# period once; shorter periods are sliced back out of it.
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "2mo": 62, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "max": 36500,
+}
+
+# How long a downloaded bar set is reused, and how long the first caller
+# waits for concurrent tools to join its download.
+CACHE_TTL = 300.0
+BATCH_WINDOW = 0.05
+
+# Per-download timeout (yfinance's own default), capped by the caller's deadline
+DOWNLOAD_TIMEOUT = 10.0
+
+# Periods at least this long are served from the on-disk bar cache and only
+# topped up with recent bars. The trailing REVALIDATE_DAYS are re-downloaded
+# and compared: if split/dividend adjustment changed them, the whole history
+# for that ticker is fetched again.
+DISK_CACHE_MIN_DAYS = 366
+REVALIDATE_DAYS = 10
+
+
+def symbols(group: str) -> List[str]:
+    """Ticker symbols registered for a tool group."""
+    return list(TICKER_REGISTRY[group])
+
+
+def _slice(frame: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Cuts a longer bar history down to what yfinance returns for `period`."""
+    if period.endswith("d"):
+        # "5d" means the last 5 bars, not 5 calendar days
+        return frame.tail(int(period[:-1]))
+    if period == "max" or frame.empty:
+        return frame
+    start = frame.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])
+    return frame.loc[frame.index > start]
+
+
+def _ticker_frame(data: pd.DataFrame, symbol: str):
+    """Extracts one symbol's OHLCV bars from a group_by='ticker' download."""
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        frame = data[symbol]
+    else:
+        frame = data
+    frame = frame.dropna(how="all")
+    return frame if not frame.empty else None
+
+
+class _DiskBarCache:
+    """Per-ticker OHLCV history on disk (pickled DataFrames under cache dir/prices)."""
+
+    def _path(self, symbol: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in symbol)
+        return cache_path("prices", f"{safe}.pkl")
+
+    def load(self, symbol: str):
+        """Returns (frame, period_days) or None."""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = pd.read_pickle(path)
+            return entry["frame"], entry["period_days"]
+        except Exception:
+            return None
+
+    def save(self, symbol: str, frame: pd.DataFrame, period_days: int):
+        path = self._path(symbol)
+        tmp = path + ".tmp"
+        pd.to_pickle({"frame": frame, "period_days": period_days}, tmp)
+        os.replace(tmp, path)
+
+
+def _merge_bars(cached: pd.DataFrame, recent: pd.DataFrame):
+    """
+    Appends `recent` bars to `cached`. Returns None if the settled bars they
+    share disagree, i.e. the history was re-adjusted for a split or dividend.
+
+    The last cached bar (and anything dated today) may have been saved
+    mid-session, so it is left out of the comparison and `recent` overwrites it.
+    """
+    today = pd.Timestamp.now(tz=cached.index.tz).normalize()
+    settled = min(cached.index[-1], today)
+    overlap = cached.index.intersection(recent.index)
+    overlap = overlap[overlap < settled]
+    if len(overlap):
+        old = cached.loc[overlap, "Close"].to_numpy(dtype=float)
+        new = recent.loc[overlap, "Close"].to_numpy(dtype=float)
+        if not np.allclose(old, new, rtol=1e-6, equal_nan=True):
+            return None
+    return pd.concat([cached.loc[cached.index < recent.index[0]], recent])
+
+
+class _Batch:
+    def __init__(self):
+        self.symbols = set()
+        self.period = "1d"
+        self.done = threading.Event()
+        self.error = None
+
+    def add(self, symbols: Iterable[str], period: str):
+        self.symbols.update(symbols)
+        if PERIOD_DAYS[period] > PERIOD_DAYS[self.period]:
+            self.period = period
+
+
+class MarketDataBatcher:
+    """
+    Merges concurrent yfinance requests into one bulk download.
+
+    The first caller opens a batch and waits BATCH_WINDOW for other tools
+    (running on the tool thread pool) to add their symbols; the union is then
+    downloaded once at the longest requested period. Bars are cached per
+    symbol, so later requests for a covered symbol/period cost nothing.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, window: float = BATCH_WINDOW):
+        self.ttl = ttl
+        self.window = window
+        self._cache: Dict[str, Tuple[float, int, pd.DataFrame]] = {}
+        self._disk = _DiskBarCache()
+        self._lock = threading.Lock()
+        self._pending = None
+        self._stats = {
+            "requests": 0, "cache_hits": 0, "downloads": 0, "symbols_downloaded": 0,
+            "incremental_symbols": 0, "revalidation_refetches": 0,
+        }
+
+    def history(self, symbols: Sequence[str], period: str) -> pd.DataFrame:
+        """
+        Daily bars for `symbols` over `period`, with (field, symbol) columns
+        like yf.Tickers(...).history(), e.g. hist['Close']['SPY'].
+        """
+        symbols = list(dict.fromkeys(symbols))
+        with tracing.span("market_data.history", tickers=",".join(symbols), period=period) as span:
+            frames = self._lookup(symbols, period)
+            missing = [s for s in symbols if s not in frames]
+            with self._lock:
+                self._stats["requests"] += 1
+                if not missing:
+                    self._stats["cache_hits"] += 1
+            span.set(cache="hit" if not missing else "partial" if frames else "miss")
+            if missing:
+                self._fetch(missing, period)
+                frames.update(self._lookup(missing, period))
+            return self._assemble(frames, symbols, period)
+
+    def prefetch(self, requests: Iterable[Tuple[Sequence[str], str]]):
+        """Downloads everything a planned set of (symbols, period) requests needs in one call."""
+        batch = _Batch()
+        for syms, period in requests:
+            batch.add(syms, period)
+        missing = [s for s in batch.symbols if s not in self._lookup([s], batch.period)]
+        if missing:
+            self._download(missing, batch.period)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _lookup(self, symbols: Sequence[str], period: str) -> Dict[str, pd.DataFrame]:
+        now = time.time()
+        needed = PERIOD_DAYS[period]
+        found = {}
+        with self._lock:
+            for sym in symbols:
+                entry = self._cache.get(sym)
+                if entry and now - entry[0] < self.ttl and entry[1] >= needed:
+                    found[sym] = entry[2]
+        return found
+
+    def _fetch(self, symbols: Sequence[str], period: str):
+        with self._lock:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            batch.add(symbols, period)
+
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                self._pending = None
+            try:
+                with tracing.span("yfinance.batch", tickers=",".join(sorted(batch.symbols)), period=batch.period):
+                    self._download(sorted(batch.symbols), batch.period)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            # Joined another tool's batch; its leader carries the download span
+            tracing.annotate(batched=True)
+            if not batch.done.wait(deadline.remaining()):
+                raise TimeoutError("market data download still running at deadline")
+
+        if batch.error is not None:
+            raise batch.error
+
+    def _download(self, symbols: Sequence[str], period: str):
+        period_days = PERIOD_DAYS[period]
+        if period_days < DISK_CACHE_MIN_DAYS:
+            self._store(symbols, self._yf_download(symbols, period=period), period_days)
+            return
+
+        # Long histories: top up what is on disk, download the rest in full
+        cached = {}
+        for sym in symbols:
+            entry = self._disk.load(sym)
+            if entry is not None and entry[1] >= period_days and not entry[0].empty:
+                cached[sym] = entry
+        cold = [s for s in symbols if s not in cached]
+
+        if cached:
+            start = min(frame.index[-1] for frame, _ in cached.values()) - pd.Timedelta(days=REVALIDATE_DAYS)
+            data = self._yf_download(list(cached), start=start.strftime("%Y-%m-%d"))
+            fetched_at = time.time()
+            for sym, (frame, stored_days) in cached.items():
+                recent = _ticker_frame(data, sym)
+                if recent is None:
+                    # Upstream failed: serve the stored bars as they are
+                    merged = frame
+                else:
+                    merged = _merge_bars(frame, recent)
+                    if merged is None:
+                        cold.append(sym)
+                        self._bump("revalidation_refetches")
+                        continue
+                    self._disk.save(sym, merged, stored_days)
+                self._bump("incremental_symbols")
+                with self._lock:
+                    self._cache[sym] = (fetched_at, stored_days, merged)
+
+        if cold:
+            data = self._yf_download(cold, period=period)
+            for sym in self._store(cold, data, period_days):
+                self._disk.save(sym, self._cache[sym][2], period_days)
+
+    def _yf_download(self, symbols: Sequence[str], **window) -> pd.DataFrame:
+        self._bump("downloads")
+        self._bump("symbols_downloaded", len(symbols))
+        with tracing.span("yfinance.download", tickers=",".join(symbols), **window):
+            return replay.yahoo_download(
+                yf.download, symbols, timeout=deadline.timeout(DOWNLOAD_TIMEOUT), interval="1d",
+                group_by="ticker", auto_adjust=True, progress=False, threads=True, **window,
+            )
+
+    def _store(self, symbols: Sequence[str], data: pd.DataFrame, period_days: int) -> List[str]:
+        """Caches each symbol's bars in memory; returns the symbols that had data."""
+        fetched_at = time.time()
+        stored = []
+        with self._lock:
+            for sym in symbols:
+                frame = _ticker_frame(data, sym)
+                if frame is not None:
+                    self._cache[sym] = (fetched_at, period_days, frame)
+                    stored.append(sym)
+        return stored
+
+    def _bump(self, key: str, delta: int = 1):
+        with self._lock:
+            self._stats[key] += delta
+
+    @staticmethod
+    def _assemble(frames: Dict[str, pd.DataFrame], symbols: Sequence[str], period: str) -> pd.DataFrame:
+        sliced = {sym: _slice(frames[sym], period) for sym in symbols if sym in frames}
+        if not sliced:
+            return pd.DataFrame()
+        panel = pd.concat(sliced, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        panel.index.name = "Date"
+        return panel
+
+
+_batcher = MarketDataBatcher()
+
+
+def history(symbols: Sequence[str], period: str) -> pd.DataFrame:
+    """Module-level entry point used by the yfinance tools."""
+    return _batcher.history(symbols, period)
+
+
+def prefetch(requests: Iterable[Tuple[Sequence[str], str]]):
+    _batcher.prefetch(requests)
+
+
+def stats() -> Dict[str, int]:
+    return _batcher.stats()
+
+
+# Daily bars for the union of every planned tool's symbols, downloaded once
+PRICES = Dataset("prices", prefetch)
+
+
+def prices(group: str, period: str) -> Input:
+    """Declares that a tool reads `group`'s bars over `period` (see @tool(inputs=...))."""
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"unknown period {period!r} (expected one of {', '.join(PERIOD_DAYS)})")
+    return Input(PRICES, (tuple(symbols(group)), period))
+
+
+@metrics.register_collector
+def _collect_batcher_stats():
+    for stat, value in stats().items():
+        yield (f"macro_agent_market_data_{stat}_total", "counter", f"Market data batcher {stat}.", {}, value)
@@ -1,8 +1,10 @@
-import yfinance as yf
+from src.antigravity.planner import Binding
 from src.antigravity.tools import tool
+from src.tools import market_data
 
-@tool
-async def get_market_risk_sentiment():
+@tool(ttl=60, hedge=True, bindings=[Binding("Market Sentiment", ("Risk", "VIX"))],
+      inputs=[market_data.prices("risk", "1d")])
+def get_market_risk_sentiment():
     """
     Fetches Market Risk Sentiment indicators:
     - VIX (Volatility Index) - Proxy for fear (High VIX often correlates with High Put/Call Ratio)
@@ -10,10 +12,8 @@ async def get_market_risk_sentiment():
     """
     try:
         # Fetch VIX, S&P 500 (^GSPC), High Yield (HYG), Treasuries (TLT)
-        tickers = yf.Tickers("^VIX ^GSPC HYG TLT")
-        
         # Get latest day's data
-        hist = tickers.history(period="1d")
+        hist = market_data.history(market_data.symbols("risk"), "1d")
         
         result = {
             "indicator": "Market Risk Sentiment",
@@ -23,15 +23,16 @@ async def get_market_risk_sentiment():
         }
 
         # Safe extraction
+        # (each symbol's latest bar; dates can differ across exchanges)
         if "^VIX" in hist['Close']:
-             result["vix"] = round(hist['Close']["^VIX"].iloc[-1], 2)
+             result["vix"] = round(hist['Close']["^VIX"].dropna().iloc[-1], 2)
         if "^GSPC" in hist['Volume']:
-             result["sp500_volume"] = int(hist['Volume']["^GSPC"].iloc[-1])
+             result["sp500_volume"] = int(hist['Volume']["^GSPC"].dropna().iloc[-1])
              
         # Risk Ratio (HYG / TLT)
         if "HYG" in hist['Close'] and "TLT" in hist['Close']:
-             hyg = hist['Close']["HYG"].iloc[-1]
-             tlt = hist['Close']["TLT"].iloc[-1]
+             hyg = hist['Close']["HYG"].dropna().iloc[-1]
+             tlt = hist['Close']["TLT"].dropna().iloc[-1]
              ratio = hyg / tlt
              result["risk_ratio"] = round(ratio, 4)
              result["hyg_price"] = round(hyg, 2)
@@ -40,15 +41,14 @@ async def get_market_risk_sentiment():
     except Exception as e:
         return {"error": f"Failed to fetch market data: {str(e)}"}
 
-@tool
-async def get_market_history():
+@tool(ttl=900)
+def get_market_history():
     """
     Fetches 5-year history for Market Risk indicators: VIX, HYG, TLT.
     Returns dict with 'Date', 'VIX', 'HYG', 'TLT'.
     """
     try:
-        tickers = yf.Tickers("^VIX HYG TLT")
-        hist = tickers.history(period="5y")
+        hist = market_data.history(["^VIX", "HYG", "TLT"], "5y")
         
         if hist.empty: return {}
         
@@ -77,17 +77,16 @@ async def get_market_history():
     except Exception:
         return {}
 
-@tool
-async def get_sector_history():
+@tool(ttl=900)
+def get_sector_history():
     """
     Fetches 5-year price history for Major Sectors.
     Sectors: XLK (Tech), XLE (Energy), XLP (Staples), XLU (Utilities), XLV (Health), XLY (Discretionary), XLI (Industrials), SPY (Market).
     Returns dict for separate columns.
     """
     try:
-        symbols = "XLK XLE XLP XLU XLV XLY XLI SPY"
-        tickers = yf.Tickers(symbols)
-        hist = tickers.history(period="5y")
+        symbols = market_data.symbols("sectors")
+        hist = market_data.history(symbols, "5y")
         
         if hist.empty: return {}
         
@@ -95,7 +94,7 @@ async def get_sector_history():
         data = {"Date": [d.strftime('%Y-%m-%d') for d in hist['Date']]}
         
         closes = hist['Close']
-        for sym in symbols.split():
+        for sym in symbols:
             if sym in closes:
                 data[sym] = closes[sym].ffill().tolist()
                 
@@ -103,25 +102,25 @@ async def get_sector_history():
     except Exception:
         return {}
 
-@tool
-async def get_sector_performance():
+@tool(ttl=60, hedge=True, bindings=[Binding("Sector Performance", ("Sector",))],
+      inputs=[market_data.prices("sectors", "2mo")])
+def get_sector_performance():
     """
     Fetches recent performance (1 Month) for Sector analysis.
     Useful for detecting rotation (e.g. Defensive vs Growth).
     Returns dict of {Sector: 1mo_pct_change}.
     """
     try:
-        symbols = "XLK XLE XLP XLU XLV XLY XLI SPY"
-        tickers = yf.Tickers(symbols)
+        symbols = market_data.symbols("sectors")
         # Fetch enough days for ~1 month (22 trading days)
-        hist = tickers.history(period="2mo")
+        hist = market_data.history(symbols, "2mo")
         
         if hist.empty: return {}
         
         closes = hist['Close']
         results = {}
         
-        for sym in symbols.split():
+        for sym in symbols:
              if sym in closes:
                  series = closes[sym].dropna()
                  if len(series) > 20:
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.antigravity import deadline
+from src.antigravity.lazy import lazy_import
+
+httpx = lazy_import("httpx")
+
+# Status codes worth retrying: throttled or transiently unavailable upstream
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket. Each caller reserves one token and is told
+    how long to wait for it, so the bucket needs no event-loop primitives and
+    can be shared by every loop/thread in the process.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate            # tokens per second
+        self.capacity = capacity    # burst size
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float):
+        """Stops handing out tokens for `seconds` (e.g. after a Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RequestScheduler:
+    """
+    Shapes requests for one API key: token bucket for the rate, a per-loop
+    semaphore for in-flight requests, and retries on 429/5xx/transport errors
+    honoring Retry-After with full-jitter exponential backoff.
+    """
+
+    def __init__(self, rate: float, burst: float, max_in_flight: int = 8,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {
+            "queue_depth": 0,
+            "in_flight": 0,
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "wait_count": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+        }
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return sem
+
+    def _bump(self, key: str, delta=1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def _record_wait(self, seconds: float):
+        with self._lock:
+            self._stats["wait_count"] += 1
+            self._stats["wait_total_s"] += seconds
+            self._stats["wait_max_s"] = max(self._stats["wait_max_s"], seconds)
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def submit(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Runs `send` once a token and an in-flight slot are available.
+        Returns the final response; raises the last transport error if every
+        attempt failed to connect.
+        """
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            dequeued = False
+            self._bump("queue_depth")
+            try:
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                async with self._semaphore():
+                    dequeued = True
+                    self._bump("queue_depth", -1)
+                    self._record_wait(time.monotonic() - queued_at)
+                    self._bump("in_flight")
+                    self._bump("requests")
+                    try:
+                        response, error = await send(), None
+                    except httpx.TransportError as e:
+                        response, error = None, e
+                    finally:
+                        self._bump("in_flight", -1)
+            finally:
+                if not dequeued:
+                    # Cancelled while still waiting for a token or slot
+                    self._bump("queue_depth", -1)
+
+            retryable = error is not None or response.status_code in RETRY_STATUS
+            if not retryable or attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self._backoff(attempt, response)
+            left = deadline.remaining()
+            if left is not None and left < delay:
+                # The caller would give up before the retry lands; fail now
+                if error is not None:
+                    raise error
+                return response
+            if response is not None and response.status_code == 429:
+                self._bump("throttled")
+                # The quota is per key, so hold back every caller, not just this one
+                self.bucket.pause(delay)
+            self._bump("retries")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of queue depth, in-flight count and wait-time metrics."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["wait_avg_s"] = snapshot["wait_total_s"] / snapshot["wait_count"] if snapshot["wait_count"] else 0.0
+        return snapshot
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parses Retry-After as delta-seconds or an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(key: str, **options) -> RequestScheduler:
+    """Returns the shared scheduler for an API key (created on first use)."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = RequestScheduler(**options)
+        return scheduler
@@ -0,0 +1,218 @@
+"""
+Record/replay of upstream responses (FRED, FINRA, Yahoo) for offline benchmarks.
+
+    MACRO_AGENT_REPLAY=record   live calls, every response saved to the cassette
+    MACRO_AGENT_REPLAY=replay   responses served from the cassette, no network
+    MACRO_AGENT_CASSETTE        cassette directory (default: cache dir/cassette)
+    MACRO_AGENT_REPLAY_LATENCY_MS
+                                injected replay latency, either one number for
+                                every source or "fred=80,yahoo=400,finra=600"
+
+Upstream calls are counted per source in every mode (upstream_calls()).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+from src.antigravity import metrics
+from src.antigravity.lazy import lazy_import
+from src.tools.storage import cache_path
+
+pd = lazy_import("pandas")
+
+# Upstream source labels by host; anything else is labelled by its host name
+SOURCES = {"api.stlouisfed.org": "fred", "www.finra.org": "finra", "finra.org": "finra"}
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def mode() -> str:
+    return os.environ.get("MACRO_AGENT_REPLAY", "").lower()
+
+
+def cassette_dir() -> str:
+    path = os.environ.get("MACRO_AGENT_CASSETTE") or os.path.dirname(cache_path("cassette", "_"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def latency(source: str) -> float:
+    """Injected replay latency for a source, in seconds."""
+    spec = os.environ.get("MACRO_AGENT_REPLAY_LATENCY_MS", "").strip()
+    if not spec:
+        return 0.0
+    if "=" not in spec:
+        return float(spec) / 1000.0
+    values = dict(part.split("=", 1) for part in spec.split(",") if "=" in part)
+    return float(values.get(source, 0)) / 1000.0
+
+
+def count(source: str, n: int = 1):
+    with _counts_lock:
+        _counts[source] += n
+
+
+def upstream_calls() -> Dict[str, int]:
+    with _counts_lock:
+        return dict(_counts)
+
+
+@metrics.register_collector
+def _collect_upstream_calls():
+    for source, calls in upstream_calls().items():
+        yield ("macro_agent_upstream_requests_total", "counter", "Requests sent to each upstream source.",
+               {"source": source}, calls)
+
+
+def reset_counts():
+    with _counts_lock:
+        _counts.clear()
+
+
+def source_of(request: httpx.Request) -> str:
+    host = request.url.host
+    return SOURCES.get(host, host)
+
+
+def http_key(method: str, url: str, params: Optional[dict] = None) -> str:
+    """Canonical request key: method + URL with sorted query, API key removed."""
+    parts = urlsplit(str(url))
+    query = [(k, str(v)) for k, v in parse_qsl(parts.query) + list((params or {}).items()) if k != "api_key"]
+    return f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}?{urlencode(sorted(query))}"
+
+
+def _entry_path(source: str, key: str) -> str:
+    return os.path.join(cassette_dir(), f"{source}-{hashlib.sha1(key.encode()).hexdigest()}.pkl")
+
+
+def save(source: str, key: str, payload):
+    path = _entry_path(source, key)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump({"key": key, "payload": payload}, f)
+    os.replace(path + ".tmp", path)
+
+
+def load(source: str, key: str):
+    """Recorded payload for a key, or None."""
+    path = _entry_path(source, key)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)["payload"]
+
+
+def _missing_response(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(404, json={"error": "not in cassette"}, request=request)
+
+
+def _to_payload(response: httpx.Response) -> dict:
+    return {"status": response.status_code, "headers": list(response.headers.items()), "content": response.content}
+
+
+def _from_payload(payload: dict, request: httpx.Request) -> httpx.Response:
+    # Content is already decoded, so drop encoding headers
+    headers = [(k, v) for k, v in payload["headers"] if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+    return httpx.Response(payload["status"], headers=headers, content=payload["content"], request=request)
+
+
+class AsyncRecordReplayTransport(httpx.AsyncBaseTransport):
+    """Wraps a real transport to count, record or replay requests."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        source = source_of(request)
+        count(source)
+        key = http_key(request.method, request.url)
+        if mode() == "replay":
+            await asyncio.sleep(latency(source))
+            payload = load(source, key)
+            if payload:
+                metrics.record_bytes(len(payload["content"]))
+            return _from_payload(payload, request) if payload else _missing_response(request)
+        response = await self.inner.handle_async_request(request)
+        # Bodies are small JSON/HTML pages; reading here lets us meter them
+        await response.aread()
+        metrics.record_bytes(len(response.content))
+        if mode() == "record":
+            save(source, key, _to_payload(response))
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class RecordReplayTransport(httpx.BaseTransport):
+    """Synchronous twin of AsyncRecordReplayTransport."""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        source = source_of(request)
+        count(source)
+        key = http_key(request.method, request.url)
+        if mode() == "replay":
+            time.sleep(latency(source))
+            payload = load(source, key)
+            if payload:
+                metrics.record_bytes(len(payload["content"]))
+            return _from_payload(payload, request) if payload else _missing_response(request)
+        response = self.inner.handle_request(request)
+        response.read()
+        metrics.record_bytes(len(response.content))
+        if mode() == "record":
+            save(source, key, _to_payload(response))
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+def yahoo_key(symbol: str, window: dict) -> str:
+    return symbol + "|" + ",".join(f"{k}={v}" for k, v in sorted(window.items()))
+
+
+def yahoo_download(download: Callable[..., pd.DataFrame], symbols: Iterable[str],
+                   timeout: Optional[float] = None, **window) -> pd.DataFrame:
+    """
+    Wraps a group_by='ticker' yf.download call. Frames are recorded per
+    symbol, so replay works however the batcher happens to group symbols.
+    `timeout` is passed through (it is not part of the recording key).
+    """
+    symbols = list(symbols)
+    count("yahoo")
+    if mode() == "replay":
+        delay = latency("yahoo")
+        if timeout is not None and delay > timeout:
+            # Like yfinance, a timed-out download comes back empty
+            time.sleep(timeout)
+            return pd.DataFrame()
+        time.sleep(delay)
+        frames = {}
+        for sym in symbols:
+            frame = load("yahoo", yahoo_key(sym, window))
+            if frame is not None:
+                frames[sym] = frame
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    data = download(symbols, **window) if timeout is None else download(symbols, timeout=timeout, **window)
+    if mode() == "record" and isinstance(data.columns, pd.MultiIndex):
+        for sym in symbols:
+            if sym in data.columns.get_level_values(0):
+                save("yahoo", yahoo_key(sym, window), data[sym])
+    return data
@@ -0,0 +1,12 @@
+import os
+
+
+def cache_path(*parts: str) -> str:
+    """
+    Path inside the local data cache, creating parent folders as needed.
+    Defaults to ~/.macro_agent; override with MACRO_AGENT_CACHE_DIR.
+    """
+    root = os.environ.get("MACRO_AGENT_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".macro_agent")
+    path = os.path.join(root, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,24 @@
+"""
+An agent's sections may only read result keys its tools produce.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.agents.macro_watchdog import ANALYSIS_SECTIONS, get_sector_performance, macro_agent
+from src.antigravity.core import Agent
+
+
+def test_every_section_input_has_a_producing_tool():
+    Agent(name="check", instructions="", tools=macro_agent.tools, analysis_sections=ANALYSIS_SECTIONS)
+
+
+def test_section_reading_an_unproduced_key_is_rejected():
+    tools = [t for t in macro_agent.tools if t is not get_sector_performance]
+    with pytest.raises(ValueError, match="Sector Performance"):
+        Agent(name="check", instructions="", tools=tools, analysis_sections=ANALYSIS_SECTIONS)
@@ -0,0 +1,80 @@
+"""
+health_history scores the latest date like analyze_macro_data scores the
+same data.
+
+    python -m pytest tests
+"""
+import os
+import re
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from src.agents.health_history import align_inputs, score_history
+from src.agents.macro_watchdog import analyze_macro_data
+from src.tools import market_data
+from src.tools.market_data import TICKER_REGISTRY
+
+START, END = date(2024, 1, 1), date(2024, 3, 29)
+DAYS = pd.bdate_range(START, END)
+
+
+def closes(vix: float, metal_move: float) -> pd.DataFrame:
+    """Flat closes except the last VIX print and a `metal_move` % over gold's last 5 bars."""
+    frame = pd.DataFrame({"^VIX": 18.0, "HYG": 77.0, "TLT": 93.0}, index=DAYS)
+    frame.loc[DAYS[-1], "^VIX"] = vix
+    for symbol in market_data.symbols("metals"):
+        frame[symbol] = 100.0
+    frame.loc[DAYS[-1], "GC=F"] = 100.0 * (1 + metal_move / 100)
+    return frame
+
+
+def tool_results(fred: dict, bars: pd.DataFrame, margin: list) -> dict:
+    """What the audit's tools report for the same data (values rounded as they round them)."""
+    last = bars.iloc[-1]
+    metals = {}
+    for symbol, name in TICKER_REGISTRY["metals"].items():
+        window = bars[symbol].iloc[-5:]
+        metals[name] = {"price": round(window.iloc[-1], 2),
+                        "5d_change_pct": round((window.iloc[-1] - window.iloc[0]) / window.iloc[0] * 100, 2)}
+    results = {series_id: {"value": records[-1]["value"], "date": records[-1]["date"]}
+               for series_id, records in fred.items()}
+    results["Market Sentiment"] = {"vix": round(last["^VIX"], 2), "risk_ratio": round(last["HYG"] / last["TLT"], 4)}
+    results["Metals"] = {"metals": metals}
+    if margin:
+        results["Margin Debt"] = {"value": margin[-1]["DebitBalances"], "date": margin[-1]["Date"]}
+    return results
+
+
+CASES = {
+    # VIX just over 30 before the tool rounds it; RRP of 0 reads as missing
+    "rounded_vix_zero_rrp": (
+        {"GFDEGDQ188S": [{"date": "2023-10-01", "value": 121.4}],
+         "INDPRO": [{"date": "2024-02-01", "value": 102.96}],
+         "RRPONTSYD": [{"date": "2024-03-28", "value": 0.0}]},
+        closes(vix=30.004, metal_move=3.5),
+        [{"Date": "2024-02-29", "DebitBalances": 780000}],
+    ),
+    "calm_without_margin_debt": (
+        {"GFDEGDQ188S": [{"date": "2023-10-01", "value": 98.0}],
+         "INDPRO": [{"date": "2024-02-01", "value": 104.2}],
+         "RRPONTSYD": [{"date": "2024-03-28", "value": 450.0}]},
+        closes(vix=13.2, metal_move=1.0),
+        [],
+    ),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_latest_score_matches_analyze_macro_data(case):
+    fred, bars, margin = CASES[case]
+    history = score_history(align_inputs(fred, bars, margin, START, END))
+    report = analyze_macro_data(tool_results(fred, bars, margin))
+
+    score, verdict = re.search(r"MACRO HEALTH SCORE: (-?\d+) \((.+)\)$", report, re.MULTILINE).groups()
+    latest = history.iloc[-1]
+    assert (int(latest["score"]), latest["verdict"]) == (int(score), verdict)
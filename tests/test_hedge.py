@@ -0,0 +1,80 @@
+"""
+A hedged call that loses its race must not disturb other callers sharing
+the same in-flight (single-flight) tool call.
+
+    python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.antigravity.core import Agent, Session
+from src.antigravity.tools import tool
+
+SLOW = 0.3
+upstream_calls = 0
+
+
+@tool(ttl=60, hedge=True)
+async def get_quote(symbol: str):
+    """Slow on the first (shared) call, fast for the hedge duplicate."""
+    global upstream_calls
+    upstream_calls += 1
+    call = upstream_calls
+    await asyncio.sleep(SLOW if call == 1 else 0.0)
+    return {"symbol": symbol, "call": call}
+
+
+def reset():
+    global upstream_calls
+    upstream_calls = 0
+    get_quote.cache_clear()
+
+
+def test_hedged_joiner_loses_without_cancelling_the_shared_call():
+    """
+    Session A starts a slow cached call. Session B's hedged call joins it,
+    then its uncached duplicate wins and the joined attempt is cancelled; a
+    third caller joins under a short timeout and gives up. A and a plain
+    joiner still get the one upstream result.
+    """
+    async def run():
+        agent = Agent(name="check", instructions="", tools=[get_quote])
+        leader = Session(agent)
+        hedged = Session(agent, hedge_after=0.05)
+
+        first = asyncio.ensure_future(leader._call(get_quote, {"symbol": "SPY"}))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(
+            first,
+            hedged._call(get_quote, {"symbol": "SPY"}),
+            get_quote(symbol="SPY"),
+            asyncio.wait_for(get_quote(symbol="SPY"), 0.05),
+            return_exceptions=True,
+        )
+
+    reset()
+    leader, hedged, joiner, timed_out = asyncio.run(run())
+    assert leader == {"symbol": "SPY", "call": 1}
+    assert joiner == leader
+    # The hedge duplicate's result
+    assert isinstance(hedged, dict) and hedged["call"] == 2
+    assert isinstance(timed_out, asyncio.TimeoutError)
+
+
+def test_hedged_leader_loses_without_cancelling_the_shared_call():
+    """The hedged session leads the shared call and cancels it on losing; its joiner still gets the result."""
+    async def run():
+        agent = Agent(name="check", instructions="", tools=[get_quote])
+        hedged = Session(agent, hedge_after=0.05)
+
+        first = asyncio.ensure_future(hedged._call(get_quote, {"symbol": "SPY"}))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, get_quote(symbol="SPY"), return_exceptions=True)
+
+    reset()
+    hedged_leader, joiner = asyncio.run(run())
+    assert isinstance(hedged_leader, dict) and hedged_leader["call"] == 2
+    assert joiner == {"symbol": "SPY", "call": 1}